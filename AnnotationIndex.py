@@ -0,0 +1,440 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: A columnar index of the VOC annotations of a directory.
+Every xml file is parsed once, its content is stored in numpy columns
+and the columns can be persisted to disk keyed by the modification time
+and size of the xml files. Later passes over the dataset read the columns
+instead of parsing the xml files again, and a refresh only parses the
+files that were added or changed.
+"""
+import os
+import collections
+import numpy as np
+
+try:
+	from .ImageAnnotation import *
+except:
+	from ImageAnnotation import *
+
+try:
+	from .Instrumentation import instrumentation
+except:
+	from Instrumentation import instrumentation
+
+# The files of a directory that changed between two scans.
+# added, changed, deleted: Sorted lists of file names.
+DirectoryChanges = collections.namedtuple("DirectoryChanges", ["added", "changed", "deleted"])
+
+# The changes found by AnnotationIndex.refresh.
+# images: A DirectoryChanges with the names of the images, including their extension.
+# annotations: A DirectoryChanges with the names of the xml files, without extension.
+IndexChanges = collections.namedtuple("IndexChanges", ["images", "annotations"])
+
+class AnnotationIndex(object):
+	# Version of the format of the persisted index.
+	version = 2
+
+	def __init__(self, annotationsDirectory = None, indexPath = None, imagesDirectory = None):
+		"""
+		An index of the annotations of a directory.
+		Args:
+			annotationsDirectory: A string that contains the path to a directory of
+														xml annotations.
+			indexPath: A string that contains the path of the file where the index
+									is persisted. If None, the index is kept in memory only
+									and nothing is written to disk.
+			imagesDirectory: A string that contains the path to the directory of the
+												images. If not None, the files of the directory are
+												tracked as well.
+		Returns:
+			None
+		"""
+		super(AnnotationIndex, self).__init__()
+		# Assertions
+		if (annotationsDirectory == None):
+			raise ValueError("ERROR: annotationsDirectory parameter cannot be empty.")
+		if (not os.path.isdir(annotationsDirectory)):
+			raise Exception("ERROR: Path to annotations does not exist: {}".format(annotationsDirectory))
+		if ((imagesDirectory != None) and (not os.path.isdir(imagesDirectory))):
+			raise Exception("ERROR: Path to images does not exist: {}".format(imagesDirectory))
+		# Class variables
+		self.annotationsDirectory = annotationsDirectory
+		self.imagesDirectory = imagesDirectory
+		self.indexPath = indexPath
+		self.loaded = False
+		self.clear()
+
+	def clear(self):
+		"""
+		Empties the index.
+		Args:
+			None
+		Returns:
+			None
+		"""
+		# Per file columns.
+		self.fileNames = []
+		self.mtimes = np.zeros([0], np.int64)
+		self.fileSizes = np.zeros([0], np.int64)
+		self.sizes = np.zeros([0, 3], np.int32)
+		self.offsets = np.zeros([1], np.int64)
+		# Per bounding box columns.
+		self.classNames = []
+		self.imageIds = np.zeros([0], np.int32)
+		self.classIds = np.zeros([0], np.int32)
+		self.boxes = np.zeros([0, 4], np.int32)
+		# Position of every file name.
+		self.positions = {}
+		# Files of the images directory: name -> (mtime, size).
+		self.images = {}
+		# Files of the annotations directory that are not xml files.
+		self.otherFiles = []
+
+	@property
+	def propertyIndexPath(self):
+		return self.indexPath
+
+	@property
+	def propertyFileNames(self):
+		return self.fileNames
+
+	@property
+	def propertySizes(self):
+		return self.sizes
+
+	@property
+	def propertyOffsets(self):
+		return self.offsets
+
+	@property
+	def propertyClassNames(self):
+		return self.classNames
+
+	@property
+	def propertyImageIds(self):
+		return self.imageIds
+
+	@property
+	def propertyClassIds(self):
+		return self.classIds
+
+	@property
+	def propertyBoxes(self):
+		return self.boxes
+
+	@property
+	def propertyCounts(self):
+		return np.diff(self.offsets)
+
+	@property
+	def propertyImageNames(self):
+		return sorted(self.images)
+
+	@property
+	def propertyOtherFiles(self):
+		return self.otherFiles
+
+	def __len__(self):
+		return len(self.fileNames)
+
+	def __contains__(self, name):
+		return name in self.positions
+
+	def __getstate__(self):
+		# Only the location of the index is copied, the columns are not.
+		return {"annotationsDirectory": self.annotationsDirectory,
+						"imagesDirectory": self.imagesDirectory,
+						"indexPath": self.indexPath}
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.loaded = False
+		self.clear()
+
+	def update(self):
+		"""
+		Makes sure the index matches the directories. See refresh.
+		Args:
+			None
+		Returns:
+			A boolean that is True if any file was added, changed or deleted.
+		"""
+		changes = self.refresh()
+		return (countChanges(changes = changes.images) + countChanges(changes = changes.annotations)) > 0
+
+	def refresh(self):
+		"""
+		Scans the directories and updates the index. Only the xml files that were
+		added or changed since the last refresh are parsed. A file changed if its
+		modification time or its size changed. The first refresh of an instance
+		starts from the persisted index, if any.
+		Args:
+			None
+		Returns:
+			An IndexChanges. images is None if the images are not tracked.
+		"""
+		# Local variables
+		if (not self.loaded):
+			self.load()
+			self.loaded = True
+		previousAnnotations = {self.fileNames[i]: (int(self.mtimes[i]), int(self.fileSizes[i])) \
+														for i in range(len(self.fileNames))}
+		# Logic
+		annotations, self.otherFiles = scanDirectory(directory = self.annotationsDirectory,
+																								extension = ".xml")
+		annotationChanges = compareScans(previous = previousAnnotations, current = annotations)
+		imageChanges = None
+		if (self.imagesDirectory != None):
+			images, otherImages = scanDirectory(directory = self.imagesDirectory)
+			imageChanges = compareScans(previous = self.images, current = images)
+			self.images = images
+		if (countChanges(changes = annotationChanges) > 0):
+			self.merge(annotations = annotations, parse = annotationChanges.added + annotationChanges.changed)
+		if ((countChanges(changes = annotationChanges) + countChanges(changes = imageChanges)) > 0):
+			self.save()
+		return IndexChanges(images = imageChanges, annotations = annotationChanges)
+
+	def merge(self, annotations = None, parse = None):
+		"""
+		Rebuilds the columns from the rows of the index that did not change and
+		the xml files that have to be parsed.
+		Args:
+			annotations: A hashmap name -> (mtime, size) with the current xml files.
+			parse: A list with the names of the xml files that have to be parsed.
+		Returns:
+			None
+		"""
+		# Parse the new and changed annotations.
+		classIndex = {name: i for i, name in enumerate(self.classNames)}
+		parsed = {}
+		parsedSizes = np.zeros([len(parse), 3], np.int32)
+		parsedCounts = np.zeros([len(parse)], np.int64)
+		parsedClassIds = []
+		parsedBoxes = []
+		for k in range(len(parse)):
+			path = os.path.join(self.annotationsDirectory, parse[k] + ".xml")
+			with instrumentation.stage("annotationParse") as stage:
+				size, classNames, boundingBoxes = parseAnnotationStream(path = path)
+				stage.addFileBytes(path)
+			parsed[parse[k]] = k
+			parsedSizes[k] = size
+			parsedCounts[k] = len(boundingBoxes)
+			for name in classNames:
+				if (not (name in classIndex)):
+					classIndex[name] = len(classIndex)
+				parsedClassIds.append(classIndex[name])
+			parsedBoxes.append(boundingBoxes)
+		# The parsed rows are appended after the previous rows, every file of the
+		# new index points to its row in the combined columns.
+		names = sorted(annotations)
+		previousCount = len(self.fileNames)
+		rows = np.array([parsed[name] + previousCount if (name in parsed) else self.positions[name] \
+										for name in names], np.int64).reshape(-1)
+		counts = np.concatenate([np.diff(self.offsets), parsedCounts])[rows]
+		starts = np.concatenate([self.offsets[:-1], parsedCounts.cumsum() - parsedCounts + self.offsets[-1]])[rows]
+		offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+		boxRows = np.repeat(starts - offsets[:-1], counts) + np.arange(offsets[-1], dtype = np.int64)
+		# Gather the columns.
+		sizes = np.concatenate([self.sizes, parsedSizes])[rows]
+		classIds = np.concatenate([self.classIds, np.array(parsedClassIds, np.int32)])[boxRows]
+		boxes = np.concatenate([self.boxes, np.concatenate([np.zeros([0, 4], np.int32)] + parsedBoxes)])[boxRows]
+		images = self.images
+		self.clear()
+		self.images = images
+		self.fileNames = names
+		self.mtimes = np.array([annotations[name][0] for name in names], np.int64)
+		self.fileSizes = np.array([annotations[name][1] for name in names], np.int64)
+		self.sizes = sizes.reshape(-1, 3)
+		self.offsets = offsets
+		self.classNames = sorted(classIndex, key = classIndex.get)
+		self.imageIds = np.repeat(np.arange(len(names), dtype = np.int32), counts)
+		self.classIds = classIds
+		self.boxes = boxes.reshape(-1, 4)
+		self.positions = {name: i for i, name in enumerate(self.fileNames)}
+
+	def save(self):
+		"""
+		Persists the index. Failing to write the file is not an error, the
+		index is kept in memory.
+		Args:
+			None
+		Returns:
+			A boolean that is True if the index was written.
+		"""
+		if (self.indexPath == None):
+			return False
+		imageNames = sorted(self.images)
+		temporaryPath = self.indexPath + ".tmp.npz"
+		try:
+			np.savez(temporaryPath,
+							version = np.array([AnnotationIndex.version], np.int32),
+							fileNames = encodeStrings(self.fileNames),
+							mtimes = self.mtimes,
+							fileSizes = self.fileSizes,
+							sizes = self.sizes,
+							offsets = self.offsets,
+							classNames = encodeStrings(self.classNames),
+							classIds = self.classIds,
+							boxes = self.boxes,
+							imageNames = encodeStrings(imageNames),
+							imageStats = np.array([self.images[name] for name in imageNames], np.int64).reshape(-1, 2))
+			os.replace(temporaryPath, self.indexPath)
+		except OSError as e:
+			print("WARNING: The annotation index could not be saved: {}".format(e))
+			return False
+		return True
+
+	def load(self):
+		"""
+		Loads the persisted index.
+		Args:
+			None
+		Returns:
+			A boolean that is True if the index was loaded.
+		"""
+		if ((self.indexPath == None) or (not os.path.isfile(self.indexPath))):
+			return False
+		try:
+			with np.load(self.indexPath, allow_pickle = False) as data:
+				if (int(data["version"][0]) != AnnotationIndex.version):
+					return False
+				fileNames = decodeStrings(data["fileNames"])
+				columns = {key: data[key] for key in ["mtimes", "fileSizes", "sizes", "offsets", \
+																							"classIds", "boxes", "imageStats"]}
+				classNames = decodeStrings(data["classNames"])
+				imageNames = decodeStrings(data["imageNames"])
+		except (OSError, KeyError, ValueError) as e:
+			print("WARNING: The annotation index could not be loaded: {}".format(e))
+			return False
+		self.clear()
+		self.fileNames = fileNames
+		self.mtimes = columns["mtimes"]
+		self.fileSizes = columns["fileSizes"]
+		self.sizes = columns["sizes"]
+		self.offsets = columns["offsets"]
+		self.classNames = classNames
+		self.imageIds = np.repeat(np.arange(len(fileNames), dtype = np.int32), np.diff(self.offsets))
+		self.classIds = columns["classIds"]
+		self.boxes = columns["boxes"]
+		self.positions = {name: i for i, name in enumerate(self.fileNames)}
+		if (self.imagesDirectory != None):
+			self.images = {imageNames[i]: tuple(columns["imageStats"][i].tolist()) \
+											for i in range(len(imageNames))}
+		return True
+
+	def position(self, name = None):
+		"""
+		Finds the position of an annotation in the index.
+		Args:
+			name: A string that contains the name of the xml file without extension.
+		Returns:
+			An int.
+		Raises:
+			- ValueError: when the annotation does not exist.
+		"""
+		if (not (name in self.positions)):
+			raise ValueError("Path parameter does not exist: {}"\
+												.format(os.path.join(self.annotationsDirectory, name + ".xml")))
+		return self.positions[name]
+
+	def isCurrent(self, name = None):
+		"""
+		Checks that the xml file of an annotation did not change since it was
+		indexed, with the same modification time and size test as refresh.
+		Args:
+			name: A string that contains the name of the xml file without extension.
+		Returns:
+			A boolean that is False if the annotation is not in the index, or if its
+			file changed or does not exist anymore.
+		"""
+		if (not (name in self.positions)):
+			return False
+		i = self.positions[name]
+		try:
+			stat = os.stat(os.path.join(self.annotationsDirectory, name + ".xml"))
+		except OSError:
+			return False
+		return (stat.st_mtime_ns == self.mtimes[i]) and (stat.st_size == self.fileSizes[i])
+
+	def find(self, name = None):
+		"""
+		Reads an annotation from the index.
+		Args:
+			name: A string that contains the name of the xml file without extension.
+		Returns:
+			A list with the size [height, width, depth], a list of strings with the
+			names of the objects and a list of lists with the bounding boxes like
+			ImageAnnotation.
+		"""
+		i = self.position(name = name)
+		start, end = self.offsets[i], self.offsets[i+1]
+		names = [self.classNames[j] for j in self.classIds[start:end]]
+		return self.sizes[i].tolist(), names, self.boxes[start:end].tolist()
+
+def scanDirectory(directory = None, extension = None):
+	"""
+	Lists the files of a directory with os.scandir.
+	Args:
+		directory: A string that contains the path to a directory.
+		extension: A string. If not None, only the files with this extension are
+								scanned and their names are returned without it.
+	Returns:
+		A hashmap name -> (mtime in nanoseconds, size in bytes) and a sorted list
+		with the names of the files that do not have the extension.
+	"""
+	files = {}
+	otherFiles = []
+	for entry in os.scandir(directory):
+		if (not entry.is_file()):
+			continue
+		if (extension == None):
+			name = entry.name
+		elif (entry.name.endswith(extension)):
+			name = entry.name[:-len(extension)]
+		else:
+			otherFiles.append(entry.name)
+			continue
+		stat = entry.stat()
+		files[name] = (stat.st_mtime_ns, stat.st_size)
+	return files, sorted(otherFiles)
+
+def compareScans(previous = None, current = None):
+	"""
+	Compares two scans of a directory.
+	Args:
+		previous: A hashmap name -> (mtime, size).
+		current: A hashmap name -> (mtime, size).
+	Returns:
+		A DirectoryChanges.
+	"""
+	added = sorted(current.keys() - previous.keys())
+	deleted = sorted(previous.keys() - current.keys())
+	changed = sorted([name for name in current.keys() & previous.keys() \
+										if (current[name] != previous[name])])
+	return DirectoryChanges(added = added, changed = changed, deleted = deleted)
+
+def countChanges(changes = None):
+	"""
+	Counts the files of a DirectoryChanges.
+	Args:
+		changes: A DirectoryChanges or None.
+	Returns:
+		An int.
+	"""
+	if (changes == None):
+		return 0
+	return len(changes.added) + len(changes.changed) + len(changes.deleted)
+
+def encodeStrings(strings = None):
+	"""
+	Encodes a list of strings into a uint8 array of newline separated utf-8 text.
+	"""
+	return np.frombuffer("\n".join(strings).encode("utf-8"), np.uint8)
+
+def decodeStrings(data = None):
+	"""
+	Decodes a uint8 array created by encodeStrings.
+	"""
+	text = data.tobytes().decode("utf-8")
+	return text.split("\n") if (len(text) > 0) else []
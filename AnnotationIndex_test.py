@@ -0,0 +1,100 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Unit tests for the AnnotationIndex class.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from AnnotationIndex import *
+from Util import *
+
+class AnnotationIndex_test(unittest.TestCase):
+
+	def setUp(self):
+		self.root = tempfile.mkdtemp()
+		self.annts = os.path.join(self.root, "xmls")
+		os.mkdir(self.annts)
+		self.saveAnnotation(name = "a", boundingBoxes = [[1, 2, 30, 40], [5, 6, 70, 80]], names = ["car", "bus"])
+		self.saveAnnotation(name = "b", boundingBoxes = [[3, 4, 50, 60]], names = ["bus"])
+
+	def tearDown(self):
+		shutil.rmtree(self.root)
+
+	def saveAnnotation(self, name = None, boundingBoxes = None, names = None):
+		Util.save_annotation(filename = name + ".png",
+												path = name + ".png",
+												database_name = "unit_test",
+												frame_size = (100, 200, 3),
+												data_augmentation_type = "Unspecified",
+												bounding_boxes = boundingBoxes,
+												names = names,
+												origin = "unit_test",
+												output_directory = os.path.join(self.annts, name + ".xml"))
+
+	def test_build(self):
+		index = AnnotationIndex(annotationsDirectory = self.annts)
+		self.assertTrue(index.update())
+		self.assertEqual(index.propertyFileNames, ["a", "b"])
+		self.assertEqual(index.propertyClassNames, ["car", "bus"])
+		self.assertEqual(index.propertyBoxes.dtype, np.int32)
+		self.assertEqual(index.propertyImageIds.tolist(), [0, 0, 1])
+		self.assertEqual(index.propertyClassIds.tolist(), [0, 1, 1])
+		self.assertEqual(index.find(name = "a"), ([100, 200, 3], ["car", "bus"], [[1, 2, 30, 40], [5, 6, 70, 80]]))
+		self.assertTrue(index.isCurrent(name = "a"))
+		# Without indexPath nothing is written to disk.
+		self.assertIsNone(index.propertyIndexPath)
+		self.assertEqual(sorted(os.listdir(self.root)), ["xmls"])
+		self.assertEqual(sorted(os.listdir(self.annts)), ["a.xml", "b.xml"])
+		with self.assertRaises(ValueError):
+			index.find(name = "c")
+
+	def test_persistence(self):
+		indexPath = os.path.join(self.root, "index.npz")
+		AnnotationIndex(annotationsDirectory = self.annts, indexPath = indexPath).update()
+		self.assertTrue(os.path.isfile(indexPath))
+		# A new index loads the columns without parsing the annotations.
+		index = AnnotationIndex(annotationsDirectory = self.annts, indexPath = indexPath)
+		self.assertFalse(index.update())
+		self.assertEqual(index.find(name = "b"), ([100, 200, 3], ["bus"], [[3, 4, 50, 60]]))
+		# Changing an annotation invalidates the index.
+		self.saveAnnotation(name = "b", boundingBoxes = [], names = [])
+		os.utime(os.path.join(self.annts, "b.xml"), ns = (0, 0))
+		self.assertFalse(index.isCurrent(name = "b"))
+		self.assertTrue(index.update())
+		self.assertTrue(index.isCurrent(name = "b"))
+		self.assertEqual(index.find(name = "b"), ([100, 200, 3], [], []))
+		self.assertFalse(AnnotationIndex(annotationsDirectory = self.annts, indexPath = indexPath).update())
+
+	def test_refresh(self):
+		images = os.path.join(self.root, "images")
+		os.mkdir(images)
+		for name in ["a.png", "b.png"]:
+			open(os.path.join(images, name), "wb").close()
+		indexPath = os.path.join(self.root, "index.npz")
+		index = AnnotationIndex(annotationsDirectory = self.annts, imagesDirectory = images, indexPath = indexPath)
+		changes = index.refresh()
+		self.assertEqual(changes.annotations.added, ["a", "b"])
+		self.assertEqual(changes.images.added, ["a.png", "b.png"])
+		# Add, change and delete files.
+		self.saveAnnotation(name = "c", boundingBoxes = [[7, 8, 9, 10]], names = ["truck"])
+		self.saveAnnotation(name = "a", boundingBoxes = [[1, 2, 3, 4]], names = ["bus"])
+		os.utime(os.path.join(self.annts, "a.xml"), ns = (0, 0))
+		os.remove(os.path.join(self.annts, "b.xml"))
+		with open(os.path.join(images, "b.png"), "wb") as f:
+			f.write(b"changed")
+		# A new instance starts from the persisted index.
+		index = AnnotationIndex(annotationsDirectory = self.annts, imagesDirectory = images, indexPath = indexPath)
+		changes = index.refresh()
+		self.assertEqual(changes.annotations, DirectoryChanges(added = ["c"], changed = ["a"], deleted = ["b"]))
+		self.assertEqual(changes.images, DirectoryChanges(added = [], changed = ["b.png"], deleted = []))
+		self.assertEqual(index.propertyFileNames, ["a", "c"])
+		self.assertEqual(index.find(name = "a"), ([100, 200, 3], ["bus"], [[1, 2, 3, 4]]))
+		self.assertEqual(index.find(name = "c"), ([100, 200, 3], ["truck"], [[7, 8, 9, 10]]))
+		self.assertEqual(index.propertyImageIds.tolist(), [0, 1])
+		self.assertFalse(index.update())
+
+if __name__ == "__main__":
+	unittest.main()
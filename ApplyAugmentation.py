@@ -1,9 +1,13 @@
 """
 Author: Rodrigo Loza
 Email: lozuwaucb@gmail.com
-Description: Methods that apply a type of data augmentation.
+Description: Methods that apply a type of data augmentation. The augmenters
+are looked up in registries that map the name of an augmenter to its function
+and its parameters, so new augmenters can be added with registerAugmenter.
 """
 
+import random
+import collections
 import numpy as np
 
 try:
@@ -21,10 +25,240 @@ try:
 except:
 	from GeometricAugmenters import *
 
+try:
+	from .Instrumentation import instrumentation
+except:
+	from Instrumentation import instrumentation
+
 bndboxAugmenter = BoundingBoxAugmenters()
 colorAugmenter = ColorAugmenters()
 geometricAugmenter = GeometricAugmenters()
 
+def seedAugmenters(seed = None):
+	"""
+	Seeds the random generators used by the augmenters of this process.
+	Args:
+		seed: An int that contains the seed.
+	Returns:
+		None
+	"""
+	# Assertions
+	if (seed == None):
+		raise ValueError("ERROR: seed parameter cannot be empty.")
+	# Logic
+	np.random.seed(seed)
+	random.seed(seed)
+	colorAugmenter.seedRandomGenerator(seed = seed)
+
+# Names of the configurations an augmenter can belong to.
+boundingBoxConf = "bounding_box_augmenters"
+colorConf = "image_color_augmenters"
+geometricConf = "image_geometric_augmenters"
+
+# An entry of a registry.
+# function: A callable. Bounding box augmenters are called as
+#						f(frame = ..., boundingBoxes = ..., **parameters) and return a frame and
+#						a list of bounding boxes. Color and geometric augmenters are called as
+#						f(frame = ..., **parameters) and return a frame.
+# required: A tuple with the names of the parameters that must be in the configuration.
+# defaults: A hashmap with the optional parameters and their default values.
+Augmenter = collections.namedtuple("Augmenter", ["function", "required", "defaults"])
+
+registries = {boundingBoxConf: {}, colorConf: {}, geometricConf: {}}
+
+# Parameters that the caller of a BoundAugmenter sets on every call, for the
+# augmenters that have them among their defaults.
+# inPlace: A boolean that is True if the frame belongs to the caller and can be overwritten.
+# cacheKey: A hashable that identifies the original image while the frame is not augmented yet, else None.
+runtimeParameters = ("inPlace", "cacheKey")
+
+def registerAugmenter(augmentationConf = None, augmentationType = None, function = None, required = None, defaults = None):
+	"""
+	Registers an augmenter. Once registered, the augmenter can be used by name in
+	a configuration file. Registering an existing name replaces the augmenter.
+	Args:
+		augmentationConf: A string that contains the type of configuration the
+											augmenter belongs to.
+		augmentationType: A string that contains the name of the augmenter.
+		function: A callable that applies the augmentation.
+		required: A list of strings with the names of the required parameters.
+		defaults: A hashmap with the optional parameters and their default values.
+	Returns:
+		None
+	"""
+	# Assertions
+	if (not (augmentationConf in registries)):
+		raise ValueError("ERROR: {} is not a valid configuration.".format(augmentationConf))
+	if (augmentationType == None):
+		raise ValueError("ERROR: augmentationType parameter cannot be empty.")
+	if (not callable(function)):
+		raise TypeError("ERROR: function parameter must be callable.")
+	if (required == None):
+		required = []
+	if (defaults == None):
+		defaults = {}
+	# Logic
+	registries[augmentationConf][augmentationType] = Augmenter(function = function,
+																														required = tuple(required),
+																														defaults = dict(defaults))
+
+def registerBoundingBoxAugmenter(augmentationType = None, function = None, required = None, defaults = None):
+	"""
+	Registers a bounding box augmenter. See registerAugmenter.
+	function is called as f(frame = ..., boundingBoxes = ..., **parameters) and
+	returns a frame and a list of bounding boxes.
+	"""
+	registerAugmenter(augmentationConf = boundingBoxConf, augmentationType = augmentationType,
+										function = function, required = required, defaults = defaults)
+
+def registerColorAugmenter(augmentationType = None, function = None, required = None, defaults = None):
+	"""
+	Registers a color augmenter. See registerAugmenter.
+	function is called as f(frame = ..., **parameters) and returns a frame.
+	"""
+	registerAugmenter(augmentationConf = colorConf, augmentationType = augmentationType,
+										function = function, required = required, defaults = defaults)
+
+def registerGeometricAugmenter(augmentationType = None, function = None, required = None, defaults = None):
+	"""
+	Registers a geometric augmenter. See registerAugmenter.
+	function is called as f(frame = ..., **parameters) and returns a frame.
+	"""
+	registerAugmenter(augmentationConf = geometricConf, augmentationType = augmentationType,
+										function = function, required = required, defaults = defaults)
+
+def isRegisteredAugmenter(augmentationConf = None, augmentationType = None):
+	"""
+	Checks if an augmenter is registered.
+	Args:
+		augmentationConf: A string that contains the type of configuration.
+		augmentationType: A string that contains the name of the augmenter.
+	Returns:
+		A boolean that is True if the augmenter is registered.
+	"""
+	return (augmentationConf in registries) and (augmentationType in registries[augmentationConf])
+
+def findAugmenter(augmentationConf = None, augmentationType = None):
+	"""
+	Looks up an augmenter in the registries.
+	Args:
+		augmentationConf: A string that contains the type of configuration.
+		augmentationType: A string that contains the name of the augmenter.
+	Returns:
+		An Augmenter.
+	"""
+	if (not (augmentationConf in registries)):
+		raise ValueError("ERROR: {} is not a valid configuration.".format(augmentationConf))
+	if (not (augmentationType in registries[augmentationConf])):
+		raise Exception("Augmentation type not supported: {}/{}."\
+										.format(augmentationConf, augmentationType))
+	return registries[augmentationConf][augmentationType]
+
+def parseAugmenterParameters(augmentationConf = None, augmentationType = None, parameters = None):
+	"""
+	Validates the parameters of an augmenter and fills the missing optional
+	parameters with their default values. Keys that are not parameters of the
+	augmenter (save, restartFrame, randomEvent, ...) are dropped.
+	Args:
+		augmentationConf: A string that contains the type of configuration.
+		augmentationType: A string that contains the name of the augmenter.
+		parameters: A hashmap that contains the parameters of the augmenter.
+	Returns:
+		A hashmap that contains the keyword arguments of the augmenter.
+	"""
+	# Local variables
+	augmenter = findAugmenter(augmentationConf = augmentationConf, augmentationType = augmentationType)
+	if (parameters == None):
+		parameters = {}
+	arguments = {}
+	# Logic
+	for name in augmenter.required:
+		if (not (name in parameters)):
+			raise Exception("ERROR: {} requires parameter {}.".format(augmentationType, name))
+		arguments[name] = parameters[name]
+	for name in augmenter.defaults:
+		arguments[name] = parameters[name] if (name in parameters) else augmenter.defaults[name]
+	return arguments
+
+class BoundAugmenter(object):
+	def __init__(self, augmentationConf = None, augmentationType = None, parameters = None):
+		"""
+		An augmenter with its parameters already validated. Calling it applies
+		the augmentation without looking at the configuration again.
+		Args:
+			augmentationConf: A string that contains the type of configuration.
+			augmentationType: A string that contains the name of the augmenter.
+			parameters: A hashmap that contains the parameters of the augmenter.
+		Returns:
+			None
+		"""
+		super(BoundAugmenter, self).__init__()
+		# Class variables
+		self.augmentationConf = augmentationConf
+		self.augmentationType = augmentationType
+		self.parameters = parseAugmenterParameters(augmentationConf = augmentationConf,
+																								augmentationType = augmentationType,
+																								parameters = parameters)
+		self.resolve()
+
+	def resolve(self):
+		"""
+		Looks up the function of the augmenter in the registries of this process.
+		"""
+		self.function = findAugmenter(augmentationConf = self.augmentationConf,
+																	augmentationType = self.augmentationType).function
+		self.modifiesBoundingBoxes = (self.augmentationConf == boundingBoxConf)
+		self.runtimeParameters = tuple([name for name in runtimeParameters if (name in self.parameters)])
+		self.stageName = "augment/{}/{}".format(self.augmentationConf, self.augmentationType)
+
+	def __getstate__(self):
+		# The function is looked up by name when unpickled, so workers use
+		# their own augmenters and random generators.
+		return {"augmentationConf": self.augmentationConf,
+						"augmentationType": self.augmentationType,
+						"parameters": self.parameters}
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.resolve()
+
+	def __call__(self, frame = None, boundingBoxes = None, **runtime):
+		"""
+		Applies the augmentation.
+		Args:
+			frame: A tensor that contains an image.
+			boundingBoxes: A list of lists of integers that contains coordinates.
+			runtime: Values of runtimeParameters. They are passed to the augmenters
+								that have them, the others ignore them.
+		Returns:
+			A tensor that contains the frame and a list of lists that contains
+			the bounding boxes.
+		"""
+		parameters = self.parameters
+		if (self.runtimeParameters and runtime):
+			parameters = dict(parameters)
+			for name in self.runtimeParameters:
+				if (name in runtime):
+					parameters[name] = runtime[name]
+		with instrumentation.stage(self.stageName):
+			if (self.modifiesBoundingBoxes):
+				return self.function(frame = frame, boundingBoxes = boundingBoxes, **parameters)
+			return self.function(frame = frame, **parameters), boundingBoxes
+
+def bindAugmenter(augmentationConf = None, augmentationType = None, parameters = None):
+	"""
+	Validates the parameters of an augmenter and binds them.
+	Args:
+		augmentationConf: A string that contains the type of configuration.
+		augmentationType: A string that contains the name of the augmenter.
+		parameters: A hashmap that contains the parameters of the augmenter.
+	Returns:
+		A BoundAugmenter.
+	"""
+	return BoundAugmenter(augmentationConf = augmentationConf,
+												augmentationType = augmentationType,
+												parameters = parameters)
+
 def applyGeometricAugmentation(frame = None, augmentationType = None, parameters = None):
 	"""
 	Applies a geometric augmentation making sure all the parameters exist or are 
@@ -36,59 +270,9 @@ def applyGeometricAugmentation(frame = None, augmentationType = None, parameters
 	Returns:
 		A tensor that contains a frame with the respective transformation.
 	"""
-	# Logic
-	if (augmentationType == "scale"):
-		# Apply scaling
-		if (not ("size" in parameters)):
-			raise Exception("ERROR: Scale requires parameter size.")
-		if (not ("interpolationMethod" in parameters)):
-			print("WARNING: Interpolation method for scale will be set to default value.")
-		frame = geometricAugmenter.scale(frame = frame,
-									size = parameters["size"],
-									interpolationMethod = parameters["interpolationMethod"])
-	elif (augmentationType == "crop"):
-		# Apply crop
-		if (not ("size" in parameters)):
-			parameters["size"] = None
-			print("WARNING: Size for crop will be set to default value.")
-		frame = geometricAugmenter.crop(frame = frame,
-																size = parameters["size"])
-	elif (augmentationType == "translate"):
-		# Apply pad
-		if (not ("offset" in parameters)):
-			raise Exception("Pad requires parameter offset.")
-		bndboxes = geometricAugmenter.translate(frame = frame,
-																	offset = parameters["offset"])
-	elif (augmentationType == "jitterBoxes"):
-		# Apply jitter boxes
-		if (not ("size" in parameters)):
-			raise Exception("JitterBoxes requires parameter size.")
-		if (not ("quantity" in parameters)):
-			parameters["quantity"] = 10
-			print("WARNING: Quantity for jitter boxes will be set to its default value.")
-		if (not ("color" in parameters)):
-			parameters["color"] = [255,255,255]
-			print("WARNING: Color for jitter boxes will be set to its default value.")
-		frame = geometricAugmenter.jitterBoxes(frame = frame,
-																				size = parameters["size"],
-																				quantity = parameters["quantity"],
-																				color = parameters["color"])
-	elif (augmentationType == "horizontalFlip"):
-		# Apply horizontal flip
-		frame = geometricAugmenter.horizontalFlip(frame = frame)
-	elif (augmentationType == "verticalFlip"):
-		# Apply vertical flip
-		frame = geometricAugmenter.verticalFlip(frame = frame)
-	elif (augmentationType == "rotation"):
-		# Apply rotation
-		if (not ("theta" in parameters)):
-			theta = None
-			#raise Exception("ERROR: Rotation requires parameter theta.")
-		else:
-			theta = parameters["theta"]
-		frame = geometricAugmenter.rotation(frame = frame,
-																			bndbox = [0, 0, frame.shape[1], frame.shape[0]],
-																			theta = theta)
+	frame, _ = bindAugmenter(augmentationConf = geometricConf,
+													augmentationType = augmentationType,
+													parameters = parameters)(frame = frame)
 	return frame
 
 def applyColorAugmentation(frame = None, augmentationType = None, parameters = None):
@@ -102,65 +286,9 @@ def applyColorAugmentation(frame = None, augmentationType = None, parameters = N
 	Returns:
 		A tensor that contains a frame with the respective transformation.
 	"""
-	# Logic.
-	if (augmentationType == "invertColor"):
-		if (not ("CSpace" in parameters)):
-			parameters["CSpace"] = None
-		frame = colorAugmenter.invertColor(frame = frame, \
-																				CSpace = parameters["CSpace"])
-	elif (augmentationType == "histogramEqualization"):
-		if (not ("equalizationType" in parameters)):
-			parameters["equalizationType"] = None
-		frame = colorAugmenter.histogramEqualization(frame = frame, \
-															equalizationType = parameters["equalizationType"])
-	elif (augmentationType == "changeBrightness"):
-		if (not ("coefficient" in parameters)):
-			raise AttributeError("coefficient for changeBrightness must be specified.")
-		frame = colorAugmenter.changeBrightness(frame = frame, \
-																				coefficient = parameters["coefficient"])
-	elif (augmentationType == "sharpening"):
-		if (not ("weight" in parameters)):
-			parameters["weight"] = None
-		frame = colorAugmenter.sharpening(frame = frame, weight = parameters["weight"])
-	elif (augmentationType == "addGaussianNoise"):
-		if (not ("coefficient" in parameters)):
-			parameters["coefficient"] = None
-		frame = colorAugmenter.addGaussianNoise(frame = frame, \
-																				coefficient = parameters["coefficient"])
-	elif (augmentationType == "gaussianBlur"):
-		if (not ("sigma" in parameters)):
-			parameters["sigma"] = None
-		if (not ("kernelSize" in parameters)):
-			parameters["kernelSize"] = None
-		frame = colorAugmenter.gaussianBlur(frame = frame, \
-						kernelSize = parameters["kernelSize"], sigma = parameters["sigma"])
-	elif (augmentationType == "averageBlur"):
-		if (not ("kernelSize" in parameters)):
-			parameters["kernelSize"] = None
-		frame = colorAugmenter.averageBlur(frame = frame, \
-																					kernelSize = parameters["kernelSize"])
-	elif (augmentationType == "medianBlur"):
-		if (not ("coefficient" in parameters)):
-			parameters["coefficient"] = None
-		frame = colorAugmenter.medianBlur(frame = frame, \
-																				coefficient = parameters["coefficient"])
-	elif (augmentationType == "bilateralBlur"):
-		if (not ("d" in parameters)):
-			parameters["d"] = None
-		if (not ("sigmaColor" in parameters)):
-			parameters["sigmaColor"] = None
-		if (not ("sigmaSpace" in parameters)):
-			parameters["sigmaSpace"] = None
-		frame = colorAugmenter.bilateralBlur(frame = frame, d = parameters["d"], \
-			sigmaColor = parameters["sigmaColor"], sigmaSpace = parameters["sigmaSpace"])
-	elif (augmentationType == "shiftColors"):
-		frame = colorAugmenter.shiftColors(frame = frame)
-	elif (augmentationType == "fancyPCA"):
-		frame = colorAugmenter.fancyPCA(frame = frame)
-	else:
-		raise Exception("Color augmentation type not supported: {}."\
-										.format(augmentationType))
-	# Return result
+	frame, _ = bindAugmenter(augmentationConf = colorConf,
+													augmentationType = augmentationType,
+													parameters = parameters)(frame = frame)
 	return frame
 
 def applyBoundingBoxAugmentation(frame = None, boundingBoxes = None, augmentationType = None, parameters = None):
@@ -173,75 +301,84 @@ def applyBoundingBoxAugmentation(frame = None, boundingBoxes = None, augmentatio
 		parameters: A hashmap that contains parameters for the respective type 
 							of augmentation.
 	Returns:
-		A tensor that contains a frame with the respective transformation.
+		A tensor that contains a frame with the respective transformation and
+		a list of lists that contains the bounding boxes.
 	"""
-	# Local variables.
-	bndboxes = boundingBoxes
-	# Logic.
-	if (augmentationType == "scale"):
-		# Apply scaling.
-		if (not ("size" in parameters)):
-			raise Exception("Scale requires parameter size.")
-		if (not ("zoom" in parameters)):
-			parameters["zoom"] = None
-		if (not ("interpolationMethod" in parameters)):
-			parameters["interpolationMethod"] = None
-		frame, bndboxes = bndboxAugmenter.scale(frame = frame,
-									boundingBoxes = boundingBoxes,
-									size = parameters["size"],
-									zoom = parameters["zoom"],
-									interpolationMethod = parameters["interpolationMethod"])
-	elif (augmentationType == "crop"):
-		# Apply crop.
-		if (not ("size" in parameters)):
-			parameters["size"] = None
-		bndboxes = bndboxAugmenter.crop(boundingBoxes = boundingBoxes,
-									size = parameters["size"])
-	elif (augmentationType == "pad"):
-		# Apply pad.
-		if (not ("size" in parameters)):
-			raise Exception("Pad requires parameter size.")
-		bndboxes = bndboxAugmenter.pad(boundingBoxes = boundingBoxes,
-																	frameHeight = frame.shape[0],
-																	frameWidth = frame.shape[1],
-																	size = parameters["size"])
-	elif (augmentationType == "jitterBoxes"):
-		# Apply jitter boxes.
-		if (not ("size" in parameters)):
-			raise Exception("JitterBoxes requires parameter size.")
-		if (not ("quantity" in parameters)):
-			parameters["quantity"] = None
-		frame = bndboxAugmenter.jitterBoxes(frame = frame,
-																				boundingBoxes = boundingBoxes,
-																				size = parameters["size"],
-																				quantity = parameters["quantity"])
-	elif (augmentationType == "horizontalFlip"):
-		# Apply horizontal flip.
-		frame = bndboxAugmenter.horizontalFlip(frame = frame,
-																					boundingBoxes = boundingBoxes)
-	elif (augmentationType == "verticalFlip"):
-		# Apply vertical flip.
-		frame = bndboxAugmenter.verticalFlip(frame = frame,
-																				boundingBoxes = boundingBoxes)
-	elif (augmentationType == "rotation"):
-		# Apply rotation.
-		if (not ("theta" in parameters)):
-			theta = None
-			#raise Exception("ERROR: Rotation requires parameter theta.")
-		else:
-			theta = parameters["theta"]
-		frame = bndboxAugmenter.rotation(frame = frame,
-																			boundingBoxes = boundingBoxes,
-																			theta = theta)
-	elif (augmentationType == "dropout"):
-		# Apply dropout.
-		if (not ("size" in parameters)):
-			raise Exception("Dropout requires parameter size.")
-		if (not ("threshold" in parameters)):
-			parameters["threshold"] = None
-		frame = bndboxAugmenter.dropout(frame = frame,
-																	boundingBoxes = boundingBoxes,
-																	size = parameters["size"],
-																	threshold = parameters["threshold"])
-	return frame, bndboxes
+	return bindAugmenter(augmentationConf = boundingBoxConf,
+											augmentationType = augmentationType,
+											parameters = parameters)(frame = frame, boundingBoxes = boundingBoxes)
+
+# Adapters of the augmenters that do not return both the frame and the bounding boxes.
+def boundingBoxCrop(frame = None, boundingBoxes = None, size = None):
+	return frame, bndboxAugmenter.crop(boundingBoxes = boundingBoxes, size = size)
+
+def boundingBoxPad(frame = None, boundingBoxes = None, size = None):
+	return frame, bndboxAugmenter.pad(boundingBoxes = boundingBoxes,
+																		frameHeight = frame.shape[0],
+																		frameWidth = frame.shape[1],
+																		size = size)
+
+def boundingBoxJitterBoxes(frame = None, boundingBoxes = None, size = None, quantity = None):
+	return bndboxAugmenter.jitterBoxes(frame = frame, boundingBoxes = boundingBoxes,
+																		size = size, quantity = quantity), boundingBoxes
+
+def boundingBoxHorizontalFlip(frame = None, boundingBoxes = None):
+	return bndboxAugmenter.horizontalFlip(frame = frame, boundingBoxes = boundingBoxes), boundingBoxes
+
+def boundingBoxVerticalFlip(frame = None, boundingBoxes = None):
+	return bndboxAugmenter.verticalFlip(frame = frame, boundingBoxes = boundingBoxes), boundingBoxes
+
+def boundingBoxRotation(frame = None, boundingBoxes = None, theta = None):
+	return bndboxAugmenter.rotation(frame = frame, boundingBoxes = boundingBoxes, theta = theta), boundingBoxes
+
+def boundingBoxDropout(frame = None, boundingBoxes = None, size = None, threshold = None):
+	return bndboxAugmenter.dropout(frame = frame, boundingBoxes = boundingBoxes,
+																size = size, threshold = threshold), boundingBoxes
+
+def geometricRotation(frame = None, theta = None):
+	frame, _ = geometricAugmenter.rotation(frame = frame,
+																				bndbox = [0, 0, frame.shape[1], frame.shape[0]],
+																				theta = theta)
+	return frame
 
+# Bounding box augmenters.
+registerBoundingBoxAugmenter("scale", bndboxAugmenter.scale, required = ["size"],
+															defaults = {"zoom": None, "interpolationMethod": None})
+registerBoundingBoxAugmenter("crop", boundingBoxCrop, defaults = {"size": None})
+registerBoundingBoxAugmenter("pad", boundingBoxPad, required = ["size"])
+registerBoundingBoxAugmenter("jitterBoxes", boundingBoxJitterBoxes, required = ["size"],
+															defaults = {"quantity": None})
+registerBoundingBoxAugmenter("horizontalFlip", boundingBoxHorizontalFlip)
+registerBoundingBoxAugmenter("verticalFlip", boundingBoxVerticalFlip)
+registerBoundingBoxAugmenter("rotation", boundingBoxRotation, defaults = {"theta": None})
+registerBoundingBoxAugmenter("dropout", boundingBoxDropout, required = ["size"],
+															defaults = {"threshold": None})
+# Color augmenters.
+registerColorAugmenter("invertColor", colorAugmenter.invertColor, defaults = {"CSpace": None})
+registerColorAugmenter("histogramEqualization", colorAugmenter.histogramEqualization,
+												defaults = {"equalizationType": None})
+registerColorAugmenter("changeBrightness", colorAugmenter.changeBrightness, required = ["coefficient"])
+registerColorAugmenter("sharpening", colorAugmenter.sharpening, defaults = {"weight": None})
+registerColorAugmenter("addGaussianNoise", colorAugmenter.addGaussianNoise,
+												defaults = {"coefficient": None, "distribution": None})
+registerColorAugmenter("gaussianBlur", colorAugmenter.gaussianBlur,
+												defaults = {"kernelSize": None, "sigma": None})
+registerColorAugmenter("averageBlur", colorAugmenter.averageBlur, defaults = {"kernelSize": None})
+registerColorAugmenter("medianBlur", colorAugmenter.medianBlur, defaults = {"coefficient": None})
+registerColorAugmenter("bilateralBlur", colorAugmenter.bilateralBlur,
+												defaults = {"d": None, "sigmaColor": None, "sigmaSpace": None})
+registerColorAugmenter("shiftColors", colorAugmenter.shiftColors)
+# AugmentationPlan.run sets inPlace because it owns its frames, and cacheKey
+# so the branches that start from the same image reuse its eigenvectors.
+registerColorAugmenter("fancyPCA", colorAugmenter.fancyPCA,
+												defaults = {"subsample": None, "cacheKey": None, "inPlace": False})
+# Geometric augmenters.
+registerGeometricAugmenter("scale", geometricAugmenter.scale, required = ["size"],
+														defaults = {"interpolationMethod": None})
+registerGeometricAugmenter("crop", geometricAugmenter.crop, defaults = {"size": None})
+registerGeometricAugmenter("translate", geometricAugmenter.translate, required = ["offset"])
+registerGeometricAugmenter("jitterBoxes", geometricAugmenter.jitterBoxes, required = ["size"],
+														defaults = {"quantity": 10, "color": [255,255,255]})
+registerGeometricAugmenter("horizontalFlip", geometricAugmenter.horizontalFlip)
+registerGeometricAugmenter("verticalFlip", geometricAugmenter.verticalFlip)
+registerGeometricAugmenter("rotation", geometricRotation, defaults = {"theta": None})
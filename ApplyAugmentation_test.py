@@ -0,0 +1,102 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Unit tests for the augmenter registries.
+"""
+import os
+import json
+import pickle
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from ApplyAugmentation import *
+from AugmentationConfigurationFile import *
+
+def swapChannels(frame = None, order = None):
+	return frame[:, :, order]
+
+def shiftBoxes(frame = None, boundingBoxes = None, offset = None):
+	return frame, [[x + offset for x in box] for box in boundingBoxes]
+
+class ApplyAugmentation_test(unittest.TestCase):
+
+	def setUp(self):
+		self.frame = np.random.randint(0, 255, (120, 160, 3)).astype(np.uint8)
+		self.boundingBoxes = [[10, 10, 50, 60], [70, 20, 120, 90]]
+		self.tempDir = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.tempDir)
+		registries[colorConf].pop("swapChannels", None)
+		registries[boundingBoxConf].pop("shiftBoxes", None)
+
+	def test_bindAugmenter(self):
+		augmenter = bindAugmenter(augmentationConf = colorConf,
+															augmentationType = "gaussianBlur",
+															parameters = {"sigma": 2, "save": True})
+		# Defaults are filled and the flags of the configuration are dropped.
+		self.assertEqual(augmenter.parameters, {"kernelSize": None, "sigma": 2})
+		frame, boundingBoxes = augmenter(frame = self.frame, boundingBoxes = self.boundingBoxes)
+		self.assertEqual(frame.shape, self.frame.shape)
+		self.assertIs(boundingBoxes, self.boundingBoxes)
+		# Missing required parameters and unknown augmenters are rejected.
+		with self.assertRaises(Exception):
+			bindAugmenter(augmentationConf = colorConf, augmentationType = "changeBrightness",
+										parameters = {})
+		with self.assertRaises(Exception):
+			bindAugmenter(augmentationConf = colorConf, augmentationType = "notAnAugmenter",
+										parameters = {})
+
+	def test_fancyPCAInPlace(self):
+		frame = self.frame.copy()
+		result = applyColorAugmentation(frame = frame, augmentationType = "fancyPCA", parameters = {})
+		# The frame of the caller is not modified.
+		self.assertIsNot(result, frame)
+		self.assertTrue(np.array_equal(frame, self.frame))
+		# The frames of a plan are private, the plan lets fancyPCA overwrite them.
+		augmenter = bindAugmenter(augmentationConf = colorConf, augmentationType = "fancyPCA", parameters = {})
+		result, _ = augmenter(frame = frame, inPlace = True)
+		self.assertIs(result, frame)
+		self.assertEqual(augmenter.parameters["inPlace"], False)
+
+	def test_pickle(self):
+		augmenter = bindAugmenter(augmentationConf = boundingBoxConf,
+															augmentationType = "crop",
+															parameters = {"size": [50, 50]})
+		copy = pickle.loads(pickle.dumps(augmenter))
+		self.assertIs(copy.function, boundingBoxCrop)
+		self.assertEqual(copy.parameters, augmenter.parameters)
+
+	def test_geometric(self):
+		frame = applyGeometricAugmentation(frame = self.frame.copy(),
+																			augmentationType = "translate",
+																			parameters = {"offset": [10, 10]})
+		self.assertEqual(frame.shape, self.frame.shape)
+		frame = applyGeometricAugmentation(frame = self.frame.copy(),
+																			augmentationType = "rotation",
+																			parameters = {"theta": 90})
+		self.assertEqual(type(frame), np.ndarray)
+
+	def test_registerAugmenter(self):
+		registerColorAugmenter("swapChannels", swapChannels, defaults = {"order": [2, 1, 0]})
+		registerBoundingBoxAugmenter("shiftBoxes", shiftBoxes, required = ["offset"])
+		frame = applyColorAugmentation(frame = self.frame, augmentationType = "swapChannels",
+																	parameters = {})
+		self.assertTrue(np.array_equal(frame, self.frame[:, :, ::-1]))
+		# Registered augmenters can be used by name in a configuration file.
+		conf = {"multiple_image_augmentations": {"Sequential": [
+							{"image_color_augmenters": {"Sequential": [{"swapChannels": {"save": True}}]}},
+							{"bounding_box_augmenters": {"Sequential": [{"shiftBoxes": {"offset": 5, "save": True}}]}}
+						]}}
+		path = os.path.join(self.tempDir, "conf.json")
+		with open(path, "w") as f:
+			json.dump(conf, f)
+		plan = AugmentationConfigurationFile(file = path).compilePlan(threshold = 0.5)
+		saved = []
+		plan.run(readFrame = lambda: self.frame.copy(), boundingBoxes = self.boundingBoxes,
+						save = lambda frame, boundingBoxes, augmentationType: saved.append(boundingBoxes))
+		self.assertEqual(saved, [self.boundingBoxes, [[15, 15, 55, 65], [75, 25, 125, 95]]])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -9,6 +9,16 @@ import json
 import numpy as np
 from interface import implements
 
+try:
+	from .AugmentationPlan import *
+except:
+	from AugmentationPlan import *
+
+try:
+	from .ApplyAugmentation import isRegisteredAugmenter
+except:
+	from ApplyAugmentation import isRegisteredAugmenter
+
 class AugmentationConfigurationFile(object):
 	def __init__(self, file = None):
 		super(AugmentationConfigurationFile, self).__init__()
@@ -81,6 +91,8 @@ class AugmentationConfigurationFile(object):
 		# Logic
 		if (augmentation in self.boundingBoxesMethods):
 			return True
+		elif (isRegisteredAugmenter(augmentationConf = self.confAugBndbxs, augmentationType = augmentation)):
+			return True
 		else:
 			return False
 
@@ -100,6 +112,8 @@ class AugmentationConfigurationFile(object):
 		# Logic
 		if (augmentation in self.colorMethods):
 			return True
+		elif (isRegisteredAugmenter(augmentationConf = self.confAugColor, augmentationType = augmentation)):
+			return True
 		else:
 			return False
 
@@ -119,6 +133,8 @@ class AugmentationConfigurationFile(object):
 		# Logic
 		if (augmentation in self.geometricMethods):
 			return True
+		elif (isRegisteredAugmenter(augmentationConf = self.confAugGeometric, augmentationType = augmentation)):
+			return True
 		else:
 			return False
 
@@ -158,7 +174,7 @@ class AugmentationConfigurationFile(object):
 		listAugmentersConfs = self.file["multiple_image_augmentations"]["Sequential"]
 		# Assert listAugmentersConfs is of type list.
 		if (not (type(listAugmentersConfs) == list)):
-			raise TyperError("The data inside multiple_image_augmentations/Sequential" +\
+			raise TypeError("The data inside multiple_image_augmentations/Sequential" +\
 												" should be a list.")
 		for i in range(len(listAugmentersConfs)):
 			augmentationConf = list(listAugmentersConfs[i].keys())[0]
@@ -174,7 +190,7 @@ class AugmentationConfigurationFile(object):
 			listAugmentersConfsTypes = listAugmentersConfs[i][augmentationConf]["Sequential"]
 			# Assert listAugmentersConfs is of type list.
 			if (not (type(listAugmentersConfsTypes) == list)):
-				raise TyperError("The data inside multiple_image_augmentations/Sequential" +\
+				raise TypeError("The data inside multiple_image_augmentations/Sequential" +\
 													"/{}/Sequential should be a list.".format(augmentationConf))
 			for j in range(len(listAugmentersConfsTypes)):
 				# Get augmentation type and its parameters.
@@ -336,7 +352,7 @@ class AugmentationConfigurationFile(object):
 		"""
 		if ("save" in parameters):
 			if (type(parameters["save"]) != bool):
-				raise TyperError("ERROR: Save parameter must be of type bool.")
+				raise TypeError("ERROR: Save parameter must be of type bool.")
 			return parameters["save"]
 		else:
 			return False
@@ -351,11 +367,26 @@ class AugmentationConfigurationFile(object):
 		"""
 		if ("restartFrame" in parameters):
 			if (type(parameters["restartFrame"]) != bool):
-				raise TyperError("ERROR: Restart frame must be of type bool.")
+				raise TypeError("ERROR: Restart frame must be of type bool.")
 			return parameters["restartFrame"]
 		else:
 			return False
 
+	def extractRandomEventParameter(self, parameters = None):
+		"""
+		Extracts the "randomEvent" parameter from a dictionary.
+		Args:
+			parameters: A dictionary.
+		Returns:
+			A boolean that contains the response of "randomEvent".
+		"""
+		if ("randomEvent" in parameters):
+			if (type(parameters["randomEvent"]) != bool):
+				raise TypeError("ERROR: Random event must be of type bool.")
+			return parameters["randomEvent"]
+		else:
+			return False
+
 	def randomEvent(self, parameters = None, threshold = None):
 		"""
 		Extracts the "randomEvent" parameter from a dictionary.
@@ -368,7 +399,7 @@ class AugmentationConfigurationFile(object):
 		if ("randomEvent" in parameters):
 			# Assert type.
 			if (type(parameters["randomEvent"]) != bool):
-				raise TyperError("ERROR: Random event must be of type bool.")
+				raise TypeError("ERROR: Random event must be of type bool.")
 			# Check the value of randomEvent.
 			if (parameters["randomEvent"] == True):
 				activate = np.random.rand() > threshold
@@ -430,6 +461,9 @@ class AugmentationConfigurationFile(object):
 				raise Exception("Dropout requires parameter size.")
 			if (not ("threshold" in parameters)):
 				parameters["threshold"] = None
+		elif (isRegisteredAugmenter(augmentationConf = self.confAugBndbxs, augmentationType = augmentationType)):
+			# Registered augmenters validate their parameters when they are bound.
+			pass
 		else:
 			raise Exception("Bounding box augmentation type not supported: {}."\
 											.format(augmentationType))
@@ -483,6 +517,9 @@ class AugmentationConfigurationFile(object):
 			pass
 		elif (augmentationType == "fancyPCA"):
 			pass
+		elif (isRegisteredAugmenter(augmentationConf = self.confAugColor, augmentationType = augmentationType)):
+			# Registered augmenters validate their parameters when they are bound.
+			pass
 		else:
 			raise Exception("Color augmentation type not supported: {}."\
 											.format(augmentationType))
@@ -504,6 +541,7 @@ class AugmentationConfigurationFile(object):
 			if (not ("size" in parameters)):
 				raise Exception("ERROR: Scale requires parameter size.")
 			if (not ("interpolationMethod" in parameters)):
+				parameters["interpolationMethod"] = None
 				print("WARNING: Interpolation method for scale will be set to default value.")
 		elif (augmentationType == "crop"):
 			# Apply crop
@@ -532,3 +570,110 @@ class AugmentationConfigurationFile(object):
 			# Apply rotation
 			if (not ("theta" in parameters)):
 				pass
+
+	def compilePlan(self, threshold = None):
+		"""
+		Validates the configuration file and compiles it into an AugmentationPlan.
+		The parameters of every augmenter are parsed once, so the plan can be
+		executed for every image without reading the configuration again.
+		Args:
+			threshold: A float that contains a number between 0 and 1. Steps with
+								randomEvent happen if a random number is bigger than threshold.
+		Returns:
+			An AugmentationPlan.
+		"""
+		# Assertions
+		if (threshold == None):
+			threshold = 0.5
+		if (type(threshold) != float):
+			raise TypeError("ERROR: threshold parameter must be of type float.")
+		if ((threshold > 1) or (threshold < 0)):
+			raise ValueError("ERROR: threshold paramater should be a number between" +\
+												" 0-1.")
+		# Logic
+		typeAugmentation = self.runAllAssertions()
+		branches = []
+		if (typeAugmentation in [0, 1, 2]):
+			augmentationConf = [self.confAugBndbxs, self.confAugGeometric, self.confAugColor][typeAugmentation]
+			for i in self.file[augmentationConf]:
+				if (i == "Sequential"):
+					# A sequence of augmenters applied on top of each other.
+					augmenters = self.file[augmentationConf][i]
+					if (type(augmenters) != list):
+						raise TypeError("ERROR: Data inside [{}][Sequential] must be a list."\
+														.format(augmentationConf))
+					branch = []
+					for k in range(len(augmenters)):
+						augmentationType = list(augmenters[k].keys())[0]
+						branch.append(self.compileStep(augmentationConf = augmentationConf,
+																					augmentationType = augmentationType,
+																					parameters = augmenters[k][augmentationType]))
+					branches.append(branch)
+				else:
+					# A single augmenter applied to the original frame.
+					branches.append([self.compileStep(augmentationConf = augmentationConf,
+																						augmentationType = i,
+																						parameters = self.file[augmentationConf][i])])
+		elif (typeAugmentation == 3):
+			# A single sequence that can restart the frame and contains random events.
+			branch = []
+			listAugmentersConfs = self.file[self.confAugMultiple]["Sequential"]
+			for k in range(len(listAugmentersConfs)):
+				augmentationConf = list(listAugmentersConfs[k].keys())[0]
+				listAugmentersConfsTypes = listAugmentersConfs[k][augmentationConf]["Sequential"]
+				for l in range(len(listAugmentersConfsTypes)):
+					augmentationType = list(listAugmentersConfsTypes[l].keys())[0]
+					branch.append(self.compileStep(augmentationConf = augmentationConf,
+																				augmentationType = augmentationType,
+																				parameters = listAugmentersConfsTypes[l][augmentationType],
+																				threshold = threshold))
+			branches.append(branch)
+		else:
+			raise Exception("Type augmentation {} not valid.".format(typeAugmentation))
+		return AugmentationPlan(typeAugmentation = typeAugmentation, branches = branches)
+
+	def compileStep(self, augmentationConf = None, augmentationType = None, parameters = None, threshold = None):
+		"""
+		Validates an augmenter and creates a step of a plan.
+		Args:
+			augmentationConf: A string that contains the type of configuration.
+			augmentationType: A string that contains the name of the augmenter.
+			parameters: A hashmap that contains the parameters of the augmenter.
+			threshold: A float. If None, the restartFrame and randomEvent parameters
+								are ignored like in the standard and Sequential configurations.
+		Returns:
+			An AugmentationStep.
+		"""
+		# Validate on a copy so the configuration is not modified.
+		parameters = dict(parameters)
+		if (augmentationConf == self.confAugBndbxs):
+			if (not self.isValidBoundingBoxAugmentation(augmentation = augmentationType)):
+				raise Exception("ERROR: {} is not valid.".format(augmentationType))
+			self.validateBoundingBoxAugmentation(augmentationType = augmentationType, \
+																						parameters = parameters)
+		elif (augmentationConf == self.confAugColor):
+			if (not self.isValidColorAugmentation(augmentation = augmentationType)):
+				raise Exception("ERROR: {} is not valid.".format(augmentationType))
+			self.validateColorAugmentation(augmentationType = augmentationType, \
+																			parameters = parameters)
+		elif (augmentationConf == self.confAugGeometric):
+			if (not self.isValidGeometricAugmentation(augmentation = augmentationType)):
+				raise Exception("ERROR: {} is not valid.".format(augmentationType))
+			self.validateGeometricAugmentation(augmentationType = augmentationType, \
+																					parameters = parameters)
+		else:
+			raise Exception("{} is not a valid configuration.".format(augmentationConf))
+		# Extract flags.
+		save = self.extractSavingParameter(parameters = parameters)
+		restartFrame = False
+		stepThreshold = None
+		if (threshold != None):
+			restartFrame = self.extractRestartFrameParameter(parameters = parameters)
+			if (self.extractRandomEventParameter(parameters = parameters) == True):
+				stepThreshold = threshold
+		return AugmentationPlan.createStep(augmentationConf = augmentationConf,
+																			augmentationType = augmentationType,
+																			parameters = parameters,
+																			save = save,
+																			restartFrame = restartFrame,
+																			threshold = stepThreshold)
@@ -0,0 +1,118 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: A compiled, immutable version of an augmentation
+configuration file. The configuration is parsed and validated
+once, then the plan is executed for every image.
+"""
+import collections
+import numpy as np
+
+try:
+	from .ApplyAugmentation import bindAugmenter
+except:
+	from ApplyAugmentation import bindAugmenter
+
+# A step of the plan.
+# augmentationConf: A string with the type of configuration the step belongs to.
+# augmentationType: A string with the name of the augmenter.
+# function: A BoundAugmenter, a callable f(frame, boundingBoxes) -> (frame, boundingBoxes)
+#						with its parameters already validated.
+# save: A boolean that is True if the result of the step has to be saved.
+# restartFrame: A boolean that is True if the frame is restarted after the step.
+# threshold: A float, the step happens if a uniform random number is bigger than
+#						threshold. None if the step always happens.
+AugmentationStep = collections.namedtuple("AugmentationStep", ["augmentationConf", \
+															"augmentationType", "function", "save", "restartFrame", "threshold"])
+
+class AugmentationPlan(object):
+	def __init__(self, typeAugmentation = None, branches = None):
+		"""
+		An immutable sequence of augmentation branches. Every branch starts
+		from the original frame and applies its steps in order.
+		Args:
+			typeAugmentation: An int that contains the type of augmentation as
+												returned by AugmentationConfigurationFile.runAllAssertions.
+			branches: A list of lists of AugmentationStep.
+		Returns:
+			None
+		"""
+		super(AugmentationPlan, self).__init__()
+		# Assertions
+		if (typeAugmentation == None):
+			raise ValueError("ERROR: typeAugmentation parameter cannot be empty.")
+		if (branches == None):
+			raise ValueError("ERROR: branches parameter cannot be empty.")
+		# Class variables
+		self.typeAugmentation = typeAugmentation
+		self.branches = tuple([tuple(branch) for branch in branches])
+
+	@property
+	def propertyTypeAugmentation(self):
+		return self.typeAugmentation
+
+	@property
+	def propertyBranches(self):
+		return self.branches
+
+	@property
+	def propertySteps(self):
+		return tuple([step for branch in self.branches for step in branch])
+
+	@staticmethod
+	def createStep(augmentationConf = None, augmentationType = None, parameters = None, save = None, restartFrame = None, threshold = None):
+		"""
+		Binds the parameters of an augmenter and creates a step.
+		Args:
+			augmentationConf: A string that contains the type of configuration.
+			augmentationType: A string that contains the name of the augmenter.
+			parameters: A hashmap that contains the validated parameters.
+			save: A boolean.
+			restartFrame: A boolean.
+			threshold: A float or None.
+		Returns:
+			An AugmentationStep.
+		"""
+		function = bindAugmenter(augmentationConf = augmentationConf,
+														augmentationType = augmentationType,
+														parameters = parameters)
+		return AugmentationStep(augmentationConf = augmentationConf,
+														augmentationType = augmentationType,
+														function = function,
+														save = save,
+														restartFrame = restartFrame,
+														threshold = threshold)
+
+	def run(self, readFrame = None, boundingBoxes = None, save = None, cacheKey = None):
+		"""
+		Executes the plan on an image.
+		Args:
+			readFrame: A callable that returns a writable copy of the original frame.
+			boundingBoxes: A list of lists that contains the original bounding boxes.
+										It can be None for images without annotations.
+			save: A callable save(frame = ..., boundingBoxes = ..., augmentationType = ...)
+						that is called for every step that has to be saved.
+			cacheKey: A hashable that identifies the original image, for example its
+								path. The augmenters that compute statistics of the frame
+								reuse them across the branches while the frame is the original.
+		Returns:
+			None
+		"""
+		for branch in self.branches:
+			frame = readFrame()
+			bndboxes = boundingBoxes
+			original = True
+			for step in branch:
+				# Probability of augmentation happening.
+				if ((step.threshold == None) or (np.random.rand() > step.threshold)):
+					# readFrame returns a copy, so the augmenters can overwrite it.
+					frame, bndboxes = step.function(frame = frame, boundingBoxes = bndboxes, inPlace = True,
+																					cacheKey = cacheKey if original else None)
+					original = False
+					if (step.save == True):
+						save(frame = frame, boundingBoxes = bndboxes, augmentationType = step.augmentationType)
+				# Restart frame?
+				if (step.restartFrame == True):
+					frame = readFrame()
+					bndboxes = boundingBoxes
+					original = True
@@ -0,0 +1,91 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Unit tests for the AugmentationPlan class.
+"""
+import os
+import unittest
+import numpy as np
+from unittest import mock
+from AugmentationConfigurationFile import *
+from AugmentationPlan import *
+from ApplyAugmentation import colorConf, colorAugmenter
+
+class AugmentationPlan_test(unittest.TestCase):
+
+	def setUp(self):
+		self.confs = os.path.join(os.path.dirname(os.path.abspath(__file__)), "confs_examples")
+		self.frame = np.random.randint(0, 255, (120, 160, 3)).astype(np.uint8)
+		self.boundingBoxes = [[10, 10, 50, 60], [70, 20, 120, 90]]
+
+	def tearDown(self):
+		pass
+
+	def compile(self, name = None, threshold = None):
+		jsonConf = AugmentationConfigurationFile(file = os.path.join(self.confs, name))
+		return jsonConf.compilePlan(threshold = threshold)
+
+	def test_compile_standard(self):
+		plan = self.compile(name = "aug_bndbxs_standard.json")
+		self.assertEqual(plan.propertyTypeAugmentation, 0)
+		# Every augmenter of a standard configuration is its own branch.
+		self.assertEqual(len(plan.propertyBranches), 8)
+		for branch in plan.propertyBranches:
+			self.assertEqual(len(branch), 1)
+
+	def test_compile_multiple(self):
+		plan = self.compile(name = "aug_multiple_bndbx_color_sequential.json", threshold = 0.3)
+		self.assertEqual(plan.propertyTypeAugmentation, 3)
+		steps = plan.propertySteps
+		self.assertEqual([step.augmentationType for step in steps], ["sharpening", "scale", \
+										"verticalFlip", "histogramEqualization", "horizontalFlip", "crop"])
+		self.assertEqual([step.threshold for step in steps], [None, None, 0.3, None, None, None])
+		self.assertEqual([step.restartFrame for step in steps], [False]*5 + [True])
+
+	def test_run(self):
+		plan = self.compile(name = "aug_multiple_bndbx_color_sequential.json", threshold = 0.0)
+		saved = []
+		reads = []
+		def readFrame():
+			reads.append(1)
+			return self.frame.copy()
+		def save(frame = None, boundingBoxes = None, augmentationType = None):
+			saved.append((frame.shape, len(boundingBoxes), augmentationType))
+		plan.run(readFrame = readFrame, boundingBoxes = self.boundingBoxes, save = save)
+		# A threshold of 0 makes every random event happen.
+		self.assertEqual(len(saved), 6)
+		self.assertEqual(len(reads), 2)
+		# The configuration file is not modified by the compilation.
+		jsonConf = AugmentationConfigurationFile(file = os.path.join(self.confs, "aug_color_standard.json"))
+		jsonConf.compilePlan()
+		self.assertFalse("kernelSize" in jsonConf.file["image_color_augmenters"]["gaussianBlur"])
+
+	def test_cacheKey(self):
+		fancyPCA = AugmentationPlan.createStep(augmentationConf = colorConf, augmentationType = "fancyPCA",
+																						parameters = {}, save = True, restartFrame = False, threshold = None)
+		sharpening = AugmentationPlan.createStep(augmentationConf = colorConf, augmentationType = "sharpening",
+																							parameters = {}, save = False, restartFrame = False, threshold = None)
+		plan = AugmentationPlan(typeAugmentation = 0, branches = [[fancyPCA], [fancyPCA], [sharpening, fancyPCA]])
+		save = lambda frame = None, boundingBoxes = None, augmentationType = None: None
+		colorAugmenter.pcaKey = None
+		with mock.patch.object(colorAugmenter, "computeColorPCA", wraps = colorAugmenter.computeColorPCA) as compute:
+			plan.run(readFrame = lambda: self.frame.copy(), boundingBoxes = None, save = save, cacheKey = "img0.png")
+			# The branches that start from the original frame share its statistics,
+			# the sharpened frame has its own.
+			self.assertEqual(compute.call_count, 2)
+			plan.run(readFrame = lambda: self.frame.copy(), boundingBoxes = None, save = save)
+			self.assertEqual(compute.call_count, 5)
+
+	def test_flagTypes(self):
+		jsonConf = AugmentationConfigurationFile(file = os.path.join(self.confs, "aug_color_standard.json"))
+		with self.assertRaises(TypeError):
+			jsonConf.extractSavingParameter(parameters = {"save": 1})
+		with self.assertRaises(TypeError):
+			jsonConf.extractRestartFrameParameter(parameters = {"restartFrame": "yes"})
+		with self.assertRaises(TypeError):
+			jsonConf.extractRandomEventParameter(parameters = {"randomEvent": "yes"})
+		with self.assertRaises(TypeError):
+			jsonConf.randomEvent(parameters = {"randomEvent": 1}, threshold = 0.5)
+
+if __name__ == "__main__":
+	unittest.main()
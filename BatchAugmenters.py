@@ -0,0 +1,269 @@
+"""
+package: Images2Dataset
+class: BatchAugmenters
+Email: lozuwaucb@gmail.com
+Author: Rodrigo Loza
+Description: Data augmentation operations for a batch of images
+stacked in a NxHxWxC uint8 tensor. Every method takes one parameter
+per image, so a minibatch is augmented in a single call. Parameters,
+lookup tables and random numbers are produced for the whole batch at
+once and the pixels are written by an opencv kernel per image into a
+single preallocated output. Broadcasting the pixel operations over the
+whole batch with numpy is several times slower than opencv.
+"""
+# Libraries
+from interface import implements
+import numpy as np
+
+try:
+	from .LazyImport import lazyImport
+except:
+	from LazyImport import lazyImport
+cv2 = lazyImport("cv2")
+
+try:
+	from .BatchAugmentersMethods import *
+except:
+	from BatchAugmentersMethods import *
+
+try:
+	from .AssertDataTypes import *
+except:
+	from AssertDataTypes import *
+
+class BatchAugmenters(implements(BatchAugmentersMethods)):
+	"""
+	BatchAugmenters class. This class implements a set of data augmentation
+	tools for batches of images.
+	IMPORTANT
+	- This class assumes batches are numpy tensors of shape NxHxWxC and
+	type uint8 whose images follow the opencv color format BGR.
+	- The input batch is not modified, a new batch is returned.
+	"""
+	def __init__(self):
+		super(BatchAugmenters, self).__init__()
+		self.assertion = AssertDataTypes()
+		self.rng = np.random.default_rng()
+		self.noise = None
+
+	def seedRandomGenerator(self, seed = None):
+		"""
+		Creates the random generator used by the augmenters of this instance.
+		Args:
+			seed: An int that contains the seed. If None, fresh entropy is used.
+		Returns:
+			None
+		"""
+		self.rng = np.random.default_rng(seed)
+
+	def assertBatch(self, batch = None, channels = None):
+		"""
+		Asserts that batch is a NxHxWxC uint8 tensor.
+		Args:
+			batch: A tensor.
+			channels: An int. If not None, C has to be equal to channels.
+		Returns:
+			None
+		"""
+		if (self.assertion.assertNumpyType(batch) == False):
+			raise ValueError("Batch has to be a numpy array.")
+		if (len(batch.shape) != 4):
+			raise ValueError("ERROR: Batch has to have 4 dimensions NxHxWxC.")
+		if (batch.dtype != np.uint8):
+			raise TypeError("ERROR: Batch has to be of type uint8.")
+		if ((channels != None) and (batch.shape[3] != channels)):
+			raise ValueError("ERROR: Batch has to have {} channels.".format(channels))
+
+	def perSample(self, values = None, size = None, name = None, dtype = None):
+		"""
+		Converts a parameter to an array with one value per image. A single
+		value is used for every image.
+		Args:
+			values: A scalar, a list or a numpy array.
+			size: An int that contains the number of images.
+			name: A string that contains the name of the parameter.
+			dtype: A numpy type.
+		Returns:
+			A numpy array of length size.
+		"""
+		values = np.asarray(values, dtype = dtype)
+		if (values.ndim == 0):
+			values = np.full(size, values, dtype = dtype)
+		if (values.shape[0] != size):
+			raise ValueError("ERROR: {} has to contain one value per image.".format(name))
+		return values
+
+	def changeBrightness(self, batch = None, coefficients = None):
+		"""
+		Change the brightness of every image in a batch. Equivalent to
+		ColorAugmenters.changeBrightness applied to each image.
+		Args:
+			batch: A tensor of shape NxHxWxC and type uint8.
+			coefficients: A float or a list of N floats. Default is a random
+										number in the range of 2 for every image.
+		Returns:
+			A tensor with the brightness of its images changed.
+		"""
+		# Assertions
+		self.assertBatch(batch = batch)
+		n = batch.shape[0]
+		if (coefficients is None):
+			coefficients = self.rng.random(n) * 2
+		coefficients = self.perSample(values = coefficients, size = n,
+																	name = "coefficients", dtype = np.float64)
+		# Logic
+		# One lookup table per image, built for the whole batch at once.
+		tables = np.clip(np.rint(np.arange(256) * coefficients[:, np.newaxis]), 0, 255)
+		tables = tables.astype(np.uint8)
+		result = np.empty_like(batch)
+		for i in range(n):
+			cv2.LUT(batch[i], tables[i], dst = result[i])
+		return result
+
+	def invertColor(self, batch = None, CSpace = None):
+		"""
+		Inverts the color of every image in a batch.
+		Args:
+			batch: A tensor of shape NxHxWxC and type uint8.
+			CSpace: A 3-sized tuple of booleans (B, G, R) used for every image or
+							a list of N of them. If a boolean is True, then that channel
+							is inverted. Default inverts all the channels.
+		Returns:
+			A tensor with the color of its images inverted.
+		"""
+		# Assertions
+		self.assertBatch(batch = batch, channels = 3)
+		n = batch.shape[0]
+		if (CSpace is None):
+			CSpace = [True, True, True]
+		CSpace = np.asarray(CSpace, dtype = np.bool_)
+		if (CSpace.shape == (3,)):
+			CSpace = np.tile(CSpace, (n, 1))
+		if (CSpace.shape != (n, 3)):
+			raise ValueError("ERROR: CSpace has to be a 3-sized tuple or contain one per image.")
+		# Logic
+		masks = CSpace * 255.0
+		result = np.empty_like(batch)
+		for i in range(n):
+			cv2.bitwise_xor(batch[i], (masks[i, 0], masks[i, 1], masks[i, 2], 0), dst = result[i])
+		return result
+
+	def shiftColors(self, batch = None, permutations = None):
+		"""
+		Shifts the colors of every image in a batch.
+		Args:
+			batch: A tensor of shape NxHxWxC and type uint8.
+			permutations: A list of N permutations of [0, 1, 2]. Default is a random
+										permutation different from the identity for every image.
+		Returns:
+			A tensor with the colors of its images shifted.
+		"""
+		# Assertions
+		self.assertBatch(batch = batch, channels = 3)
+		n = batch.shape[0]
+		if (permutations is None):
+			# The five permutations of 3 channels that are not the identity.
+			shifts = np.array([[0, 2, 1], [1, 0, 2], [1, 2, 0], [2, 0, 1], [2, 1, 0]])
+			permutations = shifts[self.rng.integers(0, len(shifts), n)]
+		permutations = np.asarray(permutations, dtype = np.intp)
+		if ((permutations.shape != (n, 3)) or \
+				(not np.all(np.sort(permutations, axis = 1) == [0, 1, 2]))):
+			raise ValueError("ERROR: permutations has to contain a permutation of [0, 1, 2] per image.")
+		# Logic
+		result = np.empty_like(batch)
+		for i in range(n):
+			channels = cv2.split(batch[i])
+			cv2.merge([channels[j] for j in permutations[i]], dst = result[i])
+		return result
+
+	def horizontalFlip(self, batch = None, flags = None):
+		"""
+		Flips the images of a batch by their horizontal axis.
+		Args:
+			batch: A tensor of shape NxHxWxC and type uint8.
+			flags: A list of N booleans. Only the images with True are flipped.
+						Default flips every image.
+		Returns:
+			A tensor with its images flipped.
+		"""
+		return self.flip(batch = batch, flags = flags, axis = 2)
+
+	def verticalFlip(self, batch = None, flags = None):
+		"""
+		Flips the images of a batch by their vertical axis.
+		Args:
+			batch: A tensor of shape NxHxWxC and type uint8.
+			flags: A list of N booleans. Only the images with True are flipped.
+						Default flips every image.
+		Returns:
+			A tensor with its images flipped.
+		"""
+		return self.flip(batch = batch, flags = flags, axis = 1)
+
+	def flip(self, batch = None, flags = None, axis = None):
+		"""
+		Flips the images of a batch along an axis.
+		Args:
+			batch: A tensor of shape NxHxWxC and type uint8.
+			flags: A list of N booleans.
+			axis: An int, 1 for the height and 2 for the width.
+		Returns:
+			A tensor with its images flipped.
+		"""
+		# Assertions
+		self.assertBatch(batch = batch)
+		n = batch.shape[0]
+		if (flags is None):
+			flags = True
+		flags = self.perSample(values = flags, size = n, name = "flags", dtype = np.bool_)
+		# Logic
+		result = np.empty_like(batch)
+		code = 1 if (axis == 2) else 0
+		for i in range(n):
+			if (flags[i]):
+				cv2.flip(batch[i], code, dst = result[i])
+			else:
+				result[i] = batch[i]
+		return result
+
+	def addGaussianNoise(self, batch = None, coefficients = None, distribution = None):
+		"""
+		Adds noise to every image in a batch. Equivalent to
+		ColorAugmenters.addGaussianNoise applied to each image.
+		Args:
+			batch: A tensor of shape NxHxWxC and type uint8.
+			coefficients: A float or a list of N floats. Default is 0.2.
+			distribution: A string, "uniform" (default) blends the images with
+										uniform noise weighted by the coefficients. "gaussian" adds
+										zero mean normal noise with a standard deviation of
+										coefficient*255.
+		Returns:
+			A tensor with noise added to its images.
+		"""
+		# Assertions
+		self.assertBatch(batch = batch)
+		n = batch.shape[0]
+		if (coefficients is None):
+			coefficients = 0.2
+		coefficients = self.perSample(values = coefficients, size = n,
+																	name = "coefficients", dtype = np.float32)
+		if (distribution == None):
+			distribution = "uniform"
+		if (not (distribution in ["uniform", "gaussian"])):
+			raise ValueError("ERROR: distribution parameter has to be uniform or gaussian.")
+		# Logic
+		result = np.empty_like(batch)
+		if (distribution == "uniform"):
+			noise = np.frombuffer(self.rng.bytes(batch.size), np.uint8).reshape(batch.shape)
+			for i in range(n):
+				cv2.addWeighted(batch[i], 1-float(coefficients[i]), noise[i], float(coefficients[i]), 0, \
+												dst = result[i])
+		else:
+			if ((self.noise is None) or (self.noise.shape != batch.shape)):
+				self.noise = np.empty(batch.shape, np.float32)
+			noise = self.noise
+			self.rng.standard_normal(out = noise, dtype = np.float32)
+			noise *= (coefficients * 255).reshape(n, 1, 1, 1)
+			for i in range(n):
+				cv2.add(batch[i], noise[i], dst = result[i], dtype = cv2.CV_8U)
+		return result
@@ -0,0 +1,76 @@
+"""
+package: Images2Dataset
+class: BatchAugmenters
+Author: Rodrigo Loza
+Description: Data augmentation methods for batches of images.
+"""
+from interface import Interface
+
+class BatchAugmentersMethods(Interface):
+
+	def changeBrightness(self, batch = None, coefficients = None):
+		"""
+		Change the brightness of every image in a batch.
+		Args:
+			batch: A tensor of shape NxHxWxC and type uint8.
+			coefficients: A float or a list of N floats.
+		Returns:
+			A tensor with the brightness of its images changed.
+		"""
+		pass
+
+	def invertColor(self, batch = None, CSpace = None):
+		"""
+		Inverts the color of every image in a batch.
+		Args:
+			batch: A tensor of shape NxHxWxC and type uint8.
+			CSpace: A 3-sized tuple of booleans (B, G, R) or a list of N of them.
+		Returns:
+			A tensor with the color of its images inverted.
+		"""
+		pass
+
+	def shiftColors(self, batch = None, permutations = None):
+		"""
+		Shifts the colors of every image in a batch.
+		Args:
+			batch: A tensor of shape NxHxWxC and type uint8.
+			permutations: A list of N permutations of the channels.
+		Returns:
+			A tensor with the colors of its images shifted.
+		"""
+		pass
+
+	def horizontalFlip(self, batch = None, flags = None):
+		"""
+		Flips the images of a batch by their horizontal axis.
+		Args:
+			batch: A tensor of shape NxHxWxC and type uint8.
+			flags: A list of N booleans. Only the images with True are flipped.
+		Returns:
+			A tensor with its images flipped.
+		"""
+		pass
+
+	def verticalFlip(self, batch = None, flags = None):
+		"""
+		Flips the images of a batch by their vertical axis.
+		Args:
+			batch: A tensor of shape NxHxWxC and type uint8.
+			flags: A list of N booleans. Only the images with True are flipped.
+		Returns:
+			A tensor with its images flipped.
+		"""
+		pass
+
+	def addGaussianNoise(self, batch = None, coefficients = None, distribution = None):
+		"""
+		Adds noise to every image in a batch.
+		Args:
+			batch: A tensor of shape NxHxWxC and type uint8.
+			coefficients: A float or a list of N floats.
+			distribution: A string, uniform or gaussian.
+		Returns:
+			A tensor with noise added to its images.
+		"""
+		pass
@@ -0,0 +1,68 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Unit tests for the BatchAugmenters class.
+"""
+import unittest
+import numpy as np
+import cv2
+from BatchAugmenters import *
+from ColorAugmenters import *
+
+class BatchAugmenters_test(unittest.TestCase):
+
+	def setUp(self):
+		self.batch = np.random.randint(0, 255, (8, 40, 60, 3)).astype(np.uint8)
+		self.augmenter = BatchAugmenters()
+		self.colorAugmenter = ColorAugmenters()
+
+	def tearDown(self):
+		pass
+
+	def test_change_brightness(self):
+		coefficients = np.linspace(0.1, 1.9, self.batch.shape[0])
+		batch = self.augmenter.changeBrightness(batch = self.batch, coefficients = coefficients)
+		self.assertEqual(batch.dtype, np.uint8)
+		for i in range(self.batch.shape[0]):
+			frame = self.colorAugmenter.changeBrightness(frame = self.batch[i].copy(),
+																									coefficient = float(coefficients[i]))
+			self.assertTrue(np.array_equal(batch[i], frame))
+
+	def test_invert_color(self):
+		CSpace = [[True, False, False]] * 4 + [[True, True, True]] * 4
+		batch = self.augmenter.invertColor(batch = self.batch, CSpace = CSpace)
+		self.assertTrue(np.array_equal(batch[0, :, :, 0], 255 - self.batch[0, :, :, 0]))
+		self.assertTrue(np.array_equal(batch[0, :, :, 1:], self.batch[0, :, :, 1:]))
+		self.assertTrue(np.array_equal(batch[4:], 255 - self.batch[4:]))
+
+	def test_shift_colors(self):
+		batch = self.augmenter.shiftColors(batch = self.batch)
+		for i in range(self.batch.shape[0]):
+			self.assertFalse(np.array_equal(batch[i], self.batch[i]))
+		permutations = [[2, 1, 0]] * self.batch.shape[0]
+		batch = self.augmenter.shiftColors(batch = self.batch, permutations = permutations)
+		self.assertTrue(np.array_equal(batch, self.batch[:, :, :, ::-1]))
+		with self.assertRaises(ValueError):
+			self.augmenter.shiftColors(batch = self.batch, permutations = [[0, 0, 1]] * 8)
+
+	def test_flips(self):
+		flags = [True, False] * 4
+		batch = self.augmenter.horizontalFlip(batch = self.batch, flags = flags)
+		self.assertTrue(np.array_equal(batch[0], cv2.flip(self.batch[0], 1)))
+		self.assertTrue(np.array_equal(batch[1], self.batch[1]))
+		batch = self.augmenter.verticalFlip(batch = self.batch)
+		self.assertTrue(np.array_equal(batch[3], cv2.flip(self.batch[3], 0)))
+
+	def test_add_gaussian_noise(self):
+		coefficients = [0.0] * 4 + [0.5] * 4
+		batch = self.augmenter.addGaussianNoise(batch = self.batch, coefficients = coefficients)
+		self.assertEqual(batch.dtype, np.uint8)
+		self.assertTrue(np.array_equal(batch[:4], self.batch[:4]))
+		self.assertFalse(np.array_equal(batch[4:], self.batch[4:]))
+		batch = np.full((4, 100, 100, 3), 128, np.uint8)
+		batch = self.augmenter.addGaussianNoise(batch = batch, coefficients = 0.05,
+																						distribution = "gaussian")
+		self.assertAlmostEqual(batch.mean(), 128, delta = 1)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,392 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: A benchmark suite for the augmenters and the dataset methods.
+The cases run on a synthetic dataset, each one in its own process so its
+peak memory is measured alone. The results are saved as json and compared
+with the results of a previous run to flag regressions.
+Usage: python Benchmark.py --output results.json --baseline previous.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import functools
+import traceback
+import contextlib
+import collections
+import multiprocessing
+import numpy as np
+import cv2
+
+try:
+	import resource
+except ImportError:
+	resource = None
+
+try:
+	from .ApplyAugmentation import *
+except:
+	from ApplyAugmentation import *
+
+try:
+	from .SyntheticDataset import *
+except:
+	from SyntheticDataset import *
+
+try:
+	from .ImageLocalizationDataset import *
+except:
+	from ImageLocalizationDataset import *
+
+try:
+	from .PackedDataset import *
+except:
+	from PackedDataset import *
+
+# Parameters of the augmenters in the benchmark. Augmenters that are not
+# listed run with their defaults.
+benchmarkParameters = {
+	boundingBoxConf: {"scale": {"size": [1.2, 1.2], "zoom": True},
+										"pad": {"size": [50, 50]},
+										"jitterBoxes": {"size": [10, 10], "quantity": 5},
+										"dropout": {"size": [10, 10], "threshold": 0.6}},
+	colorConf: {"changeBrightness": {"coefficient": 1.5}},
+	geometricConf: {"scale": {"size": [100, 100]},
+									"translate": {"offset": [100, 100]},
+									"jitterBoxes": {"size": [10, 10]}}
+}
+
+# Groups of the augmenter cases.
+augmenterGroups = [(boundingBoxConf, "boundingBox"), (colorConf, "color"), (geometricConf, "geometric")]
+
+# The configuration file of the data augmentation cases.
+benchmarkConfigurationFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), \
+																					"confs_examples", "aug_multiple_bndbx_color_sequential.json")
+
+# A case of the benchmark.
+# name: A string "<group>/<name>" that identifies the case across runs.
+# group: A string with the group of the case.
+# images: An int with the number of images processed by run.
+# setup: A callable f(directory = ...) that prepares the case and returns its
+#				state. directory is an empty directory for the outputs. Not timed.
+# run: A callable f(state) that does the work. Timed.
+BenchmarkCase = collections.namedtuple("BenchmarkCase", ["name", "group", "images", "setup", "run"])
+
+# The result of a case.
+# name: A string with the name of the case.
+# group: A string with the group of the case.
+# images: An int with the number of images processed.
+# seconds: A float with the time of run.
+# imagesPerSecond: A float.
+# peakRss: An int with the peak resident memory of the case in bytes.
+# rssGrowth: An int with the growth of the peak resident memory during run in bytes.
+BenchmarkResult = collections.namedtuple("BenchmarkResult", ["name", "group", "images", "seconds", \
+																	"imagesPerSecond", "peakRss", "rssGrowth"])
+
+# A metric of a case that got worse than in the baseline.
+# name: A string with the name of the case.
+# metric: A string, "imagesPerSecond" or "rssGrowth".
+# baseline: A number with the value of the baseline.
+# current: A number with the value of the current run.
+# change: A float with the relative change, current / baseline - 1.
+Regression = collections.namedtuple("Regression", ["name", "metric", "baseline", "current", "change"])
+
+def createAugmenterCases(frames = None, boundingBoxes = None, repeat = None):
+	"""
+	Creates a case for every registered augmenter.
+	Args:
+		frames: A list of tensors.
+		boundingBoxes: A list parallel to frames with the bounding boxes of every frame.
+		repeat: An int with the number of passes over the frames.
+	Returns:
+		A list of BenchmarkCase.
+	"""
+	cases = []
+	for augmentationConf, group in augmenterGroups:
+		for augmentationType in sorted(registries[augmentationConf]):
+			parameters = benchmarkParameters[augmentationConf].get(augmentationType, {})
+			cases.append(BenchmarkCase(name = "{}/{}".format(group, augmentationType),
+																group = group,
+																images = len(frames) * repeat,
+																setup = functools.partial(setupAugmenter, augmentationConf = augmentationConf, \
+																						augmentationType = augmentationType, parameters = parameters, \
+																						frame = frames[0], boundingBoxes = boundingBoxes[0]),
+																run = functools.partial(runAugmenter, frames = frames, \
+																						boundingBoxes = boundingBoxes, repeat = repeat)))
+	return cases
+
+def setupAugmenter(directory = None, augmentationConf = None, augmentationType = None, parameters = None, frame = None, boundingBoxes = None):
+	"""
+	Binds an augmenter and applies it once, so the first call of OpenCV is
+	not timed.
+	"""
+	augmenter = bindAugmenter(augmentationConf = augmentationConf, augmentationType = augmentationType, \
+														parameters = parameters)
+	augmenter(frame = frame.copy(), boundingBoxes = [list(each) for each in boundingBoxes])
+	return augmenter
+
+def runAugmenter(augmenter, frames = None, boundingBoxes = None, repeat = None):
+	"""
+	Applies an augmenter to every frame. The augmenters get a copy of the frame
+	as in an augmentation plan.
+	"""
+	for i in range(repeat):
+		for frame, frameBoundingBoxes in zip(frames, boundingBoxes):
+			augmenter(frame = frame.copy(), boundingBoxes = [list(each) for each in frameBoundingBoxes])
+
+def createDatasetCases(imagesDirectory = None, annotationsDirectory = None, indexPath = None, offset = None):
+	"""
+	Creates a case for the dataset methods of ImageLocalizationDataset.
+	Args:
+		imagesDirectory: A string with the path to the images of the dataset.
+		annotationsDirectory: A string with the path to the annotations of the dataset.
+		indexPath: A string with the path of the persisted annotation index.
+		offset: A list [width, height] with the offset of reduceDatasetByRois.
+	Returns:
+		A list of BenchmarkCase.
+	"""
+	images = len(os.listdir(imagesDirectory))
+	setup = functools.partial(setupDataset, imagesDirectory = imagesDirectory, annotationsDirectory = annotationsDirectory, \
+														indexPath = indexPath)
+	runs = [("dataConsistency", lambda state: state["dataset"].dataConsistency()),
+					("findEmptyOrWrongAnnotations", lambda state: state["dataset"].findEmptyOrWrongAnnotations()),
+					("computeBoundingBoxStats", lambda state: state["dataset"].computeBoundingBoxStats()),
+					("saveBoundingBoxes", lambda state: state["dataset"].saveBoundingBoxes(outputDirectory = state["images"])),
+					("reduceDatasetByRois", lambda state: state["dataset"].reduceDatasetByRois(offset = offset, \
+														outputImageDirectory = state["images"], outputAnnotationDirectory = state["annotations"])),
+					("applyDataAugmentation", lambda state: state["dataset"].applyDataAugmentation( \
+														configurationFile = benchmarkConfigurationFile, outputImageDirectory = state["images"], \
+														outputAnnotationDirectory = state["annotations"], workers = 1, seed = 0)),
+					("applyDataAugmentation (packed)", lambda state: state["dataset"].applyDataAugmentation( \
+														configurationFile = benchmarkConfigurationFile, workers = 1, seed = 0, \
+														sink = PackedDatasetWriter(directory = state["images"]))),
+					("iterateDataAugmentation (inline)", lambda state: collections.deque(state["dataset"]\
+														.iterateDataAugmentation(configurationFile = benchmarkConfigurationFile, \
+														workers = 0, seed = 0), maxlen = 0)),
+					("iterateDataAugmentation (1 worker)", lambda state: collections.deque(state["dataset"]\
+														.iterateDataAugmentation(configurationFile = benchmarkConfigurationFile, \
+														workers = 1, seed = 0), maxlen = 0))]
+	return [BenchmarkCase(name = "dataset/{}".format(name), group = "dataset", images = images, setup = setup, run = run) \
+					for name, run in runs]
+
+def setupDataset(directory = None, imagesDirectory = None, annotationsDirectory = None, indexPath = None):
+	"""
+	Opens the dataset and creates the output directories of a dataset case.
+	"""
+	state = {"dataset": ImageLocalizationDataset(imagesDirectory = imagesDirectory, \
+																							annotationsDirectory = annotationsDirectory, \
+																							databaseName = "benchmark", indexPath = indexPath),
+					"images": os.path.join(directory, "images"),
+					"annotations": os.path.join(directory, "annotations")}
+	os.mkdir(state["images"])
+	os.mkdir(state["annotations"])
+	return state
+
+def peakRss():
+	"""
+	The peak resident memory of this process and of its finished children.
+	Args:
+		None
+	Returns:
+		An int with the number of bytes, 0 if the platform does not report it.
+	"""
+	if (resource == None):
+		return 0
+	peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, \
+							resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+	# Linux reports kilobytes, macOS reports bytes.
+	return peak if (sys.platform == "darwin") else peak * 1024
+
+@contextlib.contextmanager
+def quiet():
+	"""
+	Hides the prints and the progress bars of the dataset methods.
+	"""
+	with open(os.devnull, "w") as devnull:
+		with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+			yield
+
+def runCase(case = None, workspace = None, results = None):
+	"""
+	Runs a case and puts a tuple (seconds, peakRss, rssGrowth) or a string
+	with the traceback of its error in results.
+	"""
+	directory = tempfile.mkdtemp(dir = workspace)
+	try:
+		with quiet():
+			state = case.setup(directory = directory)
+			start = peakRss()
+			seconds = time.perf_counter()
+			case.run(state)
+			seconds = time.perf_counter() - seconds
+		peak = peakRss()
+		results.put((seconds, peak, peak - start))
+	except Exception:
+		results.put(traceback.format_exc())
+	finally:
+		shutil.rmtree(directory)
+
+def measureCase(case = None, workspace = None):
+	"""
+	Runs a case in a new process. Where processes cannot be forked, the case
+	runs in this process and peakRss is the peak of this process.
+	Args:
+		case: A BenchmarkCase.
+		workspace: A string with the path to a directory for the outputs.
+	Returns:
+		A BenchmarkResult.
+	"""
+	if ("fork" in multiprocessing.get_all_start_methods()):
+		context = multiprocessing.get_context("fork")
+		results = context.SimpleQueue()
+		process = context.Process(target = runCase, args = (case, workspace, results))
+		process.start()
+		process.join()
+		if (results.empty()):
+			raise Exception("ERROR: The process of {} stopped with exit code {}.".format(case.name, process.exitcode))
+		result = results.get()
+	else:
+		results = collections.deque()
+		runCase(case = case, workspace = workspace, results = collections.namedtuple("Results", ["put"])(results.append))
+		result = results.popleft()
+	if (type(result) == str):
+		raise Exception("ERROR: {} failed:\n{}".format(case.name, result))
+	seconds, peak, growth = result
+	return BenchmarkResult(name = case.name, group = case.group, images = case.images, seconds = seconds, \
+												imagesPerSecond = case.images / seconds if (seconds > 0) else float("inf"), \
+												peakRss = peak, rssGrowth = growth)
+
+def saveResults(path = None, results = None, parameters = None):
+	"""
+	Saves the results of a run as json.
+	Args:
+		path: A string with the path of the json file.
+		results: A list of BenchmarkResult.
+		parameters: A hashmap with the parameters of the run.
+	Returns:
+		None
+	"""
+	report = {"parameters": parameters,
+						"environment": {"python": platform.python_version(), "numpy": np.__version__, \
+														"opencv": cv2.__version__, "platform": platform.platform(), \
+														"cpus": os.cpu_count(), "date": time.strftime("%Y-%m-%dT%H:%M:%S")},
+						"results": [result._asdict() for result in results]}
+	with open(path, "w") as f:
+		json.dump(report, f, indent = 2)
+
+def loadResults(path = None):
+	"""
+	Loads the results saved by saveResults.
+	Args:
+		path: A string with the path of the json file.
+	Returns:
+		A tuple with the parameters of the run and a list of BenchmarkResult.
+	"""
+	with open(path, "r") as f:
+		report = json.load(f)
+	return report["parameters"], [BenchmarkResult(**result) for result in report["results"]]
+
+def compareResults(baseline = None, current = None, tolerance = None, minimumRssGrowth = None):
+	"""
+	Compares the cases of two runs. A case regresses when its throughput drops
+	by more than tolerance or when its memory growth increases by more than
+	tolerance and minimumRssGrowth. Cases that are not in both runs are ignored.
+	Args:
+		baseline: A list of BenchmarkResult.
+		current: A list of BenchmarkResult.
+		tolerance: A float with the relative change that is accepted. Default is 0.1.
+		minimumRssGrowth: An int with the increase of rssGrowth in bytes that is
+											accepted, small growths are noise. Default is 16MB.
+	Returns:
+		A list of Regression.
+	"""
+	if (tolerance == None):
+		tolerance = 0.1
+	if (minimumRssGrowth == None):
+		minimumRssGrowth = 16 * 2**20
+	baseline = {result.name: result for result in baseline}
+	regressions = []
+	for result in current:
+		if (not (result.name in baseline)):
+			continue
+		previous = baseline[result.name]
+		if (result.imagesPerSecond < previous.imagesPerSecond * (1 - tolerance)):
+			regressions.append(Regression(name = result.name, metric = "imagesPerSecond", \
+																		baseline = previous.imagesPerSecond, current = result.imagesPerSecond, \
+																		change = result.imagesPerSecond / previous.imagesPerSecond - 1))
+		if ((result.rssGrowth > previous.rssGrowth * (1 + tolerance)) and \
+				(result.rssGrowth - previous.rssGrowth > minimumRssGrowth)):
+			regressions.append(Regression(name = result.name, metric = "rssGrowth", \
+																		baseline = previous.rssGrowth, current = result.rssGrowth, \
+																		change = result.rssGrowth / previous.rssGrowth - 1 if (previous.rssGrowth > 0) \
+																		else float("inf")))
+	return regressions
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--images", type = int, default = 8)
+	parser.add_argument("--height", type = int, default = 600)
+	parser.add_argument("--width", type = int, default = 800)
+	parser.add_argument("--boxes", type = int, default = 5)
+	parser.add_argument("--classes", type = int, default = 3)
+	parser.add_argument("--repeat", type = int, default = 3)
+	parser.add_argument("--filter", type = str, default = "", help = "Run the cases whose name contains this string.")
+	parser.add_argument("--output", type = str, default = None, help = "Save the results in this json file.")
+	parser.add_argument("--baseline", type = str, default = None, help = "Compare with the results in this json file.")
+	parser.add_argument("--tolerance", type = float, default = 0.1)
+	args = parser.parse_args()
+	parameters = {"images": args.images, "height": args.height, "width": args.width, "boxes": args.boxes, \
+								"classes": args.classes, "repeat": args.repeat}
+	workspace = tempfile.mkdtemp()
+	try:
+		imagesDirectory, annotationsDirectory = createSyntheticDataset(directory = workspace, images = args.images, \
+																	height = args.height, width = args.width, boxes = args.boxes, \
+																	classes = args.classes)
+		annotations = [ImageAnnotation(path = os.path.join(annotationsDirectory, each)) \
+										for each in sorted(os.listdir(annotationsDirectory))]
+		frames = [cv2.imread(os.path.join(imagesDirectory, each)) for each in sorted(os.listdir(imagesDirectory))]
+		indexPath = os.path.join(workspace, "index.npz")
+		cases = createAugmenterCases(frames = frames, boundingBoxes = [each.propertyBoundingBoxes for each in annotations], \
+																	repeat = args.repeat) + \
+						createDatasetCases(imagesDirectory = imagesDirectory, annotationsDirectory = annotationsDirectory, \
+																indexPath = indexPath, offset = [args.width // 2, args.height // 2])
+		cases = [case for case in cases if (args.filter in case.name)]
+		# Build the annotation index once, so no case pays for it.
+		with quiet():
+			ImageLocalizationDataset(imagesDirectory = imagesDirectory, annotationsDirectory = annotationsDirectory, \
+															databaseName = "benchmark", indexPath = indexPath).dataConsistency()
+		print("{} images of {}x{}, {} boxes, {} classes".format(args.images, args.height, args.width, \
+																														args.boxes, args.classes))
+		print("{:<48} {:>10} {:>12} {:>12}".format("case", "images/s", "peak RSS MB", "growth MB"))
+		results, failures = [], []
+		for case in cases:
+			try:
+				result = measureCase(case = case, workspace = workspace)
+			except Exception as e:
+				failures.append(case.name)
+				print("{:<48} {}".format(case.name, str(e).splitlines()[-1]))
+				continue
+			results.append(result)
+			print("{:<48} {:>10.1f} {:>12.1f} {:>12.1f}".format(result.name, result.imagesPerSecond, \
+																													result.peakRss / 2**20, result.rssGrowth / 2**20))
+	finally:
+		shutil.rmtree(workspace)
+	if (args.output != None):
+		saveResults(path = args.output, results = results, parameters = parameters)
+	regressions = []
+	if (args.baseline != None):
+		baselineParameters, baseline = loadResults(path = args.baseline)
+		if (baselineParameters != parameters):
+			print("WARNING: The baseline was run with other parameters: {}".format(baselineParameters))
+		regressions = compareResults(baseline = baseline, current = results, tolerance = args.tolerance)
+		for regression in regressions:
+			print("REGRESSION {} {}: {:.1f} -> {:.1f} ({:+.0%})".format(regression.name, regression.metric, \
+																regression.baseline, regression.current, regression.change))
+		print("{} regressions against {}".format(len(regressions), args.baseline))
+	if ((len(regressions) > 0) or (len(failures) > 0)):
+		sys.exit(1)
@@ -0,0 +1,60 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Unit tests for Benchmark.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from Benchmark import *
+
+class Benchmark_test(unittest.TestCase):
+
+	def setUp(self):
+		self.root = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.root)
+
+	def result(self, name = None, imagesPerSecond = None, rssGrowth = None):
+		return BenchmarkResult(name = name, group = "color", images = 10, seconds = 10 / imagesPerSecond, \
+													imagesPerSecond = imagesPerSecond, peakRss = 2**27, rssGrowth = rssGrowth)
+
+	def test_measureCase(self):
+		frames = [np.zeros((32, 48, 3), np.uint8)] * 2
+		cases = createAugmenterCases(frames = frames, boundingBoxes = [[[4, 4, 20, 20]]] * 2, repeat = 2)
+		# Every registered augmenter has a case.
+		self.assertEqual(len(cases), sum([len(registries[conf]) for conf, group in augmenterGroups]))
+		case = [case for case in cases if (case.name == "color/bilateralBlur")][0]
+		result = measureCase(case = case, workspace = self.root)
+		self.assertEqual((result.name, result.images), ("color/bilateralBlur", 4))
+		self.assertGreater(result.imagesPerSecond, 0)
+		self.assertGreater(result.peakRss, 0)
+		# The error of a case is raised with its traceback.
+		failing = case._replace(run = lambda state: 1 / 0)
+		with self.assertRaises(Exception) as context:
+			measureCase(case = failing, workspace = self.root)
+		self.assertTrue("ZeroDivisionError" in str(context.exception))
+		self.assertEqual(os.listdir(self.root), [])
+
+	def test_compareResults(self):
+		path = os.path.join(self.root, "results.json")
+		baseline = [self.result(name = "a", imagesPerSecond = 100, rssGrowth = 2**20),
+								self.result(name = "b", imagesPerSecond = 100, rssGrowth = 2**20),
+								self.result(name = "c", imagesPerSecond = 100, rssGrowth = 2**26)]
+		saveResults(path = path, results = baseline, parameters = {"images": 10})
+		parameters, loaded = loadResults(path = path)
+		self.assertEqual((parameters, loaded), ({"images": 10}, baseline))
+		current = [self.result(name = "a", imagesPerSecond = 95, rssGrowth = 2**21),
+								self.result(name = "b", imagesPerSecond = 50, rssGrowth = 2**20),
+								self.result(name = "c", imagesPerSecond = 100, rssGrowth = 2**27),
+								self.result(name = "d", imagesPerSecond = 1, rssGrowth = 2**30)]
+		regressions = compareResults(baseline = loaded, current = current)
+		self.assertEqual([(each.name, each.metric) for each in regressions], [("b", "imagesPerSecond"), ("c", "rssGrowth")])
+		self.assertAlmostEqual(regressions[0].change, -0.5)
+		self.assertEqual(compareResults(baseline = loaded, current = current, tolerance = 1.5), [])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -39,9 +39,14 @@ Log:
 from interface import implements
 import math
 import random
-import cv2
 import numpy as np
 
+try:
+	from .LazyImport import lazyImport
+except:
+	from LazyImport import lazyImport
+cv2 = lazyImport("cv2")
+
 try:
 	from .ColorAugmentersMethods import *
 except:
@@ -68,6 +73,10 @@ class ColorAugmenters(implements(ColorAugmentersMethods)):
 	def __init__(self):
 		super(ColorAugmenters, self).__init__()
 		self.assertion = AssertDataTypes()
+		self.rng = np.random.default_rng()
+		self.noise = None
+		self.pcaKey = None
+		self.pca = None
 
 	def invertColor(self, frame = None, CSpace = None):
 		"""
@@ -226,13 +235,17 @@ class ColorAugmenters(implements(ColorAugmentersMethods)):
 			sharpened = sharpened.astype(np.uint8)
 		return sharpened
 
-	def addGaussianNoise(self, frame = None, coefficient = None):
+	def addGaussianNoise(self, frame = None, coefficient = None, distribution = None):
 		"""
 		Add gaussian noise to a tensor.
 		Args:
 			frame: A tensor that contains an image.
 			coefficient: A float that contains the amount of noise to add
 										to a frame.
+			distribution: A string that contains the distribution of the noise.
+										"uniform" (default) blends the frame with uniform noise
+										weighted by coefficient. "gaussian" adds zero mean normal
+										noise with a standard deviation of coefficient*255.
 		Returns:
 			An altered frame that has gaussian noise.
 		"""
@@ -243,23 +256,49 @@ class ColorAugmenters(implements(ColorAugmentersMethods)):
 			coefficient = 0.2
 		if (type(coefficient) != float):
 			raise TypeError("ERROR: Coefficient parameter has to be of type float.")
+		if (distribution == None):
+			distribution = "uniform"
+		if (not (distribution in ["uniform", "gaussian"])):
+			raise ValueError("ERROR: distribution parameter has to be uniform or gaussian.")
 		# Local variables
-		height, width, depth = frame.shape
-		# Create random noise
-		gaussianNoise = np.random.rand(height*width*depth) * 255
-		# Reshape noise
-		gaussianNoise = np.array([int(i) for i in gaussianNoise], np.uint8)
-		gaussianNoise = gaussianNoise.reshape([height, width, depth])
-		# Cast types
-		gaussianNoise = gaussianNoise.astype(np.uint8)
-		frame = frame.astype(np.uint8)
-		# Add noise to frame
-		frame = cv2.addWeighted(frame, 1-coefficient, gaussianNoise, coefficient, 0)
-		if (not (frame.dtype == np.uint8)):
-			print("WARNING: Image is not dtype uint8. Forcing type.")
+		if (frame.dtype != np.uint8):
 			frame = frame.astype(np.uint8)
+		noise = self.noiseBuffer(shape = frame.shape)
+		# Create random noise and add it to the frame.
+		if (distribution == "uniform"):
+			self.rng.random(out = noise, dtype = np.float32)
+			noise *= 255
+			frame = cv2.addWeighted(frame, 1-coefficient, noise, coefficient, 0, dtype = cv2.CV_8U)
+		else:
+			self.rng.standard_normal(out = noise, dtype = np.float32)
+			noise *= coefficient*255
+			frame = cv2.add(frame, noise, dtype = cv2.CV_8U)
 		return frame
 
+	def noiseBuffer(self, shape = None):
+		"""
+		Returns a float32 buffer of the given shape. The buffer is reused by
+		consecutive calls with the same shape.
+		Args:
+			shape: A tuple that contains the shape of the buffer.
+		Returns:
+			A float32 tensor with undefined content.
+		"""
+		if ((self.noise is None) or (self.noise.shape != shape)):
+			self.noise = np.empty(shape, np.float32)
+		return self.noise
+
+	def seedRandomGenerator(self, seed = None):
+		"""
+		Creates the random generator used by the augmenters of this instance.
+		Every process has its own instance, so workers do not share a generator.
+		Args:
+			seed: An int that contains the seed. If None, fresh entropy is used.
+		Returns:
+			None
+		"""
+		self.rng = np.random.default_rng(seed)
+
 	def gaussianBlur(self, frame = None, kernelSize = None, sigma = None):
 		"""
 		Blur an image applying a gaussian filter with a random sigma(0, sigma_max)
@@ -432,52 +471,75 @@ class ColorAugmenters(implements(ColorAugmentersMethods)):
 			frame = frame.astype(np.uint8)
 		return frame
 
-	def fancyPCA(self, frame = None):
+	def fancyPCA(self, frame = None, subsample = None, cacheKey = None, inPlace = None):
 		"""
 		Fancy PCA implementation.
 		Args:
-			frame: A tensor that contains an image.
+			frame: A tensor of type uint8 that contains an image.
+			subsample: An int that contains the stride used to sample the pixels
+									the channel statistics are computed from. Defaults to 1.
+			cacheKey: A hashable that identifies the image. If it is the same as in
+									the last call, the eigenvectors of the last call are reused
+									so repeated draws on an image compute the statistics once.
+			inPlace: A boolean that if True writes the result into frame.
 		Returns:
-			A tensor that contains the altered image by fancy PCA.
+			A tensor of type uint8 that contains the altered image by fancy PCA.
 		"""
 		# Assertions
 		if (self.assertion.assertNumpyType(frame) == False):
 			raise ValueError("Frame has to be a numpy array.")
-		if (len(frame.shape) != 3):
+		if ((len(frame.shape) != 3) or (frame.shape[2] != 3)):
 			raise Exception("Frame must have 3 dimensions")
-		# Local variables
-		height, width, depth = frame.shape
-		# Create matrix
-		redCol = frame[:, :, 2].reshape(-1, 1)
-		greenCol = frame[:, :, 1].reshape(-1, 1)
-		blueCol = frame[:, :, 0].reshape(-1, 1)
-		# Calculate the mean of every column and substract it
-		uRed = np.mean(redCol)
-		uGreen = np.mean(greenCol)
-		uBlue = np.mean(blueCol)
-		redCol = redCol - uRed
-		greenCol = greenCol - uGreen
-		blueCol = blueCol - uBlue
-		# Define matrix
-		matrix = np.zeros([redCol.shape[0], 3])
-		matrix[:, 0] = list(redCol)
-		matrix[:, 1] = list(greenCol)
-		matrix[:, 2] = list(blueCol)
-		# Normalize data
-		# If the data is in the range 0-1, then normalize the image.
-		# If the data is in the range 0-255, then don't normalize. 
-		# Apply PCA
-		cov = np.cov(matrix.T)
-		eigvals, eigvects = np.linalg.eigh(cov)
-		# pca = np.dot(np.sqrt(eigvals), eigvects)
-		pca = np.sqrt(eigvals) * eigvects
-		# print(frame.shape, cov.shape)
-		# print(eigvects.shape, eigvals.shape)
-		perturb = [int(each) for each in (pca*np.random.randn(3)*0.1).sum(axis=1)]
-		# print("Perturbation: ", perturb)
-		# Add perturbation vector to frame
-		framePCA = frame.copy() + perturb
-		if (not (frame.dtype == np.uint8)):
+		if (inPlace == None):
+			inPlace = False
+		if (frame.dtype != np.uint8):
 			print("WARNING: Image is not dtype uint8. Forcing type.")
-			frame = frame.astype(np.uint8)		
-		return framePCA
+			frame = np.clip(frame, 0, 255).astype(np.uint8)
+		# Logic
+		if (cacheKey != None):
+			cacheKey = (cacheKey, subsample)
+		if ((cacheKey != None) and (cacheKey == self.pcaKey)):
+			pca = self.pca
+		else:
+			eigvals, eigvects = self.computeColorPCA(frame = frame, subsample = subsample)
+			pca = np.sqrt(eigvals) * eigvects
+			self.pcaKey, self.pca = cacheKey, pca
+		# The statistics follow the channel order of the frame, so the
+		# perturbation is added to the channel it was computed from.
+		perturb = (pca * self.rng.normal(0, 0.1, 3)).sum(axis = 1)
+		# Add perturbation vector to frame
+		return cv2.add(frame, (perturb[0], perturb[1], perturb[2], 0), \
+									dst = frame if inPlace else None)
+
+	def computeColorPCA(self, frame = None, subsample = None):
+		"""
+		Computes the eigenvalues and eigenvectors of the covariance of the
+		channels of an image in a single pass over its pixels.
+		Args:
+			frame: A tensor that contains an image.
+			subsample: An int that contains the stride used to sample the pixels.
+		Returns:
+			A numpy array with the eigenvalues and a matrix with the eigenvectors
+			as columns.
+		"""
+		# Assertions
+		if (subsample == None):
+			subsample = 1
+		if ((type(subsample) != int) or (subsample < 1)):
+			raise ValueError("ERROR: subsample parameter has to be an int bigger than 0.")
+		# Logic
+		if (subsample > 1):
+			frame = frame[::subsample, ::subsample]
+		pixels = frame.reshape(-1, 3)
+		n = pixels.shape[0]
+		if (n < 2):
+			raise ValueError("ERROR: Not enough pixels to compute the covariance.")
+		# The pixels are shifted by an estimate of their mean before the product,
+		# otherwise bright frames with a low variance lose the covariance to the
+		# rounding of float32. An integer shift keeps the pixels exact.
+		shift = np.rint(pixels[::max(n // 1024, 1)].mean(axis = 0))
+		pixels = np.subtract(pixels, shift, dtype = np.float32)
+		mean = pixels.mean(axis = 0, dtype = np.float64)
+		cov = (np.dot(pixels.T, pixels).astype(np.float64) - n*np.outer(mean, mean)) / (n - 1)
+		eigvals, eigvects = np.linalg.eigh(cov)
+		return np.maximum(eigvals, 0), eigvects
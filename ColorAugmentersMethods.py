@@ -54,13 +54,15 @@ class ColorAugmentersMethods(Interface):
 		"""
 		pass
 	
-	def addGaussianNoise(self, frame = None, coefficient = None):
+	def addGaussianNoise(self, frame = None, coefficient = None, distribution = None):
 		"""
 		Add gaussian noise to a tensor.
 		Args:
 			frame: A tensor that contains an image.
 			coefficient: A float that contains the amount of noise to add
 										to a frame.
+			distribution: A string that contains the distribution of the noise,
+										uniform or gaussian.
 		Returns:
 			An altered frame that has gaussian noise.
 		"""
@@ -126,11 +128,14 @@ class ColorAugmentersMethods(Interface):
 		"""
 		pass
 
-	def fancyPCA(self, frame = None):
+	def fancyPCA(self, frame = None, subsample = None, cacheKey = None, inPlace = None):
 		"""
 		Fancy PCA implementation.
 		Args:
 			frame: A tensor that contains an image.
+			subsample: An int that contains the stride used to sample the pixels.
+			cacheKey: A hashable that identifies the image to reuse its eigenvectors.
+			inPlace: A boolean that if True writes the result into frame.
 		Returns:
 			A tensor that contains the altered image by fancy PCA.
 		"""
@@ -184,5 +184,64 @@ class ColorAugmenters_test(unittest.TestCase):
 	# 		cv2.waitKey(self.waitTime)
 	# 		cv2.destroyAllWindows()
 
+class ColorAugmentersSynthetic_test(unittest.TestCase):
+
+	def setUp(self):
+		self.frame = np.random.randint(0, 255, (120, 160, 3)).astype(np.uint8)
+		self.augmenter = ColorAugmenters()
+
+	def tearDown(self):
+		pass
+
+	def test_add_gaussian_noise(self):
+		for distribution in [None, "uniform", "gaussian"]:
+			frame = self.augmenter.addGaussianNoise(frame = self.frame,
+																							coefficient = 0.2,
+																							distribution = distribution)
+			self.assertEqual(frame.dtype, np.uint8)
+			self.assertEqual(frame.shape, self.frame.shape)
+		# The noise buffer is reused for frames of the same shape.
+		buffer = self.augmenter.noise
+		self.augmenter.addGaussianNoise(frame = self.frame)
+		self.assertIs(self.augmenter.noise, buffer)
+		# Gaussian noise has zero mean.
+		frame = np.full((200, 200, 3), 128, np.uint8)
+		frame = self.augmenter.addGaussianNoise(frame = frame, coefficient = 0.05,
+																						distribution = "gaussian")
+		self.assertAlmostEqual(frame.mean(), 128, delta = 1)
+		with self.assertRaises(ValueError):
+			self.augmenter.addGaussianNoise(frame = self.frame, distribution = "poisson")
+
+	def test_add_gaussian_noise_seed(self):
+		frames = []
+		for i in range(2):
+			self.augmenter.seedRandomGenerator(seed = 7)
+			frames.append(self.augmenter.addGaussianNoise(frame = self.frame))
+		self.assertTrue(np.array_equal(frames[0], frames[1]))
+
+	def test_fancyPCA(self):
+		frame = self.augmenter.fancyPCA(frame = self.frame, subsample = 2)
+		self.assertEqual(frame.dtype, np.uint8)
+		self.assertEqual(frame.shape, self.frame.shape)
+		# Only the blue channel varies, so only the blue channel is perturbed.
+		frame = np.full((64, 64, 3), 128, np.uint8)
+		frame[:, :, 0] = np.random.randint(0, 255, (64, 64))
+		result = self.augmenter.fancyPCA(frame = frame, cacheKey = "blue", inPlace = True)
+		self.assertIs(result, frame)
+		self.assertTrue(np.all(result[:, :, 1:] == 128))
+		# Repeated draws reuse the eigenvectors of the image.
+		pca = self.augmenter.pca
+		self.augmenter.fancyPCA(frame = frame, cacheKey = "blue")
+		self.assertIs(self.augmenter.pca, pca)
+
+	def test_computeColorPCA(self):
+		# A bright frame with a low variance.
+		rng = np.random.RandomState(0)
+		noise = np.dot(rng.normal(0, 1, (512, 512, 3)), [[4.2, 0.3, 0.1], [0, 3.0, 0.2], [0, 0, 0.5]])
+		frame = np.clip(np.rint(noise + [200, 205, 198]), 0, 255).astype(np.uint8)
+		eigvals, eigvects = self.augmenter.computeColorPCA(frame = frame)
+		expected = np.linalg.eigvalsh(np.cov(frame.reshape(-1, 3).T.astype(np.float64)))
+		self.assertTrue(np.allclose(eigvals, expected, rtol = 1e-4))
+
 if __name__ == "__main__":
 	unittest.main()
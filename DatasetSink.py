@@ -0,0 +1,222 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Sinks that store the samples produced by the dataset
+methods. DirectorySink writes an image and a VOC xml annotation per
+sample, see PackedDataset.py for a format made of a few large files.
+"""
+import os
+import collections
+import numpy as np
+from interface import implements
+
+try:
+	from .DatasetSinkMethods import *
+except:
+	from DatasetSinkMethods import *
+
+try:
+	from .Util import *
+except:
+	from Util import *
+
+try:
+	from .WriteBehind import *
+except:
+	from WriteBehind import *
+
+try:
+	from .NameGenerator import *
+except:
+	from NameGenerator import *
+
+try:
+	from .SharedFrameSlab import *
+except:
+	from SharedFrameSlab import *
+
+# A sample produced by the augmentation of a dataset.
+# frame: A tensor that contains the augmented image.
+# boundingBoxes: An array of shape Nx4 with the bounding boxes [xmin, ymin, xmax, ymax].
+# names: A list of strings parallel to boundingBoxes.
+AugmentedSample = collections.namedtuple("AugmentedSample", ["frame", "boundingBoxes", "names"])
+
+class DirectorySink(implements(DatasetSinkMethods)):
+	def __init__(self, outputImageDirectory = None, outputAnnotationDirectory = None, databaseName = None, writers = None, maxPending = None, encodeSettings = None, nameGenerator = None):
+		"""
+		Writes every sample as an image in outputImageDirectory and a xml annotation
+		in outputAnnotationDirectory with a name of nameGenerator. The files are written
+		behind the caller by a WriteBehindQueue, close waits for them and raises
+		the errors of the writes.
+		Args:
+			outputImageDirectory: A string that contains the path to the directory where
+														the images will be saved.
+			outputAnnotationDirectory: A string that contains the path to the directory where
+																the annotations will be saved.
+			databaseName: A string that contains the name of the dataset.
+			writers: An int with the number of threads that write the files. If 0,
+							the files are written by the caller. Default is 2.
+			maxPending: An int with the maximum number of samples waiting to be
+									written. Default is 4 times the number of writers.
+			encodeSettings: An EncodeSettings with the format and the quality of the
+											images. If None, the images keep the format of the original
+											image and the defaults of cv2.imwrite.
+			nameGenerator: A NameGenerator. Default is a NameGenerator with databaseName
+											as prefix, without run and without manifest. Its names repeat
+											from one sink to the next, so the files of an earlier sink in
+											the same directories are overwritten.
+		Returns:
+			None
+		"""
+		super(DirectorySink, self).__init__()
+		# Assertions
+		if (outputImageDirectory == None):
+			raise ValueError("ERROR: outputImageDirectory parameter cannot be empty.")
+		if (outputAnnotationDirectory == None):
+			raise ValueError("ERROR: outputAnnotationDirectory parameter cannot be empty.")
+		if (databaseName == None):
+			raise ValueError("ERROR: databaseName parameter cannot be empty.")
+		if (writers == None):
+			writers = 2
+		if ((type(writers) != int) or (writers < 0)):
+			raise ValueError("ERROR: writers parameter must be an int greater or equal than 0.")
+		if (nameGenerator == None):
+			nameGenerator = NameGenerator(prefix = databaseName)
+		# Class variables
+		self.outputImageDirectory = outputImageDirectory
+		self.outputAnnotationDirectory = outputAnnotationDirectory
+		self.databaseName = databaseName
+		self.writers = writers
+		self.maxPending = maxPending
+		self.encodeSettings = encodeSettings
+		self.nameGenerator = nameGenerator
+		# The queue is created by the first write, so the sink can be sent to the
+		# worker processes.
+		self.queue = None
+
+	def __getstate__(self):
+		state = self.__dict__.copy()
+		state["queue"] = None
+		return state
+
+	@property
+	def propertyOutputImageDirectory(self):
+		return self.outputImageDirectory
+
+	@property
+	def propertyOutputAnnotationDirectory(self):
+		return self.outputAnnotationDirectory
+
+	def write(self, frame = None, boundingBoxes = None, names = None, augmentationType = None, origin = None, extension = None):
+		# Generate a new name here, the names follow the order of the writes.
+		newName = self.nameGenerator.next(origin = origin, augmentationType = augmentationType)
+		if (self.encodeSettings != None):
+			extension = self.encodeSettings.extension(extension = extension)
+		if (self.writers == 0):
+			self.save(frame = frame, boundingBoxes = boundingBoxes, names = names, \
+								augmentationType = augmentationType, origin = origin, \
+								imgName = newName + extension, xmlName = newName + ".xml")
+			return
+		if (self.queue == None):
+			self.queue = WriteBehindQueue(workers = self.writers, maxPending = self.maxPending)
+		# The caller keeps modifying the frame and the bounding boxes, queue copies.
+		if (boundingBoxes is not None):
+			boundingBoxes = [list(boundingBox) for boundingBox in boundingBoxes]
+		if (names is not None):
+			names = list(names)
+		self.queue.submit(function = self.save,
+											frame = frame.copy(),
+											boundingBoxes = boundingBoxes,
+											names = names,
+											augmentationType = augmentationType,
+											origin = origin,
+											imgName = newName + extension,
+											xmlName = newName + ".xml")
+
+	def save(self, frame = None, boundingBoxes = None, names = None, augmentationType = None, origin = None, imgName = None, xmlName = None):
+		"""
+		Writes the image and the annotation of a sample.
+		Args:
+			frame: A tensor that contains an image.
+			boundingBoxes: A list of lists that contains the coordinates of the bounding boxes.
+			names: A list of strings parallel to boundingBoxes.
+			augmentationType: A string that contains the type of augmentation.
+			origin: A string that contains the path to the original image.
+			imgName: A string with the name of the image file.
+			xmlName: A string with the name of the annotation file.
+		Returns:
+			None
+		"""
+		# Save image.
+		Util.save_img(frame = frame,
+									img_name = imgName,
+									output_image_directory = self.outputImageDirectory,
+									encode_settings = self.encodeSettings)
+		# Save annotation.
+		Util.save_annotation(filename = imgName,
+												path = os.path.join(self.outputImageDirectory, imgName),
+												database_name = self.databaseName,
+												frame_size = frame.shape,
+												data_augmentation_type = augmentationType,
+												bounding_boxes = boundingBoxes,
+												names = names,
+												origin = origin,
+												output_directory = os.path.join(self.outputAnnotationDirectory, xmlName))
+
+	def shard(self, index = None):
+		# Every worker writes to the same directories with its own manifest.
+		return DirectorySink(outputImageDirectory = self.outputImageDirectory,
+												outputAnnotationDirectory = self.outputAnnotationDirectory,
+												databaseName = self.databaseName,
+												writers = self.writers,
+												maxPending = self.maxPending,
+												encodeSettings = self.encodeSettings,
+												nameGenerator = self.nameGenerator.shard(index = index))
+
+	def close(self):
+		try:
+			if (self.queue != None):
+				queue, self.queue = self.queue, None
+				queue.close()
+		finally:
+			self.nameGenerator.close()
+
+class QueueSink(implements(DatasetSinkMethods)):
+	def __init__(self, queue = None, slab = None):
+		"""
+		Puts every sample in a queue as an AugmentedSample instead of saving it.
+		Args:
+			queue: A queue.Queue or a multiprocessing.Queue. If it is bounded, write
+							blocks while it is full.
+			slab: A SharedFrameSlab. If given, the frames that fit in a slot are
+						copied to the slab and the samples carry a SlabFrame that the
+						reader takes from the slab. Default is None.
+		Returns:
+			None
+		"""
+		super(QueueSink, self).__init__()
+		# Assertions
+		if (queue == None):
+			raise ValueError("ERROR: queue parameter cannot be empty.")
+		# Class variables
+		self.queue = queue
+		self.slab = slab
+
+	def write(self, frame = None, boundingBoxes = None, names = None, augmentationType = None, origin = None, extension = None):
+		# The frame is copied because the caller keeps modifying it and a
+		# multiprocessing.Queue pickles it later, in another thread.
+		if (boundingBoxes is None):
+			boundingBoxes = []
+		if ((self.slab != None) and self.slab.fits(frame = frame)):
+			frame = self.slab.put(frame = frame)
+		else:
+			frame = frame.copy()
+		self.queue.put(AugmentedSample(frame = frame,
+																	boundingBoxes = np.array(boundingBoxes, dtype = np.int32).reshape(-1, 4),
+																	names = [] if (names is None) else list(names)))
+
+	def shard(self, index = None):
+		return self
+
+	def close(self):
+		pass
@@ -0,0 +1,47 @@
+"""
+package: Images2Dataset
+class: DatasetSinkMethods
+Author: Rodrigo Loza
+Description: Methods of the sinks that store the samples produced by
+the dataset methods (data augmentation, reduction by rois).
+"""
+# Libraries
+from interface import Interface
+
+class DatasetSinkMethods(Interface):
+
+	def write(self, frame = None, boundingBoxes = None, names = None, augmentationType = None, origin = None, extension = None):
+		"""
+		Stores a sample.
+		Args:
+			frame: A tensor that contains an image.
+			boundingBoxes: A list of lists that contains the coordinates of the bounding boxes.
+			names: A list of strings parallel to boundingBoxes.
+			augmentationType: A string that contains the type of augmentation.
+			origin: A string that contains the path to the original image.
+			extension: A string that contains the extension of the original image.
+		Returns:
+			None
+		"""
+		pass
+
+	def shard(self, index = None):
+		"""
+		Creates the sink used by a worker process. The sink is pickled and sent
+		to the worker, so it must not hold open files before the first write.
+		Args:
+			index: An int that identifies the worker task.
+		Returns:
+			A sink that implements DatasetSinkMethods.
+		"""
+		pass
+
+	def close(self):
+		"""
+		Stores the samples that are pending and releases the resources of the sink.
+		Args:
+			None
+		Returns:
+			None
+		"""
+		pass
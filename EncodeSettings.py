@@ -0,0 +1,130 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: The format and the quality the images produced by the
+dataset methods are encoded with.
+"""
+import io
+import numpy as np
+
+try:
+	from .LazyImport import lazyImport
+except:
+	from LazyImport import lazyImport
+cv2 = lazyImport("cv2")
+
+# Formats an image can be encoded with. ".npy" writes the raw tensor, it is
+# lossless and it does not compress.
+encodeFormats = [".jpg", ".png", ".webp", ".npy"]
+
+class EncodeSettings(object):
+	def __init__(self, imageFormat = None, jpegQuality = None, pngCompression = None, webpQuality = None):
+		"""
+		Settings of the encoder. The parameters that are None keep the defaults of
+		cv2.imwrite.
+		Args:
+			imageFormat: A string in encodeFormats. If None, every image is encoded
+										with the format of its original image.
+			jpegQuality: An int in the range [0-100].
+			pngCompression: An int in the range [0-9]. 0 does not compress, 9 is the
+											slowest and smallest.
+			webpQuality: An int in the range [1-100]. Bigger than 100 is lossless.
+		Returns:
+			None
+		"""
+		super(EncodeSettings, self).__init__()
+		# Assertions
+		if ((imageFormat != None) and (not (imageFormat in encodeFormats))):
+			raise ValueError("ERROR: imageFormat parameter must be one of {}.".format(encodeFormats))
+		for name, value in [("jpegQuality", jpegQuality), ("pngCompression", pngCompression), \
+												("webpQuality", webpQuality)]:
+			if ((value != None) and (type(value) != int)):
+				raise TypeError("ERROR: {} parameter must be of type int.".format(name))
+		if ((jpegQuality != None) and ((jpegQuality < 0) or (jpegQuality > 100))):
+			raise ValueError("ERROR: jpegQuality parameter must be in the range [0-100].")
+		if ((pngCompression != None) and ((pngCompression < 0) or (pngCompression > 9))):
+			raise ValueError("ERROR: pngCompression parameter must be in the range [0-9].")
+		if ((webpQuality != None) and (webpQuality < 1)):
+			raise ValueError("ERROR: webpQuality parameter must be greater than 0.")
+		# Class variables
+		self.imageFormat = imageFormat
+		self.jpegQuality = jpegQuality
+		self.pngCompression = pngCompression
+		self.webpQuality = webpQuality
+
+	@property
+	def propertyImageFormat(self):
+		return self.imageFormat
+
+	def extension(self, extension = None):
+		"""
+		Returns the extension of the output of an image.
+		Args:
+			extension: A string that contains the extension of the original image.
+		Returns:
+			A string.
+		"""
+		if (self.imageFormat != None):
+			return self.imageFormat
+		return extension
+
+	def parameters(self, extension = None):
+		"""
+		Returns the parameters of cv2.imwrite and cv2.imencode for a format.
+		Args:
+			extension: A string that contains the extension of the output.
+		Returns:
+			A list of ints.
+		"""
+		if ((extension == ".jpg") and (self.jpegQuality != None)):
+			return [cv2.IMWRITE_JPEG_QUALITY, int(self.jpegQuality)]
+		if ((extension == ".png") and (self.pngCompression != None)):
+			return [cv2.IMWRITE_PNG_COMPRESSION, int(self.pngCompression)]
+		if ((extension == ".webp") and (self.webpQuality != None)):
+			return [cv2.IMWRITE_WEBP_QUALITY, int(self.webpQuality)]
+		return []
+
+	def encode(self, frame = None, extension = None):
+		"""
+		Encodes an image in memory.
+		Args:
+			frame: A tensor that contains an image.
+			extension: A string that contains the extension of the output.
+		Returns:
+			An array of bytes.
+		"""
+		if (extension == ".npy"):
+			buffer = io.BytesIO()
+			np.save(buffer, frame)
+			return np.frombuffer(buffer.getvalue(), dtype = np.uint8)
+		success, encoded = cv2.imencode(extension, frame, self.parameters(extension = extension))
+		if (not success):
+			raise Exception("ERROR: Image could not be encoded as {}.".format(extension))
+		return encoded.reshape(-1)
+
+	def write(self, frame = None, path = None):
+		"""
+		Writes an image. The format is the extension of the path.
+		Args:
+			frame: A tensor that contains an image.
+			path: A string that contains the path of the output.
+		Returns:
+			None
+		"""
+		if (path.endswith(".npy")):
+			np.save(path, frame)
+		else:
+			cv2.imwrite(path, frame, self.parameters(extension = "." + path.split(".")[-1]))
+
+def decodeImage(encoded = None):
+	"""
+	Decodes an image encoded by EncodeSettings.encode.
+	Args:
+		encoded: An array of bytes.
+	Returns:
+		A tensor that contains the image.
+	"""
+	encoded = np.asarray(encoded)
+	if (bytes(encoded[:6]) == b"\x93NUMPY"):
+		return np.load(io.BytesIO(encoded.tobytes()))
+	return cv2.imdecode(encoded, cv2.IMREAD_UNCHANGED)
@@ -0,0 +1,66 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Compares the throughput and the size of the output of the
+encode settings on the sample images of the repository.
+Usage: python EncodeSettings_benchmark.py --repeat 3
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import cv2
+from EncodeSettings import *
+
+# Modes of the benchmark: name, format and settings.
+modes = [("png (cv2 default)", ".png", EncodeSettings()),
+				("png compression 0", ".png", EncodeSettings(pngCompression = 0)),
+				("png compression 1", ".png", EncodeSettings(pngCompression = 1)),
+				("png compression 9", ".png", EncodeSettings(pngCompression = 9)),
+				("jpg quality 95", ".jpg", EncodeSettings(jpegQuality = 95)),
+				("jpg quality 75", ".jpg", EncodeSettings(jpegQuality = 75)),
+				("webp quality 80", ".webp", EncodeSettings(webpQuality = 80)),
+				("webp lossless", ".webp", EncodeSettings(webpQuality = 101)),
+				("raw npy", ".npy", EncodeSettings())]
+
+def timeMode(frames = None, extension = None, settings = None, directory = None, repeat = None):
+	"""
+	Writes every frame repeat times.
+	Args:
+		frames: A list of tensors.
+		extension: A string with the format.
+		settings: An EncodeSettings.
+		directory: A string that contains the path to a directory.
+		repeat: An int.
+	Returns:
+		A tuple with the seconds and the bytes written.
+	"""
+	start = time.perf_counter()
+	for i in range(repeat):
+		for j, frame in enumerate(frames):
+			settings.write(frame = frame, path = os.path.join(directory, "{}{}".format(j, extension)))
+	seconds = time.perf_counter() - start
+	size = sum([os.path.getsize(os.path.join(directory, "{}{}".format(j, extension))) for j in range(len(frames))])
+	return seconds, size * repeat
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--images", type = str, default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"))
+	parser.add_argument("--repeat", type = int, default = 1)
+	args = parser.parse_args()
+	frames = [cv2.imread(os.path.join(args.images, each)) for each in sorted(os.listdir(args.images))]
+	frames = [frame for frame in frames if (frame is not None)]
+	pixels = sum([frame.shape[0] * frame.shape[1] for frame in frames]) * args.repeat
+	directory = tempfile.mkdtemp()
+	try:
+		print("{} images, {:.1f} megapixels per pass".format(len(frames), pixels / args.repeat / 1e6))
+		print("{:<20} {:>10} {:>10} {:>12}".format("mode", "images/s", "MP/s", "KB/image"))
+		for name, extension, settings in modes:
+			seconds, size = timeMode(frames = frames, extension = extension, settings = settings, \
+															directory = directory, repeat = args.repeat)
+			count = len(frames) * args.repeat
+			print("{:<20} {:>10.1f} {:>10.1f} {:>12.1f}".format(name, count / seconds, pixels / seconds / 1e6, \
+																												size / count / 1024))
+	finally:
+		shutil.rmtree(directory)
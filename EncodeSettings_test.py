@@ -0,0 +1,63 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Unit tests for EncodeSettings.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import cv2
+from EncodeSettings import *
+from Util import *
+
+class EncodeSettings_test(unittest.TestCase):
+
+	def setUp(self):
+		self.root = tempfile.mkdtemp()
+		# A smooth image so the lossy formats are close to it.
+		x, y = np.meshgrid(np.arange(64), np.arange(48))
+		self.frame = np.stack([x * 4, y * 5, (x + y) * 2], axis = 2).astype(np.uint8)
+
+	def tearDown(self):
+		shutil.rmtree(self.root)
+
+	def test_parameters(self):
+		settings = EncodeSettings(jpegQuality = 80, pngCompression = 0)
+		self.assertEqual(settings.extension(extension = ".png"), ".png")
+		self.assertEqual(settings.parameters(extension = ".jpg"), [cv2.IMWRITE_JPEG_QUALITY, 80])
+		self.assertEqual(settings.parameters(extension = ".png"), [cv2.IMWRITE_PNG_COMPRESSION, 0])
+		self.assertEqual(settings.parameters(extension = ".webp"), [])
+		self.assertEqual(EncodeSettings(imageFormat = ".npy").extension(extension = ".png"), ".npy")
+		with self.assertRaises(ValueError):
+			EncodeSettings(imageFormat = ".bmp")
+		with self.assertRaises(ValueError):
+			EncodeSettings(pngCompression = 10)
+		with self.assertRaises(TypeError):
+			EncodeSettings(jpegQuality = "80")
+		with self.assertRaises(TypeError):
+			EncodeSettings(webpQuality = 80.5)
+
+	def test_encode(self):
+		# Lossless formats.
+		for settings, extension in [(EncodeSettings(), ".npy"), (EncodeSettings(pngCompression = 0), ".png"), \
+																(EncodeSettings(webpQuality = 101), ".webp")]:
+			decoded = decodeImage(encoded = settings.encode(frame = self.frame, extension = extension))
+			self.assertTrue(np.array_equal(decoded, self.frame))
+		# The quality of jpgs changes their size.
+		small = EncodeSettings(jpegQuality = 10).encode(frame = self.frame, extension = ".jpg")
+		large = EncodeSettings(jpegQuality = 100).encode(frame = self.frame, extension = ".jpg")
+		self.assertLess(small.size, large.size)
+		self.assertLess(np.abs(decodeImage(encoded = large).astype(int) - self.frame).max(), 8)
+
+	def test_save_img(self):
+		Util.save_img(frame = self.frame, img_name = "a.npy", output_image_directory = self.root, \
+									encode_settings = EncodeSettings())
+		self.assertTrue(np.array_equal(np.load(os.path.join(self.root, "a.npy")), self.frame))
+		Util.save_img(frame = self.frame, img_name = "a.png", output_image_directory = self.root, \
+									encode_settings = EncodeSettings(pngCompression = 9))
+		self.assertTrue(np.array_equal(cv2.imread(os.path.join(self.root, "a.png")), self.frame))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,99 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: A cache that decodes an image once and hands out
+copies of it. Used by the augmentation loops to restart a frame
+without reading and decoding the image again.
+"""
+import numpy as np
+
+try:
+	from .LazyImport import lazyImport
+except:
+	from LazyImport import lazyImport
+cv2 = lazyImport("cv2")
+
+try:
+	from .Instrumentation import instrumentation
+except:
+	from Instrumentation import instrumentation
+
+class FrameCache(object):
+	def __init__(self):
+		"""
+		Holds the decoded frame of the last image that was read. The cached
+		frame is read-only, every read returns a private copy that augmenters
+		can modify in place.
+		Args:
+			None
+		Returns:
+			None
+		"""
+		super(FrameCache, self).__init__()
+		# Class variables
+		self.path = None
+		self.frame = None
+		self.decodes = 0
+		self.reads = 0
+
+	@property
+	def propertyDecodes(self):
+		return self.decodes
+
+	@property
+	def propertyReads(self):
+		return self.reads
+
+	@property
+	def propertyDecodesSaved(self):
+		return self.reads - self.decodes
+
+	def read(self, path = None):
+		"""
+		Reads an image. The image is decoded only if it is not the one in the cache,
+		otherwise the cached frame is copied.
+		Args:
+			path: A string that contains the path to an image.
+		Returns:
+			A tensor that contains a writable copy of the image.
+		"""
+		# Assertions
+		if (path == None):
+			raise ValueError("ERROR: path parameter cannot be empty.")
+		# Logic
+		if (path != self.path):
+			with instrumentation.stage("imread") as stage:
+				frame = np.load(path) if (path.endswith(".npy")) else cv2.imread(path)
+				stage.addFileBytes(path)
+			if (frame is None):
+				raise Exception("ERROR: Image could not be read: {}".format(path))
+			frame.setflags(write = False)
+			self.path = path
+			self.frame = frame
+			self.decodes += 1
+			instrumentation.count("decodes")
+		self.reads += 1
+		instrumentation.count("frameReads")
+		return self.frame.copy()
+
+	def clear(self):
+		"""
+		Releases the cached frame. The counters are kept.
+		Args:
+			None
+		Returns:
+			None
+		"""
+		self.path = None
+		self.frame = None
+
+	def resetCounters(self):
+		"""
+		Sets the counters to zero.
+		Args:
+			None
+		Returns:
+			None
+		"""
+		self.decodes = 0
+		self.reads = 0
@@ -0,0 +1,47 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Unit tests for the FrameCache class.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import cv2
+from FrameCache import *
+
+class FrameCache_test(unittest.TestCase):
+
+	def setUp(self):
+		self.root = tempfile.mkdtemp()
+		self.imgPath = os.path.join(self.root, "frame.png")
+		self.frame = np.random.randint(0, 255, (60, 80, 3)).astype(np.uint8)
+		cv2.imwrite(self.imgPath, self.frame)
+		self.cache = FrameCache()
+
+	def tearDown(self):
+		shutil.rmtree(self.root)
+
+	def test_read_decodes_once(self):
+		for i in range(5):
+			frame = self.cache.read(path = self.imgPath)
+			self.assertTrue(np.array_equal(frame, self.frame))
+		self.assertEqual(self.cache.propertyDecodes, 1)
+		self.assertEqual(self.cache.propertyReads, 5)
+		self.assertEqual(self.cache.propertyDecodesSaved, 4)
+
+	def test_read_returns_private_copies(self):
+		frame = self.cache.read(path = self.imgPath)
+		frame[:, :, :] = 0
+		restored = self.cache.read(path = self.imgPath)
+		self.assertTrue(np.array_equal(restored, self.frame))
+
+	def test_clear(self):
+		self.cache.read(path = self.imgPath)
+		self.cache.clear()
+		self.cache.read(path = self.imgPath)
+		self.assertEqual(self.cache.propertyDecodes, 2)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -33,9 +33,14 @@ Log:
 from interface import implements
 import math
 import random
-import cv2
 import numpy as np
 
+try:
+	from .LazyImport import lazyImport
+except:
+	from LazyImport import lazyImport
+cv2 = lazyImport("cv2")
+
 try:
 	from .GeometricAugmentersMethods import *
 except:
@@ -5,24 +5,60 @@ Description: Decomposes the information contained in an image
 annotation with the VOC format.
 """
 import os
+import re
+import html
+import numpy as np
 from interface import implements
 import xml.etree.ElementTree as ET
 
+try:
+	from .Instrumentation import instrumentation
+except:
+	from Instrumentation import instrumentation
+
+# Patterns of the streaming parser.
+partPattern = re.compile(r"<part(?:\s[^>]*)?>.*?</part>", re.S)
+declarationPattern = re.compile(r"<\?xml[^>]*encoding=[\"\'](?![Uu][Tt][Ff]-?8[\"\'])")
+namePattern = re.compile(r"<object>\s*<name>([^<]*)</name>")
+bndboxPattern = re.compile(r"<bndbox>\s*<xmin>([^<]*)</xmin>\s*<ymin>([^<]*)</ymin>" +\
+														r"\s*<xmax>([^<]*)</xmax>\s*<ymax>([^<]*)</ymax>")
+coordinateTags = [("<xmin>", "</xmin>"), ("<ymin>", "</ymin>"), ("<xmax>", "</xmax>"), ("<ymax>", "</ymax>")]
+
 class ImageAnnotation(object):
-	def __init__(self, path = None):
+	def __init__(self, path = None, streaming = None):
+		"""
+		Reads an annotation with the VOC format.
+		Args:
+			path: A string that contains the path to an xml file.
+			streaming: A boolean. If True, the file is read in a single pass by
+									parseAnnotationStream without building the xml tree. Then
+									propertyObjects is None and propertyBoundingBoxes is an int32
+									numpy array of shape Nx4.
+		Returns:
+			None
+		"""
 		super(ImageAnnotation, self).__init__()
 		# Assertions
 		if (path == None):
 			raise ValueError("Path parameter cannot be empty.")
 		if (not os.path.isfile(path)):
 			raise ValueError("Path parameter does not exist: ".format(path))
+		if (streaming == None):
+			streaming = False
 		# Class variables
 		self.path = path
-		self.root = self.readImageAnnotation(self.path)
-		self.size = self.getSize(self.root)
-		self.objects = self.getObjects(self.root)
-		self.names = self.getNames(self.objects)
-		self.boundingBoxes = self.getBoundingBoxes(self.objects)
+		if (streaming == True):
+			self.root = None
+			self.objects = None
+			with instrumentation.stage("annotationParse") as stage:
+				self.size, self.names, self.boundingBoxes = parseAnnotationStream(path = self.path)
+				stage.addFileBytes(self.path)
+		else:
+			self.root = self.readImageAnnotation(self.path)
+			self.size = self.getSize(self.root)
+			self.objects = self.getObjects(self.root)
+			self.names = self.getNames(self.objects)
+			self.boundingBoxes = self.getBoundingBoxes(self.objects)
 
 	@property
 	def propertySize(self):
@@ -41,7 +77,9 @@ class ImageAnnotation(object):
 		return self.boundingBoxes
 
 	def readImageAnnotation(self, path = None):
-		tree = ET.parse(path)
+		with instrumentation.stage("annotationParse") as stage:
+			tree = ET.parse(path)
+			stage.addFileBytes(path)
 		root = tree.getroot()
 		return root
 
@@ -81,3 +119,105 @@ class ImageAnnotation(object):
 			return [height, width, depth]
 		else:
 			raise Exception("No size found in {}".format(self.path))
+
+def parseAnnotationStream(path = None):
+	"""
+	Reads the size, the names and the bounding boxes of a VOC annotation in
+	a single pass over the text of the file, without building the xml tree.
+	Files the tokenizer does not handle (comments, CDATA, attributes in the
+	object tags, encodings other than utf-8, missing or non integer values)
+	are read with parseAnnotationTree.
+	Args:
+		path: A string that contains the path to an xml file.
+	Returns:
+		A list with the size [height, width, depth], a list of strings with the
+		names of the objects and an int32 numpy array of shape Nx4 with the
+		bounding boxes [xmin, ymin, xmax, ymax].
+	"""
+	try:
+		with open(path, "rb") as f:
+			text = f.read().decode("utf-8")
+		if (("<!" in text) or ("<object " in text) or (declarationPattern.match(text) != None)):
+			return parseAnnotationTree(path = path)
+		# Size.
+		size = findElementText(text = text, tag = "<size>", end = "</size>")
+		size = [int(findElementText(text = size, tag = "<height>", end = "</height>")),
+						int(findElementText(text = size, tag = "<width>", end = "</width>")),
+						int(findElementText(text = size, tag = "<depth>", end = "</depth>"))]
+		# Objects. Annotations written by Util.save_annotation are matched with two
+		# patterns over the whole text, the others object by object.
+		count = text.count("<object>")
+		names = namePattern.findall(text)
+		coordinates = bndboxPattern.findall(text)
+		if ((len(names) != count) or (len(coordinates) != count) or ("<part" in text) \
+				or (text.count("<bndbox>") != count)):
+			names, coordinates = parseObjects(text = text)
+		names = [html.unescape(name) if ("&" in name) else name for name in names]
+		boundingBoxes = np.fromstring(" ".join([" ".join(box) for box in coordinates]), np.int32, sep = " ")
+		if (boundingBoxes.size != 4*count):
+			raise ValueError("ERROR: Bounding boxes could not be read: {}".format(path))
+	except (ValueError, TypeError, AttributeError):
+		return parseAnnotationTree(path = path)
+	if (count == 0):
+		print("WARNING: No objects found.")
+	return size, names, boundingBoxes.reshape(-1, 4)
+
+def parseObjects(text = None):
+	"""
+	Finds the name and the coordinates of every object of a VOC annotation.
+	Args:
+		text: A string that contains the xml of the annotation.
+	Returns:
+		A list of strings with the names of the objects and a list of tuples
+		of strings with the coordinates [xmin, ymin, xmax, ymax].
+	"""
+	names = []
+	coordinates = []
+	for body in text.split("<object>")[1:]:
+		body = body.partition("</object>")[0]
+		# Parts of an object have their own name and bounding box.
+		if ("<part" in body):
+			body = partPattern.sub("", body)
+		names.append(findElementText(text = body, tag = "<name>", end = "</name>"))
+		bndbox = bndboxPattern.match(body, body.find("<bndbox>"))
+		if (bndbox != None):
+			coordinates.append(bndbox.groups())
+		else:
+			bndbox = findElementText(text = body, tag = "<bndbox>", end = "</bndbox>")
+			coordinates.append(tuple([findElementText(text = bndbox, tag = tag, end = end) \
+																for tag, end in coordinateTags]))
+	return names, coordinates
+
+def findElementText(text = None, tag = None, end = None):
+	"""
+	Finds the text between the first tag and the following end tag.
+	Args:
+		text: A string.
+		tag: A string that contains the opening tag.
+		end: A string that contains the closing tag.
+	Returns:
+		A string or None if the element is not found.
+	"""
+	i = text.find(tag)
+	if (i < 0):
+		return None
+	i += len(tag)
+	j = text.find(end, i)
+	if (j < 0):
+		return None
+	return text[i:j]
+
+def parseAnnotationTree(path = None):
+	"""
+	Reads the size, the names and the bounding boxes of a VOC annotation with
+	ElementTree. Same output as parseAnnotationStream.
+	Args:
+		path: A string that contains the path to an xml file.
+	Returns:
+		A list with the size [height, width, depth], a list of strings with the
+		names of the objects and an int32 numpy array of shape Nx4 with the
+		bounding boxes [xmin, ymin, xmax, ymax].
+	"""
+	annotation = ImageAnnotation(path = path)
+	boundingBoxes = np.array(annotation.propertyBoundingBoxes, np.int32).reshape(-1, 4)
+	return annotation.propertySize, annotation.propertyNames, boundingBoxes
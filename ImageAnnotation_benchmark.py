@@ -0,0 +1,73 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Compares the time to read a synthetic corpus of VOC
+annotations with the ImageAnnotation class and with the streaming
+parser.
+Usage: python ImageAnnotation_benchmark.py --files 100000
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+from ImageAnnotation import *
+from Util import *
+
+def createCorpus(directory = None, files = None, maxObjects = None, seed = None):
+	"""
+	Writes synthetic annotations with Util.save_annotation. Every file has between
+	1 and maxObjects objects with random class names and boxes.
+	Args:
+		directory: A string that contains the path to a directory.
+		files: An int that contains the number of files.
+		maxObjects: An int that contains the maximum number of objects per file.
+		seed: An int that seeds the random generator.
+	Returns:
+		A list of strings that contains the paths to the annotations.
+	"""
+	rng = np.random.default_rng(seed)
+	paths = []
+	for i in range(files):
+		count = int(rng.integers(1, maxObjects + 1))
+		mins = rng.integers(0, 500, [count, 2])
+		boundingBoxes = np.concatenate([mins, mins + rng.integers(1, 500, [count, 2])], axis = 1)
+		path = os.path.join(directory, "{:07d}.xml".format(i))
+		Util.save_annotation(filename = "{:07d}.jpg".format(i),
+												path = "{:07d}.jpg".format(i),
+												database_name = "benchmark",
+												frame_size = (1000, 1000, 3),
+												data_augmentation_type = "Unspecified",
+												bounding_boxes = boundingBoxes.tolist(),
+												names = ["class{}".format(k) for k in rng.integers(0, 20, count)],
+												origin = "benchmark",
+												output_directory = path)
+		paths.append(path)
+	return paths
+
+def timeParser(paths = None, parse = None):
+	start = time.perf_counter()
+	for path in paths:
+		parse(path)
+	return time.perf_counter() - start
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--files", type = int, default = 100000)
+	parser.add_argument("--max_objects", type = int, default = 10)
+	parser.add_argument("--seed", type = int, default = 0)
+	args = parser.parse_args()
+	directory = tempfile.mkdtemp()
+	try:
+		print("Writing {} annotations to {}".format(args.files, directory))
+		paths = createCorpus(directory = directory, files = args.files, maxObjects = args.max_objects, seed = args.seed)
+		# Warm the page cache so both parsers read from memory.
+		timeParser(paths = paths, parse = lambda path: open(path, "rb").read())
+		tree = timeParser(paths = paths, parse = lambda path: ImageAnnotation(path = path).propertyBoundingBoxes)
+		stream = timeParser(paths = paths, parse = lambda path: parseAnnotationStream(path = path))
+		print("ImageAnnotation:       {:.2f}s {:.1f}us/file".format(tree, 1e6 * tree / args.files))
+		print("parseAnnotationStream: {:.2f}s {:.1f}us/file".format(stream, 1e6 * stream / args.files))
+		print("Speedup: {:.2f}x".format(tree / stream))
+	finally:
+		shutil.rmtree(directory)
@@ -0,0 +1,72 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Unit tests for the streaming parser of ImageAnnotation.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from ImageAnnotation import *
+from Util import *
+
+class ImageAnnotation_test(unittest.TestCase):
+
+	def setUp(self):
+		self.root = tempfile.mkdtemp()
+		self.path = os.path.join(self.root, "a.xml")
+		Util.save_annotation(filename = "a.png",
+												path = "a.png",
+												database_name = "unit_test",
+												frame_size = (100, 200, 3),
+												data_augmentation_type = "Unspecified",
+												bounding_boxes = [[1, 2, 30, 40], [5, 6, 70, 80]],
+												names = ["car", "bus"],
+												origin = "unit_test",
+												output_directory = self.path)
+
+	def tearDown(self):
+		shutil.rmtree(self.root)
+
+	def writeAnnotation(self, objects = None):
+		text = "<annotation><size><width>200</width><height>100</height><depth>3</depth></size>{}</annotation>"
+		path = os.path.join(self.root, "b.xml")
+		with open(path, "w") as f:
+			f.write(text.format(objects))
+		return path
+
+	def test_stream(self):
+		annotation = ImageAnnotation(path = self.path)
+		size, names, boundingBoxes = parseAnnotationStream(path = self.path)
+		self.assertEqual(size, annotation.propertySize)
+		self.assertEqual(names, annotation.propertyNames)
+		self.assertEqual(boundingBoxes.dtype, np.int32)
+		self.assertEqual(boundingBoxes.tolist(), annotation.propertyBoundingBoxes)
+		streamed = ImageAnnotation(path = self.path, streaming = True)
+		self.assertEqual(streamed.propertyObjects, None)
+		self.assertEqual(streamed.propertyBoundingBoxes.tolist(), annotation.propertyBoundingBoxes)
+
+	def test_streamParts(self):
+		path = self.writeAnnotation(objects = "<object><name>a &amp; b</name><part><name>head</name>" +\
+									"<bndbox><xmin>3</xmin><ymin>3</ymin><xmax>4</xmax><ymax>4</ymax></bndbox></part>" +\
+									"<bndbox><ymin>2</ymin><xmin>1</xmin><xmax>10</xmax><ymax>20</ymax></bndbox></object>")
+		size, names, boundingBoxes = parseAnnotationStream(path = path)
+		self.assertEqual(size, [100, 200, 3])
+		self.assertEqual(names, ["a & b"])
+		self.assertEqual(boundingBoxes.tolist(), [[1, 2, 10, 20]])
+
+	def test_streamFallback(self):
+		# Comments are read with ElementTree.
+		path = self.writeAnnotation(objects = "<!-- <object><name>x</name></object> --><object><name>car</name>" +\
+									"<bndbox><xmin>1</xmin><ymin>2</ymin><xmax>10</xmax><ymax>20</ymax></bndbox></object>")
+		size, names, boundingBoxes = parseAnnotationStream(path = path)
+		self.assertEqual(names, ["car"])
+		self.assertEqual(boundingBoxes.tolist(), [[1, 2, 10, 20]])
+		# No objects.
+		size, names, boundingBoxes = parseAnnotationStream(path = self.writeAnnotation(objects = ""))
+		self.assertEqual(names, [])
+		self.assertEqual(boundingBoxes.shape, (0, 4))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -7,24 +7,40 @@ useful operations with it.
 import os
 import json
 import math
+import functools
 import numpy as np
 from interface import implements
-from tqdm import tqdm
 
 try:
-	from .AugmentationConfigurationFile import *
+	from .LazyImport import lazyImport, lazyCallable
 except:
-	from AugmentationConfigurationFile import *
+	from LazyImport import lazyImport, lazyCallable
+tqdm = lazyCallable("tqdm", "tqdm")
 
 try:
-	from .ApplyAugmentation import applyBoundingBoxAugmentation, applyColorAugmentation
+	from .Util import *
 except:
-	from ApplyAugmentation import applyBoundingBoxAugmentation, applyColorAugmentation
+	from Util import *
 
 try:
-	from .Util import *
+	from .FrameCache import *
 except:
-	from Util import *
+	from FrameCache import *
+
+try:
+	from .EncodeSettings import *
+except:
+	from EncodeSettings import *
+
+try:
+	from .NameGenerator import NameGenerator, runToken
+except:
+	from NameGenerator import NameGenerator, runToken
+
+try:
+	from .Instrumentation import instrumentation
+except:
+	from Instrumentation import instrumentation
 
 class ImageDataset(object):
 	def __init__(self, imagesDirectory = None, dbName = None):
@@ -44,8 +60,13 @@ class ImageDataset(object):
 		# Class variables.
 		self.imagesDirectory = imagesDirectory
 		self.dbName = dbName
+		self.frameCache = FrameCache()
+
+	@property
+	def propertyFrameCache(self):
+		return self.frameCache
 
-	def applyDataAugmentation(self, configurationFile = None, outputImageDirectory = None, threshold = None):
+	def applyDataAugmentation(self, configurationFile = None, outputImageDirectory = None, threshold = None, encodeSettings = None, manifestPath = None):
 		"""
 		Applies one or multiple data augmentation methods to the dataset.
 		Args:
@@ -54,9 +75,21 @@ class ImageDataset(object):
 			outputImageDirectory: A string that contains the path to the directory where
 														images will be saved.
 			threshold: A float that contains a number between 0 and 1.
+			encodeSettings: An EncodeSettings with the format and the quality of the images.
+			manifestPath: A string with the path of a csv file where the name, the original
+										image and the augmentation of every image are written. If None,
+										no manifest is written. See NameGenerator.
 		Returns:
 			None
 		"""
+		try:
+			from .AugmentationConfigurationFile import AugmentationConfigurationFile
+		except:
+			from AugmentationConfigurationFile import AugmentationConfigurationFile
+		try:
+			from .WriteBehind import closeAfter
+		except:
+			from WriteBehind import closeAfter
 		# Assertions 
 		if (configurationFile == None):
 			raise FileNotFoundError("configuration file's path has not been found.")
@@ -64,8 +97,6 @@ class ImageDataset(object):
 			if (not os.path.isfile(configurationFile)):
 				raise FileNotFoundError("Path to json file ({}) does not exist."\
 													.format(configurationFile))
-		jsonConf = AugmentationConfigurationFile(file = configurationFile)
-		typeAugmentation = jsonConf.runAllAssertions()
 		if (outputImageDirectory == None):
 			outputImageDirectory = os.getcwd()
 			Util.create_folder(os.path.join(outputImageDirectory, "images"))
@@ -76,188 +107,74 @@ class ImageDataset(object):
 		if (threshold == None):
 			threshold = 0.5
 		if (type(threshold) != float):
-			raise TyperError("ERROR: threshold parameter must be of type float.")
+			raise TypeError("ERROR: threshold parameter must be of type float.")
 		if ((threshold > 1) or (threshold < 0)):
 			raise ValueError("ERROR: threshold paramater should be a number between" +\
 												" 0-1.")
-		# Load configuration data.
-		f = open(configurationFile)
-		data = json.load(f)
-		f.close()
+		if (encodeSettings == None):
+			encodeSettings = EncodeSettings()
+		# Compile the configuration file into a plan.
+		jsonConf = AugmentationConfigurationFile(file = configurationFile)
+		plan = jsonConf.compilePlan(threshold = threshold)
+		if (plan.propertyTypeAugmentation == 0):
+			raise Exception("Bounding box augmenters cannot be applied to an image dataset." +\
+											" Use geometric augmenters instead.")
+		# Every run writes its own files, as the images are augmented at random.
+		with open(configurationFile, "r") as f:
+			configuration = f.read()
+		nameGenerator = NameGenerator(prefix = self.dbName, manifestPath = manifestPath, \
+																	run = runToken(method = "aug", parameters = [configuration, threshold, \
+																																							os.urandom(8).hex()]))
 		# Iterate over the images.
-		for img in tqdm(os.listdir(self.imagesDirectory)):
-			# Get the extension.
-			extension = Util.detect_file_extension(filename = img)
-			if (extension == None):
-				raise Exception("Your image extension is not valid." +\
-												 "Only jpgs and pngs are allowed.")
-			# Extract name.
-			filename = os.path.split(img)[1].split(extension)[0]
-			# Create xml and img name.
-			imgFullPath = os.path.join(self.imagesDirectory, filename + extension)
-			# Apply augmentation.
-			if (typeAugmentation == 0):
-				raise Exception("Bounding box augmenters cannot be applied to an image dataset." +\
-												" Use geometric augmenters instead.")
-			elif (typeAugmentation == 1):
-				# Geometric data augmentations
-				for i in data["image_geometric_augmenters"]:
-					if (i == "Sequential"):
-						# Prepare data for sequence
-						frame = cv2.imread(imgFullPath)
-						# Read elements of vector
-						assert type(data["image_geometric_augmenters"][i]) == list, "Not list"
-						for k in range(len(data["image_geometric_augmenters"][i])):
-							# Extract information
-							augmentationType = list(data["image_geometric_augmenters"][i][k].keys())[0]
-							if (not jsonConf.isValidGeometricAugmentation(augmentation = augmentationType)):
-								raise Exception("ERROR: {} is not valid.".format(augmentationType))
-							parameters = data["image_geometric_augmenters"][i][k][augmentationType]
-							# Save?
-							saveParameter = jsonConf.extractSavingParameter(parameters = parameters)
-							# Apply augmentation
-							frame = applyColorAugmentation(frame = frame,
-																						augmentationType = augmentationType, #j,
-																						parameters = parameters)
-							if (saveParameter == True):
-								# Generate a new name.
-								newName = Util.create_random_name(name = self.dbName, length = 4)
-								imgName = newName + extension
-								# Save image.
-								Util.save_img(frame = frame, 
-															img_name = imgName, 
-															output_image_directory = outputImageDirectory)
-					else:
-						parameters = data["image_geometric_augmenters"][i]
-						# Save?
-						saveParameter = jsonConf.extractSavingParameter(parameters = parameters)
-						frame = applyColorAugmentation(frame = cv2.imread(imgFullPath),
-																						augmentationType = i,
-																						parameters = parameters)
-						# Save frame
-						if (saveParameter == True):
-							# Generate a new name.
-							newName = Util.create_random_name(name = self.databaseName, length = 4)
-							imgName = newName + extension
-							xmlName = newName + ".xml"
-							# Save image.
-							Util.save_img(frame = frame, 
-															img_name = imgName, 
-															output_image_directory = outputImageDirectory)
-			elif (typeAugmentation == 2):
-				# Color data augmentations
-				for i in data["image_color_augmenters"]:
-					if (i == "Sequential"):
-						# Prepare data for sequence
-						frame = cv2.imread(imgFullPath)
-						# Read elements of vector
-						assert type(data["image_color_augmenters"][i]) == list, "Not list"
-						for k in range(len(data["image_color_augmenters"][i])):
-							# Extract information
-							augmentationType = list(data["image_color_augmenters"][i][k].keys())[0]
-							if (not jsonConf.isValidColorAugmentation(augmentation = augmentationType)):
-								raise Exception("ERROR: {} is not valid.".format(augmentationType))
-							parameters = data["image_color_augmenters"][i][k][augmentationType]
-							# Save?
-							saveParameter = jsonConf.extractSavingParameter(parameters = parameters)
-							# Apply augmentation
-							frame = applyColorAugmentation(frame = frame,
-																						augmentationType = augmentationType, #j,
-																						parameters = parameters)
-							if (saveParameter == True):
-								# Generate a new name.
-								newName = Util.create_random_name(name = self.databaseName, length = 4)
-								imgName = newName + extension
-								xmlName = newName + ".xml"
-								# Save image.
-								Util.save_img(frame = frame, 
-																img_name = imgName, 
-																output_image_directory = outputImageDirectory)
-					else:
-						parameters = data["image_color_augmenters"][i]
-						# Save?
-						saveParameter = jsonConf.extractSavingParameter(parameters = parameters)
-						frame = applyColorAugmentation(frame = cv2.imread(imgFullPath),
-																						augmentationType = i,
-																						parameters = parameters)
-						# Save frame
-						if (saveParameter == True):
-							# Generate a new name.
-							newName = Util.create_random_name(name = self.databaseName, length = 4)
-							imgName = newName + extension
-							xmlName = newName + ".xml"
-							# Save image.
-							Util.save_img(frame = frame, 
-														img_name = imgName, 
-														output_image_directory = outputImageDirectory)
-			elif (typeAugmentation == 3):
-				# Assert sequential follows multiple_image_augmentations
-				if (not ("Sequential" in data["multiple_image_augmentations"])):
-					raise Exception("Data after multiple_image_augmentations is not recognized.")
-				# Multiple augmentation configurations, get a list of hash maps of all the confs.
-				list_of_augmenters_confs = data["multiple_image_augmentations"]["Sequential"]
-				# Assert list_of_augmenters_confs is a list
-				if (not (type(list_of_augmenters_confs) == list)):
-					raise TypeError("Data inside [multiple_image_augmentations][Sequential] must be a list.")
-				# Prepare data for sequence.
-				frame = cv2.imread(imgFullPath)
-				# print("\n*", list_of_augmenters_confs, "\n")
-				for k in range(len(list_of_augmenters_confs)):
-					# Get augmenter type ("image_geometric_augmenters" or "image_color_augmenters") position
-					# in the list of multiple augmentations.
-					augmentationConf = list(list_of_augmenters_confs[k].keys())[0]
-					if (not (jsonConf.isGeometricConfFile(keys = [augmentationConf]) or
-							jsonConf.isColorConfFile(keys = [augmentationConf]))):
-						raise Exception("{} is not a valid configuration.".format(augmentationConf))
-					# Get sequential information from there. This information is a list of 
-					# the types of augmenters that belong to augmentationConf.
-					list_of_augmenters_confs_types = list_of_augmenters_confs[k][augmentationConf]["Sequential"]
-					# Assert list_of_augmenters_confs is a list
-					if (not (type(list_of_augmenters_confs_types) == list)):
-						raise TypeError("Data inside [multiple_image_augmentations][Sequential][{}][Sequential] must be a list."\
-														.format(augmentationConf))
-					# Iterate over augmenters inside sequential of type.
-					for l in range(len(list_of_augmenters_confs_types)):
-						# Get augmentation type and its parameters.
-						augmentationType = list(list_of_augmenters_confs_types[l].keys())[0]
-						# Assert augmentation is valid.
-						if (not (jsonConf.isValidGeometricAugmentation(augmentation = augmentationType) or
-										jsonConf.isValidColorAugmentation(augmentation = augmentationType))):
-							raise Exception("ERROR: {} is not valid.".format(augmentationType))
-						parameters = list_of_augmenters_confs_types[l][augmentationType]
-						# Save?
-						saveParameter = jsonConf.extractSavingParameter(parameters = parameters)
-						# Restart frame to original?
-						restartFrameParameter = jsonConf.extractRestartFrameParameter(parameters = parameters)
-						# Probability of augmentation happening.
-						randomEvent = jsonConf.randomEvent(parameters = parameters, threshold = threshold)
-						# print(augmentationType, parameters)
-						# Apply augmentation.
-						if (augmentationConf == "image_color_augmenters"):
-							# print(augmentationConf, augmentationType, parameters)
-							if (randomEvent == True):
-								frame = applyColorAugmentation(frame = frame,
-																					augmentationType = augmentationType,
-																					parameters = parameters)
-						elif (augmentationConf == "image_geometric_augmenters"):
-							# print(augmentationConf, augmentationType, parameters)
-							if (randomEvent == True):
-								frame = applyGeometricAugmentation(frame = frame,
-																					augmentationType = augmentationType,
-																					parameters = parameters)
-						# Save?
-						if ((saveParameter == True) and (randomEvent == True)):
-							# Generate a new name.
-							newName = Util.create_random_name(name = self.dbName, length = 4)
-							imgName = newName + extension
-							# Save image.
-							Util.save_img(frame = frame, 
-														img_name = imgName, 
-														output_image_directory = outputImageDirectory)
-						# Restart frame?
-						if (restartFrameParameter == True):
-							frame = cv2.imread(imgFullPath)
-			else:
-				raise Exception("Type augmentation {} not valid.".format(typeAugmentation))
+		with closeAfter(nameGenerator):
+			for img in tqdm(sorted(os.listdir(self.imagesDirectory))):
+				# Get the extension.
+				extension = Util.detect_file_extension(filename = img)
+				if (extension == None):
+					raise Exception("Your image extension is not valid." +\
+													 "Only jpgs and pngs are allowed.")
+				# Extract name.
+				filename = os.path.split(img)[1].split(extension)[0]
+				# Create img name.
+				imgFullPath = os.path.join(self.imagesDirectory, filename + extension)
+				instrumentation.count("images")
+				# Apply augmentation.
+				plan.run(readFrame = functools.partial(self.frameCache.read, path = imgFullPath),
+								boundingBoxes = None,
+								save = functools.partial(self.saveImage,
+																				extension = extension,
+																				outputImageDirectory = outputImageDirectory,
+																				encodeSettings = encodeSettings,
+																				origin = imgFullPath,
+																				nameGenerator = nameGenerator),
+								cacheKey = imgFullPath)
+		# Release the last decoded frame.
+		self.frameCache.clear()
 
-		
\ No newline at end of file
+	def saveImage(self, frame = None, boundingBoxes = None, augmentationType = None, extension = None, outputImageDirectory = None, encodeSettings = None, origin = None, nameGenerator = None):
+		"""
+		Saves an augmented image with a new name.
+		Args:
+			frame: A tensor that contains an image.
+			boundingBoxes: Not used. Images of an image dataset have no annotations.
+			augmentationType: A string that contains the type of augmentation.
+			extension: A string that contains the extension of the image.
+			outputImageDirectory: A string that contains the path to the directory where
+														the image will be saved.
+			encodeSettings: An EncodeSettings or None to use the defaults of cv2.imwrite.
+			origin: A string that contains the path to the original image.
+			nameGenerator: A NameGenerator shared by the images of the run.
+		Returns:
+			None
+		"""
+		# Assertions
+		if (nameGenerator == None):
+			raise ValueError("ERROR: nameGenerator parameter cannot be empty.")
+		# Generate a new name.
+		newName = nameGenerator.next(origin = origin, augmentationType = augmentationType)
+		imgName = newName + (extension if (encodeSettings == None) else encodeSettings.extension(extension = extension))
+		# Save image.
+		Util.save_img(frame = frame,
+									img_name = imgName,
+									output_image_directory = outputImageDirectory,
+									encode_settings = encodeSettings)
@@ -1,10 +1,21 @@
+import os
+import json
+import shutil
+import tempfile
 import unittest
+import numpy as np
+import cv2
 
 try:
 	from .ImageDataset import *
 except:
 	from ImageDataset import *
 
+try:
+	from .NameGenerator import readManifest
+except:
+	from NameGenerator import readManifest
+
 class ImageDataset_test(unittest.TestCase):
 	def setUp(self):
 		self.imgs = os.path.join(os.getcwd(), "tests", "cars_dataset", "images")
@@ -22,5 +33,47 @@ class ImageDataset_test(unittest.TestCase):
 																outputImageDirectory = os.path.join(os.getcwd(), \
 														"tests", "cars_dataset", "images_single"))
 
+class ImageDatasetSynthetic_test(unittest.TestCase):
+	def setUp(self):
+		self.root = tempfile.mkdtemp()
+		self.imgs = os.path.join(self.root, "images")
+		os.mkdir(self.imgs)
+		rng = np.random.RandomState(0)
+		for i in range(2):
+			cv2.imwrite(os.path.join(self.imgs, "img{}.png".format(i)), rng.randint(0, 255, (60, 80, 3)).astype(np.uint8))
+		self.imda = ImageDataset(imagesDirectory = self.imgs, dbName = "unit_test")
+		self.confFile = os.path.join(self.root, "conf.json")
+		with open(self.confFile, "w") as f:
+			json.dump({"image_color_augmenters": {"sharpening": {"weight": 2.0, "save": True}, \
+																						"invertColor": {"CSpace": [True, True, True], "save": True}}}, f)
+
+	def tearDown(self):
+		shutil.rmtree(self.root)
+
+	def test_applyDataAugmentationEncodeSettings(self):
+		outputImageDirectory = tempfile.mkdtemp(dir = self.root)
+		self.imda.applyDataAugmentation(configurationFile = self.confFile,
+																		outputImageDirectory = outputImageDirectory,
+																		encodeSettings = EncodeSettings(imageFormat = ".jpg", jpegQuality = 90))
+		outputs = os.listdir(outputImageDirectory)
+		self.assertEqual(len(outputs), 4)
+		self.assertTrue(all([each.endswith(".jpg") for each in outputs]))
+		self.assertIsNotNone(cv2.imread(os.path.join(outputImageDirectory, outputs[0])))
+
+	def test_applyDataAugmentationManifest(self):
+		outputImageDirectory = tempfile.mkdtemp(dir = self.root)
+		manifestPath = os.path.join(self.root, "manifest.csv")
+		for i in range(2):
+			self.imda.applyDataAugmentation(configurationFile = self.confFile,
+																			outputImageDirectory = outputImageDirectory,
+																			manifestPath = manifestPath)
+		# Every run writes its own files and appends its rows to the manifest.
+		manifest = readManifest(path = manifestPath)
+		self.assertEqual(sorted(os.listdir(outputImageDirectory)), sorted([row["name"] + ".png" for row in manifest]))
+		self.assertEqual(len(manifest), 8)
+		self.assertEqual(sorted([(os.path.basename(row["origin"]), row["augmentationType"]) for row in manifest[:4]]), \
+											[("img0.png", "invertColor"), ("img0.png", "sharpening"), \
+											("img1.png", "invertColor"), ("img1.png", "sharpening")])
+
 if __name__ == "__main__":
 	unittest.main()
\ No newline at end of file
@@ -7,9 +7,20 @@ useful operations with it.
 import os
 import json
 import math
+import time
+import queue
+import functools
+import traceback
+import collections
 import numpy as np
 from interface import implements
-from tqdm import tqdm
+
+try:
+	from .LazyImport import lazyImport, lazyCallable
+except:
+	from LazyImport import lazyImport, lazyCallable
+multiprocessing = lazyImport("multiprocessing")
+tqdm = lazyCallable("tqdm", "tqdm")
 
 try:
 	from .ImageLocalizationDatasetPreprocessMethods import *
@@ -47,28 +58,80 @@ except:
 	from AssertDataTypes import *
 
 try:
-	from .AugmentationConfigurationFile import *
+	from .NameGenerator import *
+except:
+	from NameGenerator import *
+
+try:
+	from .EncodeSettings import *
+except:
+	from EncodeSettings import *
+
+try:
+	from .Instrumentation import *
 except:
-	from AugmentationConfigurationFile import *
+	from Instrumentation import *
 
 try:
-	from .ApplyAugmentation import applyBoundingBoxAugmentation, applyColorAugmentation
+	from .FrameCache import *
 except:
-	from ApplyAugmentation import applyBoundingBoxAugmentation, applyColorAugmentation
+	from FrameCache import *
 
-prep = ImagePreprocess()
-dataAssertion = AssertDataTypes()
+# The helpers of the module, created on first use so importing the module
+# does not create them. See singleton.
+moduleSingletons = {"prep": ImagePreprocess, "dataAssertion": AssertDataTypes}
+
+def singleton(name = None):
+	"""
+	Returns a helper of moduleSingletons, created on the first call.
+	Args:
+		name: A string in moduleSingletons.
+	Returns:
+		The instance of the helper.
+	"""
+	if (not (name in globals())):
+		globals()[name] = moduleSingletons[name]()
+	return globals()[name]
+
+def __getattr__(name):
+	# PEP 562: called for the names that are not defined in the module yet.
+	if (name in moduleSingletons):
+		return singleton(name = name)
+	raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+# A crop planned by ImageLocalizationDataset.planImageDataPointRois.
+# edges: A list of ints [xmin, ymin, xmax, ymax] with the region of the frame.
+# boundingBoxes: A list of lists with the bounding boxes relative to the region.
+# names: A list of strings parallel to boundingBoxes.
+RoiCrop = collections.namedtuple("RoiCrop", ["edges", "boundingBoxes", "names"])
+
+# The result of a Roi reduction.
+# crops: An int with the number of crops that were saved.
+# pixels: An int with the sum of the areas of the crops.
+# uniquePixels: An int with the area of the frames covered by the crops.
+# duplicationRatio: A float, pixels / uniquePixels. 1.0 if the crops do not overlap.
+# seconds: A float with the time spent planning and saving the crops.
+RoiReport = collections.namedtuple("RoiReport", ["crops", "pixels", "uniquePixels", \
+																"duplicationRatio", "seconds"])
+
+# Strategies to group bounding boxes into Rois.
+# corePoints: Rois centered on the boxes closest to the origin. Fast.
+# cover: A greedy set cover with few crops that overlap less. Slower.
+roiStrategies = ["corePoints", "cover"]
 
 class ImageLocalizationDataset(implements(ImageLocalizationDatasetPreprocessMethods, \
 																ImageLocalizationDatasetStatisticsMethods)):
 
-	def __init__(self, imagesDirectory = None, annotationsDirectory = None, databaseName = None):
+	def __init__(self, imagesDirectory = None, annotationsDirectory = None, databaseName = None, indexPath = None):
 		"""
 		A high level data structure used for image localization datasets.
 		Args:
 			imagesDirectory = None,
 			annotationsDirectory = None,
-			databaseName = None
+			databaseName = None,
+			indexPath: A string that contains the path where the annotation index
+									is persisted. If None, the index is kept in memory only.
+									See AnnotationIndex.
 		Returns:
 			None
 		"""
@@ -80,10 +143,58 @@ class ImageLocalizationDataset(implements(ImageLocalizationDatasetPreprocessMeth
 			raise Exception("Path to annotations does not exist.")
 		if (databaseName == None):
 			databaseName = "Unspecified"
+		try:
+			from .AnnotationIndex import AnnotationIndex
+		except:
+			from AnnotationIndex import AnnotationIndex
 		# Class variables
 		self.imagesDirectory = imagesDirectory
 		self.annotationsDirectory = annotationsDirectory
 		self.databaseName = databaseName
+		self.frameCache = FrameCache()
+		self.annotationIndex = AnnotationIndex(annotationsDirectory = annotationsDirectory,
+																					indexPath = indexPath,
+																					imagesDirectory = imagesDirectory)
+
+	@property
+	def propertyFrameCache(self):
+		return self.frameCache
+
+	@property
+	def propertyAnnotationIndex(self):
+		return self.annotationIndex
+
+	def refresh(self):
+		"""
+		Updates the annotation index with the images and annotations that were added,
+		changed or deleted since the last refresh. Only the new and changed annotations
+		are parsed.
+		Args:
+			None
+		Returns:
+			An IndexChanges that contains the names of the images and annotations
+			that were added, changed or deleted.
+		"""
+		return self.annotationIndex.refresh()
+
+	def readAnnotation(self, annotationPath = None):
+		"""
+		Reads an annotation. Annotations of the dataset are read from the annotation
+		index if their file did not change since it was indexed, other annotations
+		are parsed.
+		Args:
+			annotationPath: A string that contains the path to an xml annotation.
+		Returns:
+			A list with the size [height, width, depth], a list of strings with the
+			names of the objects and a list of lists with the bounding boxes.
+		"""
+		directory, name = os.path.split(os.path.abspath(annotationPath))
+		name = name[:-len(".xml")] if name.endswith(".xml") else None
+		if ((directory == os.path.abspath(self.annotationsDirectory)) and \
+				self.annotationIndex.isCurrent(name = name)):
+			return self.annotationIndex.find(name = name)
+		annotation = ImageAnnotation(path = annotationPath)
+		return annotation.propertySize, annotation.propertyNames, annotation.propertyBoundingBoxes
 
 	# Preprocessing.
 	def dataConsistency(self):
@@ -105,8 +216,9 @@ class ImageLocalizationDataset(implements(ImageLocalizationDatasetPreprocessMeth
 		# Local variables.
 		images = []
 		annotations = []
+		self.refresh()
 		# Preprocess images.
-		for image in tqdm(os.listdir(self.imagesDirectory)):
+		for image in self.annotationIndex.propertyImageNames:
 			# Extract name.
 			extension = Util.detect_file_extension(filename = image)
 			if (extension == None):
@@ -114,10 +226,9 @@ class ImageLocalizationDataset(implements(ImageLocalizationDatasetPreprocessMeth
 												 " Only jpgs and pngs are allowed.")
 			images.append(image.split(extension)[0])
 		# Preprocess annotations.
-		for annotation in tqdm(os.listdir(self.annotationsDirectory)):
-			if (not annotation.endswith(".xml")):
-				raise Exception("ERROR: Only xml annotations are allowed: {}".format(annotation))
-			annotations.append(annotation.split(".xml")[0])
+		for annotation in self.annotationIndex.propertyOtherFiles:
+			raise Exception("ERROR: Only xml annotations are allowed: {}".format(annotation))
+		annotations = self.annotationIndex.propertyFileNames
 		# Convert lists to sets.
 		imagesSet = set(images)
 		annotationsSet = set(annotations)
@@ -155,26 +266,35 @@ class ImageLocalizationDataset(implements(ImageLocalizationDatasetPreprocessMeth
 			removeEmpty = False
 		# Local variables
 		emptyAnnotations = []
-		files = os.listdir(self.imagesDirectory)
-		# Logic
-		for file in tqdm(files):
-			# In case a folder is found, report it.
-			if (os.path.isdir(file)):
-				continue
-			# Otherwise, continue.
+		index = self.annotationIndex
+		index.update()
+		files = index.propertyImageNames
+		# Find the annotation of every image.
+		imageFiles = []
+		positions = []
+		for file in files:
 			extension = Util.detect_file_extension(filename = file)
 			if (extension == None):
 				raise Exception("ERROR: Your image extension is not valid: {}".format(extension) +\
 												 " Only jpgs and pngs are allowed.")
 			# Extract name
 			filename = os.path.split(file)[1].split(extension)[0]
-			# Create xml and img name
-			imgFullPath = os.path.join(self.imagesDirectory, filename + extension)
-			xmlFullPath = os.path.join(self.annotationsDirectory, filename + ".xml")
-			# Create an object of ImageAnnotation.
-			annt = ImageAnnotation(path = xmlFullPath)
+			imageFiles.append(file)
+			positions.append(index.position(name = filename))
+		positions = np.array(positions, np.int64)
+		# Check all the bounding boxes at once.
+		boxes = index.propertyBoxes
+		sizes = index.propertySizes[index.propertyImageIds]
+		irregular = (boxes[:, 0] < 0) | (boxes[:, 1] < 0) | \
+								(boxes[:, 2] > sizes[:, 1]) | (boxes[:, 3] > sizes[:, 0])
+		irregularImages = np.zeros([len(index)], np.bool_)
+		irregularImages[index.propertyImageIds[irregular]] = True
+		counts = index.propertyCounts
+		# Logic
+		for file, position in zip(tqdm(imageFiles), positions):
 			# Check if it is empty.
-			if (len(annt.propertyBoundingBoxes) == 0):
+			if (counts[position] == 0):
+				xmlFullPath = os.path.join(self.annotationsDirectory, index.propertyFileNames[position] + ".xml")
 				emptyAnnotations.append(file)
 				print("WARNING: Annotation {} does not have any annotations.".format(xmlFullPath))
 				# Check if we need to remove this annotation.
@@ -182,19 +302,21 @@ class ImageLocalizationDataset(implements(ImageLocalizationDatasetPreprocessMeth
 					#os.remove(imgFullPath)
 					os.remove(xmlFullPath)
 			# Check if it is irregular
-			height, width, depth = annt.propertySize
-			for each in annt.propertyBoundingBoxes:
-				ix, iy, x, y = each
-				if (ix < 0):
-					raise ValueError("ERROR: Negative coordinate found in {}".format(file))
-				if (iy < 0):
-					raise ValueError("ERROR: Negative coordinate found in {}".format(file))
-				if (x > width):
-					raise ValueError("ERROR: Coordinate {} bigger than width {} found in {}"\
-													.format(x, width, file))
-				if (y > height):
-					raise ValueError("ERROR: Coordinate {} bigger than height {} found in {}"\
-														.format(y, height, file))
+			if (irregularImages[position]):
+				height, width, depth = index.propertySizes[position]
+				start, end = index.propertyOffsets[position], index.propertyOffsets[position+1]
+				for each in boxes[start:end]:
+					ix, iy, x, y = each
+					if (ix < 0):
+						raise ValueError("ERROR: Negative coordinate found in {}".format(file))
+					if (iy < 0):
+						raise ValueError("ERROR: Negative coordinate found in {}".format(file))
+					if (x > width):
+						raise ValueError("ERROR: Coordinate {} bigger than width {} found in {}"\
+														.format(x, width, file))
+					if (y > height):
+						raise ValueError("ERROR: Coordinate {} bigger than height {} found in {}"\
+															.format(y, height, file))
 		# Return empty annotations
 		return emptyAnnotations
 
@@ -219,124 +341,138 @@ class ImageLocalizationDataset(implements(ImageLocalizationDatasetPreprocessMeth
 			else:
 				raise TypeError("saveDataFrame must be of type bool.")
 		# Local variables
-		namesFrequency = {}
-		files = os.listdir(self.imagesDirectory)
 		columns = ["path", "name", "width", "height", "xmin", "ymin", "xmax", "ymax"]
-		paths = []
-		names = []
-		widths = []
-		heights = []
-		boundingBoxesLists = []
+		index = self.annotationIndex
+		index.update()
+		files = index.propertyImageNames
 		# Logic
-		for file in tqdm(files):
+		positions = []
+		for file in files:
 			extension = Util.detect_file_extension(filename = file)
 			if (extension == None):
 				raise Exception("ERROR: Your image extension is not valid: {}".format(extension) +\
 												 " Only jpgs and pngs are allowed.")
 			# Extract name.
 			filename = os.path.split(file)[1].split(extension)[0]
-			# Create xml and img name.
-			imgFullPath = os.path.join(self.imagesDirectory, filename + extension)
-			xmlFullPath = os.path.join(self.annotationsDirectory, filename + ".xml")
-			# Create an object of ImageAnnotation.
-			annt = ImageAnnotation(path = xmlFullPath)
-			# Check if it is empty.
-			boundingBoxes = annt.propertyBoundingBoxes
-			names = annt.propertyNames
-			height, width, depth = annt.propertySize
-			for i in range(len(names)):
-				if (not (names[i] in namesFrequency)):
-					namesFrequency[names[i]] = 0
-				else:
-					namesFrequency[names[i]] += 1
-				paths.append(file)
-				names.append(names[i])
-				widths.append(width)
-				heights.append(height)
-				boundingBoxesLists.append(boundingBoxes[i])
+			positions.append(index.position(name = filename))
+		positions = np.array(positions, np.int64)
+		# Select the bounding boxes of the images.
+		counts = index.propertyCounts[positions]
+		boxIndices = np.concatenate([np.arange(index.propertyOffsets[p], index.propertyOffsets[p+1]) \
+																for p in positions] + [np.zeros([0], np.int64)])
+		classIds = index.propertyClassIds[boxIndices]
+		frequencies = np.bincount(classIds, minlength = len(index.propertyClassNames))
+		namesFrequency = {index.propertyClassNames[i]: int(frequencies[i]) \
+											for i in range(len(frequencies)) if (frequencies[i] > 0)}
 		# Print stats
-		print("Total number of bounding boxes: {}"\
-						.format(sum([i for i in namesFrequency.values()])))
+		print("Total number of bounding boxes: {}".format(len(boxIndices)))
 		print("Unique classes: {}".format(namesFrequency))
 		# Save data?
 		if (saveDataFrame):
+			sizes = index.propertySizes[positions]
+			boxes = index.propertyBoxes[boxIndices]
 			Util.save_lists_in_dataframe(columns = columns,
-									data = [paths, names, widths, heights, boundingBoxesLists],
+									data = [list(np.repeat(np.array(files, dtype = object), counts)),
+													[index.propertyClassNames[i] for i in classIds],
+													np.repeat(sizes[:, 1], counts).tolist(),
+													np.repeat(sizes[:, 0], counts).tolist(),
+													boxes[:, 0].tolist(), boxes[:, 1].tolist(),
+													boxes[:, 2].tolist(), boxes[:, 3].tolist()],
 									output_directory = outputDirDataFrame)
 
 	# Save bounding boxes as files.
-	def saveBoundingBoxes(self, outputDirectory = None, filterClasses = None):
+	def saveBoundingBoxes(self, outputDirectory = None, filterClasses = None, encodeSettings = None, manifestPath = None):
 		"""
 		Saves the bounding boxes as images of each image in the dataset.
 		Args:
 			outputDirectory: A string that contains the directory where the images will be saved.
 			filterClasses: A list of Strings that contains names of the classes to be filtered and saved.
+			encodeSettings: An EncodeSettings with the format and the quality of the images.
+			manifestPath: A string with the path of a csv file where the name and the
+										original image of every crop are written. If None, no manifest
+										is written. See NameGenerator.
 		Returns:
 			None
 		"""
+		try:
+			from .WriteBehind import WriteBehindQueue, closeAfter
+		except:
+			from WriteBehind import WriteBehindQueue, closeAfter
+		try:
+			from .TiledImage import openImage
+		except:
+			from TiledImage import openImage
 		# Assertions
 		if (outputDirectory == None):
 			raise ValueError("outputDirectory cannot be empty")
 		if (type(outputDirectory) != str):
-			raise TyperError("outputDirectory must be a string.")
+			raise TypeError("outputDirectory must be a string.")
 		if (not (os.path.isdir(outputDirectory))):
 			raise FileNotFoundError("outputDirectory's path does not exist: ".format(outputDirectory))
 		if (filterClasses == None):
 			filterClasses = []
 		if (type(filterClasses) != list):
-			raise TyperError("filterClasses must be of type list.")
+			raise TypeError("filterClasses must be of type list.")
+		if (encodeSettings == None):
+			encodeSettings = EncodeSettings()
+		# Crops of other runs in the same directory are not overwritten.
+		nameGenerator = NameGenerator(prefix = self.databaseName, manifestPath = manifestPath, \
+																	run = runToken(method = "bndbox", parameters = [sorted(filterClasses)]))
 		# Local variables
-		images = [os.path.join(self.imagesDirectory, i) for i in os.listdir(self.imagesDirectory)]
-		# Logic
-		for img in tqdm(images):
-			# Get extension
-			extension = Util.detect_file_extension(filename = img)
-			if (extension == None):
-				raise Exception("ERROR: Your image extension is not valid." +\
-												 "Only jpgs and pngs are allowed.")
-			# Extract name
-			filename = os.path.split(img)[1].split(extension)[0]
-			# Create xml and img name
-			imgFullPath = os.path.join(self.imagesDirectory, filename + extension)
-			xmlFullPath = os.path.join(self.annotationsDirectory, filename + ".xml")
-			# Load annotation.
-			annt = ImageAnnotation(path = xmlFullPath)
-			# Get bounding boxes.
-			boundingBoxes = annt.propertyBoundingBoxes
-			names = annt.propertyNames
-			# Save image.
-			frame = cv2.imread(img)
-			# Save bounding boxes as png images.
-			for name, boundingBox in zip(names, boundingBoxes):
-				if ((len(filterClasses) == 0) or (name in filterClasses)):
-					ix, iy, x, y = boundingBox
-					# Detect extension.
-					extension = Util.detect_file_extension(filename = img)
-					if (extension == None):
-						raise Exception("Your image extension is not valid. " +\
-														"Only jpgs and pngs are allowed. {}".format(extension))
-					# Generate a new name.
-					newName = Util.create_random_name(name = self.databaseName, length = 4)
-					imgName = newName + extension
-					# Check bounding box does not get out of boundaries.
-					if (x == frame.shape[1]):
-						x -= 1
-					if (y == frame.shape[0]):
-						y -= 1
-					# Check bounding boxes are ok.
-					if (((y-iy) == 0) or ((x - ix) == 0) or \
-							((ix < 0) or (iy < 0)) or \
-							((x > frame.shape[1]) or (y > frame.shape[0]))):
-						print(img)
-						print(ix, iy, x, y)
-						raise Exception("Bounding box does not exist.")
-					# Save image.
-					Util.save_img(frame = frame[iy:y, ix:x, :],
-																						img_name = imgName,
-																						output_image_directory = outputDirectory)
+		self.annotationIndex.update()
+		images = [os.path.join(self.imagesDirectory, i) for i in self.annotationIndex.propertyImageNames]
+		# Logic. The crops are written by a pool of threads.
+		writeQueue = WriteBehindQueue()
+		with closeAfter(writeQueue, nameGenerator):
+			for img in tqdm(images):
+				# Get extension
+				extension = Util.detect_file_extension(filename = img)
+				if (extension == None):
+					raise Exception("ERROR: Your image extension is not valid." +\
+													 "Only jpgs and pngs are allowed.")
+				# Extract name
+				filename = os.path.split(img)[1].split(extension)[0]
+				# Create xml and img name
+				imgFullPath = os.path.join(self.imagesDirectory, filename + extension)
+				xmlFullPath = os.path.join(self.annotationsDirectory, filename + ".xml")
+				# Load annotation.
+				size, names, boundingBoxes = self.readAnnotation(annotationPath = xmlFullPath)
+				# Only the regions of the bounding boxes are read from tiled images.
+				with openImage(path = img) as image:
+					frameHeight, frameWidth = image.propertyShape[:2]
+					# Save bounding boxes as png images.
+					for name, boundingBox in zip(names, boundingBoxes):
+						if ((len(filterClasses) == 0) or (name in filterClasses)):
+							ix, iy, x, y = boundingBox
+							# Detect extension.
+							extension = Util.detect_file_extension(filename = img)
+							if (extension == None):
+								raise Exception("Your image extension is not valid. " +\
+																"Only jpgs and pngs are allowed. {}".format(extension))
+							# Generate a new name.
+							newName = nameGenerator.next(origin = img, augmentationType = "Unspecified")
+							imgName = newName + encodeSettings.extension(extension = extension)
+							# Check bounding box does not get out of boundaries.
+							if (x == frameWidth):
+								x -= 1
+							if (y == frameHeight):
+								y -= 1
+							# Check bounding boxes are ok.
+							if (((y-iy) == 0) or ((x - ix) == 0) or \
+									((ix < 0) or (iy < 0)) or \
+									((x > frameWidth) or (y > frameHeight))):
+								print(img)
+								print(ix, iy, x, y)
+								raise Exception("Bounding box does not exist.")
+							# Save image.
+							writeQueue.submit(function = Util.save_img,
+													frame = image.readRegion(ix = ix, iy = iy, x = x, y = y),
+													img_name = imgName,
+													output_image_directory = outputDirectory,
+													encode_settings = encodeSettings)
 
 	# Reduce and data augmentation.
-	def reduceDatasetByRois(self, offset = None, outputImageDirectory = None, outputAnnotationDirectory = None):
+	def reduceDatasetByRois(self, offset = None, outputImageDirectory = None, outputAnnotationDirectory = None, strategy = None, sink = None, encodeSettings = None, manifestPath = None):
 		"""
 		Reduce that images of a dataset by grouping its bounding box annotations and
 		creating smaller images that contain them.
@@ -347,12 +483,79 @@ class ImageLocalizationDataset(implements(ImageLocalizationDatasetPreprocessMeth
 														where the images will be stored.  
 			outputAnnotationDirectory: A string that contains the path to the directory
 																where the annotations will be stored. 
+			strategy: A string in roiStrategies. Default is "corePoints".
+			sink: An object that implements DatasetSinkMethods where the crops are stored,
+						for example a PackedDatasetWriter. Default is a DirectorySink with the
+						output directories. The sink is closed at the end.
+			encodeSettings: An EncodeSettings with the format and the quality of the crops
+											saved by the default sink. Other sinks take their own.
+			manifestPath: A string with the path of a csv file where the default sink
+										writes the name, the original image and the augmentation of
+										every output. If None, no manifest is written. See NameGenerator.
 		Returns:
-			None
+			A RoiReport of the whole dataset.
 		"""
+		try:
+			from .WriteBehind import closeAfter
+		except:
+			from WriteBehind import closeAfter
 		# Assertions
 		if (offset == None):
 			raise ValueError("Offset parameter cannot be empty.")
+		if (sink == None):
+			sink = self.createDirectorySink(outputImageDirectory = outputImageDirectory,
+																			outputAnnotationDirectory = outputAnnotationDirectory,
+																			encodeSettings = encodeSettings,
+																			manifestPath = manifestPath,
+																			run = roiRunToken(offset = offset, strategy = strategy))
+		elif ((encodeSettings != None) or (manifestPath != None)):
+			raise ValueError("ERROR: encodeSettings and manifestPath parameters are for the default sink, pass them to the sink.")
+		# Get images and annotations full paths
+		self.annotationIndex.update()
+		imagesPath = [os.path.join(self.imagesDirectory, each) for each in \
+									self.annotationIndex.propertyImageNames]
+		reports = []
+		with closeAfter(sink):
+			for img in tqdm(imagesPath):
+				# Get extension
+				extension = Util.detect_file_extension(filename = img)
+				if (extension == None):
+					raise Exception("Your image extension is not valid." +\
+													 "Only jpgs and pngs are allowed.")
+				# Extract name
+				filename = os.path.split(img)[1].split(extension)[0]
+				# Create xml and img name
+				imgFullPath = os.path.join(self.imagesDirectory, filename + extension)
+				xmlFullPath = os.path.join(self.annotationsDirectory, filename + ".xml")
+				reports.append(self.reduceImageDataPointByRoi(imagePath = imgFullPath, 
+																				annotationPath = xmlFullPath,
+																				offset = offset,
+																				strategy = strategy,
+																				sink = sink))
+		return createRoiReport(crops = sum([report.crops for report in reports]),
+													pixels = sum([report.pixels for report in reports]),
+													uniquePixels = sum([report.uniquePixels for report in reports]),
+													seconds = sum([report.seconds for report in reports]))
+
+	def createDirectorySink(self, outputImageDirectory = None, outputAnnotationDirectory = None, encodeSettings = None, run = None, manifestPath = None):
+		"""
+		Creates the default sink of the dataset methods. If a directory is None, a
+		folder is created in the current working directory.
+		Args:
+			outputImageDirectory: A string that contains the path to the directory
+														where the images will be stored.
+			outputAnnotationDirectory: A string that contains the path to the directory
+																where the annotations will be stored.
+			encodeSettings: An EncodeSettings or None.
+			run: A string returned by runToken that goes in the names of the files.
+			manifestPath: A string with the path of the manifest of the names or None.
+		Returns:
+			A DirectorySink.
+		"""
+		try:
+			from .DatasetSink import DirectorySink
+		except:
+			from DatasetSink import DirectorySink
 		if (outputImageDirectory == None):
 			outputImageDirectory = os.getcwd()
 			Util.create_folder(os.path.join(outputImageDirectory, "images"))
@@ -368,28 +571,14 @@ class ImageLocalizationDataset(implements(ImageLocalizationDatasetPreprocessMeth
 		if (not (os.path.isdir(outputAnnotationDirectory))):
 			raise Exception("Path to output annotation directory does not exist. {}"\
 											.format(outputAnnotationDirectory))
-		# Get images and annotations full paths
-		imagesPath = [os.path.join(self.imagesDirectory, each) for each in \
-									os.listdir(self.imagesDirectory)]
-		for img in tqdm(imagesPath):
-			#print(img)
-			# Get extension
-			extension = Util.detect_file_extension(filename = img)
-			if (extension == None):
-				raise Exception("Your image extension is not valid." +\
-												 "Only jpgs and pngs are allowed.")
-			# Extract name
-			filename = os.path.split(img)[1].split(extension)[0]
-			# Create xml and img name
-			imgFullPath = os.path.join(self.imagesDirectory, filename + extension)
-			xmlFullPath = os.path.join(self.annotationsDirectory, filename + ".xml")
-			self.reduceImageDataPointByRoi(imagePath = imgFullPath, 
-																			annotationPath = xmlFullPath,
-																			offset = offset,
-																			outputImageDirectory = outputImageDirectory, 
-																			outputAnnotationDirectory = outputAnnotationDirectory)
+		return DirectorySink(outputImageDirectory = outputImageDirectory,
+												outputAnnotationDirectory = outputAnnotationDirectory,
+												databaseName = self.databaseName,
+												encodeSettings = encodeSettings,
+												nameGenerator = NameGenerator(prefix = self.databaseName, manifestPath = manifestPath, \
+																											run = run))
 
-	def reduceImageDataPointByRoi(self, imagePath = None, annotationPath = None, offset = None, outputImageDirectory = None, outputAnnotationDirectory = None):
+	def reduceImageDataPointByRoi(self, imagePath = None, annotationPath = None, offset = None, outputImageDirectory = None, outputAnnotationDirectory = None, strategy = None, sink = None, encodeSettings = None, manifestPath = None):
 		"""
 		Group an image's bounding boxes into Rois and create smaller images.
 		Args:
@@ -400,8 +589,17 @@ class ImageLocalizationDataset(implements(ImageLocalizationDatasetPreprocessMeth
 														will be stored.
 			outputAnnotationDirectory: A string that contains the path where the annotations
 																will be stored.
+			strategy: A string in roiStrategies. Default is "corePoints".
+			sink: An object that implements DatasetSinkMethods where the crops are stored.
+						If None, the crops are saved in the output directories. A sink that
+						is passed is not closed.
+			encodeSettings: An EncodeSettings with the format and the quality of the crops
+											saved in the output directories.
+			manifestPath: A string with the path of a csv file where the name of every
+										crop saved in the output directories is written. If None, no
+										manifest is written.
 		Returns:
-			None
+			A RoiReport.
 		Example:
 			Given an image and its bounding boxes, create ROIs of size offset
 			that enclose the maximum possible amount of bounding boxes. 
@@ -427,6 +625,18 @@ class ImageLocalizationDataset(implements(ImageLocalizationDatasetPreprocessMeth
 				---------------------------------      ---------------------------------
 		Then, the rois are saved with their respective annotations.
 		""" 
+		try:
+			from .DatasetSink import DirectorySink
+		except:
+			from DatasetSink import DirectorySink
+		try:
+			from .WriteBehind import closeAfter
+		except:
+			from WriteBehind import closeAfter
+		try:
+			from .TiledImage import openImage
+		except:
+			from TiledImage import openImage
 		# Assertions
 		if (imagePath == None):
 			raise ValueError("ERROR: Path to imagePath parameter cannot be empty.")
@@ -438,101 +648,103 @@ class ImageLocalizationDataset(implements(ImageLocalizationDatasetPreprocessMeth
 			raise ValueError("ERROR: Path to annotation does not exist {}.".format(annotationPath))
 		if (offset == None):
 			raise ValueError("ERROR: Offset parameter cannot be empty.")
-		if (not (os.path.isdir(outputImageDirectory))):
-			raise ValueError("ERROR: Output image directory does not exist.")
-		if (not (os.path.isdir(outputAnnotationDirectory))):
-			raise ValueError("ERROR: Output annotation directory does not exist.")
-		# Load image annotation.
-		annotation = ImageAnnotation(path = annotationPath)
-		height, width, depth = annotation.propertySize
-		names = annotation.propertyNames
-		objects = annotation.propertyObjects
-		boundingBoxes = annotation.propertyBoundingBoxes
-		# Create a list of classes with the annotations.
-		annotations = []
-		index = 0
-		for boundingBox, name in zip(boundingBoxes, names):
-			# Compute the module
-			ix, iy, x, y = boundingBox
-			module = VectorOperations.compute_module(vector = [ix, iy])
-			annotations.append(Annotation(name = name, bndbox = boundingBox, \
-																		module = module, corePoint = True))
-			index += 1
-
-		# Sort the list of Annotations by its module from lowest to highest.
-		for i in range(len(annotations)):
-			for j in range(len(annotations)-1):
-				module0 = annotations[j].propertyModule
-				module1 = annotations[j+1].propertyModule
-				if (module0 >= module1):
-					# Swap Annotation
-					aux = annotations[j+1]
-					annotations[j+1] = annotations[j]
-					annotations[j] = aux
-
-		# Debug
-		# for each in annotations:
-		#   print(each.propertyName, each.propertyModule)
-		# print("\n")
-
-		# Work on the points.
-		for i in range(len(annotations)):
-			# Ignore non-core points.
-			if (annotations[i].propertyCorePoint == False):
-				pass
-			else:
-				# Center the core point in an allowed image space.
-				RoiXMin, RoiYMin, \
-				RoiXMax, RoiYMax = prep.adjustImage(frameHeight = height,
+		closeSink = (sink == None)
+		if (sink == None):
+			if (not (os.path.isdir(outputImageDirectory))):
+				raise ValueError("ERROR: Output image directory does not exist.")
+			if (not (os.path.isdir(outputAnnotationDirectory))):
+				raise ValueError("ERROR: Output annotation directory does not exist.")
+			sink = DirectorySink(outputImageDirectory = outputImageDirectory,
+													outputAnnotationDirectory = outputAnnotationDirectory,
+													databaseName = self.databaseName,
+													encodeSettings = encodeSettings,
+													nameGenerator = NameGenerator(prefix = self.databaseName, manifestPath = manifestPath, \
+																											run = roiRunToken(offset = offset, strategy = strategy)))
+		elif ((encodeSettings != None) or (manifestPath != None)):
+			raise ValueError("ERROR: encodeSettings and manifestPath parameters are for the default sink, pass them to the sink.")
+		if (strategy == None):
+			strategy = "corePoints"
+		if (not (strategy in roiStrategies)):
+			raise ValueError("ERROR: strategy parameter must be one of {}.".format(roiStrategies))
+		extension = Util.detect_file_extension(filename = imagePath)
+		if (extension == None):
+			raise Exception("Your image extension is not valid. " +\
+											"Only jpgs and pngs are allowed. {}".format(extension))
+		start = time.perf_counter()
+		instrumentation.count("images")
+		# Plan the crops from the annotation.
+		size, names, boundingBoxes = self.readAnnotation(annotationPath = annotationPath)
+		rois = self.planImageDataPointRois(size = size,
+																			names = names,
+																			boundingBoxes = boundingBoxes,
+																			offset = offset,
+																			strategy = strategy)
+		report = createRoiReport(crops = len(rois),
+														pixels = sum([(x - ix)*(y - iy) for ix, iy, x, y in [roi.edges for roi in rois]]),
+														uniquePixels = unionArea(rectangles = [roi.edges for roi in rois]),
+														seconds = 0)
+		if (len(rois) == 0):
+			return report._replace(seconds = time.perf_counter() - start)
+		# Decode the image once and save every crop. Uncompressed TIFF images are
+		# not decoded, only the tiles of the crops are read.
+		with closeAfter(*([sink] if closeSink else [])):
+			with openImage(path = imagePath) as image:
+				for roi in rois:
+					RoiXMin, RoiYMin, RoiXMax, RoiYMax = roi.edges
+					crop = image.readRegion(ix = RoiXMin, iy = RoiYMin, x = RoiXMax, y = RoiYMax)
+					sink.write(frame = crop,
+										boundingBoxes = roi.boundingBoxes,
+										names = roi.names,
+										augmentationType = "Unspecified",
+										origin = imagePath,
+										extension = extension)
+		return report._replace(seconds = time.perf_counter() - start)
+
+	def planImageDataPointRois(self, size = None, names = None, boundingBoxes = None, offset = None, strategy = None):
+		"""
+		Groups the bounding boxes of an image into Rois of size offset. Only the
+		annotation is needed, the image is not read.
+		Args:
+			size: A list of ints [height, width, depth] with the size of the image.
+			names: A list of strings that contains the names of the bounding boxes.
+			boundingBoxes: A list of lists that contains the bounding boxes.
+			offset: An int that contains the offset.
+			strategy: A string in roiStrategies. Default is "corePoints".
+		Returns:
+			A list of RoiCrop in the order they are created.
+		"""
+		if (strategy == None):
+			strategy = "corePoints"
+		height, width, depth = size
+		rois = []
+		if (len(boundingBoxes) == 0):
+			return rois
+		boxes = np.array(boundingBoxes, np.int64).reshape(-1, 4)
+		if (strategy == "cover"):
+			group = singleton(name = "prep").coverBoundingBoxes
+		elif (strategy == "corePoints"):
+			group = singleton(name = "prep").groupBoundingBoxes
+		else:
+			raise ValueError("ERROR: strategy parameter must be one of {}.".format(roiStrategies))
+		for edges, indices in group(frameHeight = height,
 																frameWidth = width,
-																boundingBoxes = [annotations[i].propertyBndbox],
-																offset = offset)
-				# Find the annotations that can be included in the allowed image space.
-				for j in range(len(annotations)):
-					# Get bounding box.
-					ix, iy, x, y = annotations[j].propertyBndbox
-					# Check current bounding box is inside the allowed space.
-					if ((ix >= RoiXMin) and (x <= RoiXMax)) and \
-							((iy >= RoiYMin) and (y <= RoiYMax)):
-							# Disable point from being a core point. Check it is not the 
-							# current point of reference.
-							if (not (annotations[i].propertyBndbox == annotations[j].propertyBndbox)):
-								annotations[j].propertyCorePoint = False
-				# Include the corresponding bounding boxes in the region of interest.
-				newBoundingBoxes, \
-				newNames = prep.includeBoundingBoxes(edges = [RoiXMin, RoiYMin, RoiXMax, RoiYMax],
-																						boundingBoxes = boundingBoxes,
-																						names = names)
-				if (len(newBoundingBoxes) == 0):
-					print(boundingBoxes)
-					print(RoiXMin, RoiYMin, RoiXMax, RoiYMax)
-					raise Exception("ERROR: No bounding boxes: {}. Please report this problem.".format(imagePath))
-				# Read image.
-				frame = cv2.imread(imagePath)
-				extension = Util.detect_file_extension(filename = imagePath)
-				if (extension == None):
-					raise Exception("Your image extension is not valid. " +\
-													"Only jpgs and pngs are allowed. {}".format(extension))
-				# Generate a new name.
-				newName = Util.create_random_name(name = self.databaseName, length = 4)
-				imgName = newName + extension
-				xmlName = newName + ".xml"
-				# Save image.
-				Util.save_img(frame = frame[RoiYMin:RoiYMax, RoiXMin:RoiXMax, :],
-																					img_name = imgName,
-																					output_image_directory = outputImageDirectory)
-				# Save annotation.
-				Util.save_annotation(filename = imgName,
-													path = os.path.join(outputImageDirectory, imgName),
-													database_name = self.databaseName,
-													frame_size = frame[RoiYMin:RoiYMax, RoiXMin:RoiXMax, :].shape,
-													data_augmentation_type = "Unspecified",
-													bounding_boxes = newBoundingBoxes,
-													names = newNames,
-													origin = imagePath,
-													output_directory = os.path.join(outputAnnotationDirectory, xmlName))
-
-	def applyDataAugmentation(self, configurationFile = None, outputImageDirectory = None, outputAnnotationDirectory = None, threshold = None):
+																boundingBoxes = boxes,
+																offset = offset):
+			if (len(indices) == 0):
+				raise Exception("ERROR: No bounding boxes in the roi {}. Please report this problem."\
+												.format(edges))
+			# Include the corresponding bounding boxes in the region of interest.
+			# Boxes on the right and bottom edges are moved inside the crop.
+			RoiXMin, RoiYMin, RoiXMax, RoiYMax = edges
+			newBoundingBoxes = boxes[indices] - [RoiXMin, RoiYMin, RoiXMin, RoiYMin]
+			newBoundingBoxes[:, 2] -= (newBoundingBoxes[:, 2] == (RoiXMax - RoiXMin))
+			newBoundingBoxes[:, 3] -= (newBoundingBoxes[:, 3] == (RoiYMax - RoiYMin))
+			rois.append(RoiCrop(edges = edges,
+													boundingBoxes = newBoundingBoxes.tolist(),
+													names = [names[k] for k in indices]))
+		return rois
+
+	def applyDataAugmentation(self, configurationFile = None, outputImageDirectory = None, outputAnnotationDirectory = None, threshold = None, workers = None, seed = None, sink = None, encodeSettings = None, manifestPath = None):
 		"""
 		Applies one or multiple data augmentation methods to the dataset.
 		Args:
@@ -543,281 +755,412 @@ class ImageLocalizationDataset(implements(ImageLocalizationDatasetPreprocessMeth
 			outputAnnotationDirectory: A string that contains the path the directory where
 																annotations will be saved.
 			threshold: A float that contains a number between 0 and 1.
+			workers: An int that contains the number of processes used to augment the
+								images. Default is 1.
+			seed: An int that seeds the random generators of each image. For the same
+						seed, the output does not depend on the number of workers.
+			sink: An object that implements DatasetSinkMethods where the augmented images
+						are stored, for example a PackedDatasetWriter. Default is a DirectorySink
+						with the output directories. The sink is closed at the end.
+			encodeSettings: An EncodeSettings with the format and the quality of the images
+											saved by the default sink. Other sinks take their own.
+			manifestPath: A string with the path of a csv file where the default sink
+										writes the name, the original image and the augmentation of
+										every output. If None, no manifest is written. See NameGenerator.
 		Returns:
 			None
 		"""
+		try:
+			from .WriteBehind import closeAfter
+		except:
+			from WriteBehind import closeAfter
 		# Assertions 
+		plan = self.compileAugmentationPlan(configurationFile = configurationFile, threshold = threshold)
+		if (sink == None):
+			# Runs with other configurations do not overwrite the files, runs without
+			# seed never do.
+			with open(configurationFile, "r") as f:
+				configuration = f.read()
+			run = runToken(method = "aug", parameters = [configuration, threshold, \
+																										os.urandom(8).hex() if (seed == None) else seed])
+			sink = self.createDirectorySink(outputImageDirectory = outputImageDirectory,
+																			outputAnnotationDirectory = outputAnnotationDirectory,
+																			encodeSettings = encodeSettings,
+																			manifestPath = manifestPath,
+																			run = run)
+		elif ((encodeSettings != None) or (manifestPath != None)):
+			raise ValueError("ERROR: encodeSettings and manifestPath parameters are for the default sink, pass them to the sink.")
+		if (workers == None):
+			workers = 1
+		if (type(workers) != int):
+			raise TypeError("ERROR: workers parameter must be of type int.")
+		if (workers < 1):
+			raise ValueError("ERROR: workers parameter must be greater than 0.")
+		if ((seed != None) and (type(seed) != int)):
+			raise TypeError("ERROR: seed parameter must be of type int.")
+		# Iterate over the images. The listing is sorted so the seed of each image
+		# does not depend on the order of the file system.
+		self.annotationIndex.update()
+		images = self.annotationIndex.propertyImageNames
+		if ((workers > 1) and (seed == None)):
+			# Workers inherit the same random state, draw a base seed for them.
+			seed = int(np.random.randint(0, 2**31 - len(images)))
+		augmentationParameters = {"plan": plan,
+															"seed": seed}
+		if (workers == 1):
+			# The sink of the first shard, so the output is the same as with workers.
+			shardSink = sink.shard(index = 0)
+			with closeAfter(shardSink, sink):
+				for index, img in enumerate(tqdm(images)):
+					self.applyDataAugmentationToImage(img = img, index = index, sink = shardSink, \
+																						**augmentationParameters)
+			self.frameCache.clear()
+		else:
+			# Shard the images in contiguous chunks, several per worker, so the
+			# progress bar is updated often. The annotations are read from the
+			# index here and sent with the images.
+			indexedImages = [(index, img, self.readImageAnnotation(img = img)) \
+												for index, img in enumerate(images)]
+			shardSize = max(1, int(math.ceil(len(images) / (workers * 8))))
+			shards = [indexedImages[i:i+shardSize] for i in range(0, len(images), shardSize)]
+			# Every shard is written by its own sink.
+			pool = multiprocessing.Pool(processes = workers)
+			with closeAfter(sink):
+				try:
+					progress = tqdm(total = len(images))
+					for processed, decodes, reads, recorded in pool.imap_unordered(applyDataAugmentationShard, \
+															[(self, sink.shard(index = i), shard, augmentationParameters, \
+															instrumentation.propertyEnabled) for i, shard in enumerate(shards)]):
+						progress.update(processed)
+						# Merge the frame cache counters and the instrumentation of the workers.
+						self.frameCache.decodes += decodes
+						self.frameCache.reads += reads
+						instrumentation.merge(snapshot = recorded)
+					progress.close()
+				finally:
+					pool.close()
+					pool.join()
+
+	def compileAugmentationPlan(self, configurationFile = None, threshold = None):
+		"""
+		Validates a configuration file and compiles it into a plan.
+		Args:
+			configurationFile: A string with a path to a json file that contains the 
+								configuration of the data augmentation methods.
+			threshold: A float that contains a number between 0 and 1. Default is 0.5.
+		Returns:
+			An AugmentationPlan.
+		"""
+		try:
+			from .AugmentationConfigurationFile import AugmentationConfigurationFile
+		except:
+			from AugmentationConfigurationFile import AugmentationConfigurationFile
+		# Assertions
 		if (configurationFile == None):
 			raise ValueError("ERROR: Augmenter parameter cannot be empty.")
 		else:
 			if (not os.path.isfile(configurationFile)):
 				raise Exception("ERROR: Path to json file ({}) does not exist."\
 													.format(configurationFile))
-		jsonConf = AugmentationConfigurationFile(file = configurationFile)
-		typeAugmentation = jsonConf.runAllAssertions()
-		if (outputImageDirectory == None):
-			outputImageDirectory = os.getcwd()
-			Util.create_folder(os.path.join(outputImageDirectory, "images"))
-			outputImageDirectory = os.path.join(os.getcwd(), "images")
-		if (not (os.path.isdir(outputImageDirectory))):
-			raise Exception("ERROR: Path to output directory does not exist. {}"\
-											.format(outputImageDirectory))
-		if (outputAnnotationDirectory == None):
-			outputAnnotationDirectory = os.getcwd()
-			Util.create_folder(os.path.join(outputAnnotationDirectory, "annotations"))
-			Util.create_folder(os.path.join(outputAnnotationDirectory, "annotations", "xmls"))
-			outputAnnotationDirectory = os.path.join(os.getcwd(), "annotations", "xmls")
-		if (not (os.path.isdir(outputAnnotationDirectory))):
-			raise Exception("ERROR: Path to output annotation directory does not exist. {}"\
-											.format(outputAnnotationDirectory))
 		if (threshold == None):
 			threshold = 0.5
 		if (type(threshold) != float):
-			raise TyperError("ERROR: threshold parameter must be of type float.")
+			raise TypeError("ERROR: threshold parameter must be of type float.")
 		if ((threshold > 1) or (threshold < 0)):
 			raise ValueError("ERROR: threshold paramater should be a number between" +\
 												" 0-1.")
-		# Load configuration data.
-		f = open(configurationFile)
-		data = json.load(f)
-		f.close()
-		# Iterate over the images.
-		for img in tqdm(os.listdir(self.imagesDirectory)):
-			# Get the extension
-			extension = Util.detect_file_extension(filename = img)
-			if (extension == None):
-				raise Exception("ERROR: Your image extension is not valid." +\
-												 "Only jpgs and pngs are allowed.")
-			# Extract name.
-			filename = os.path.split(img)[1].split(extension)[0]
-			# Create xml and img name.
-			imgFullPath = os.path.join(self.imagesDirectory, filename + extension)
-			xmlFullPath = os.path.join(self.annotationsDirectory, filename + ".xml")
-			imgAnt = ImageAnnotation(path = xmlFullPath)
-			boundingBoxes = imgAnt.propertyBoundingBoxes
-			names = imgAnt.propertyNames
-			# Apply augmentation.
-			if (typeAugmentation == 0):
-				for i in data["bounding_box_augmenters"]:
-					if (i == "Sequential"):
-						# Prepare data for sequence
-						frame = cv2.imread(imgFullPath)
-						bndboxes = boundingBoxes
-						# Read elements of vector
-						assert type(data["bounding_box_augmenters"][i]) == list, "Not list"
-						for k in range(len(data["bounding_box_augmenters"][i])):
-							# Extract information
-							augmentationType = list(data["bounding_box_augmenters"][i][k].keys())[0]
-							if (not jsonConf.isValidBoundingBoxAugmentation(augmentation = augmentationType)):
-								raise Exception("ERROR: {} is not valid.".format(augmentationType))
-							parameters = data["bounding_box_augmenters"][i][k][augmentationType]
-							# Save?
-							saveParameter = jsonConf.extractSavingParameter(parameters = parameters)
-							frame, bndboxes = applyBoundingBoxAugmentation(frame = frame,
-																						boundingBoxes = bndboxes,
-																						augmentationType = augmentationType, #j,
-																						parameters = parameters)
-							if (saveParameter == True):
-								# Generate a new name.
-								newName = Util.create_random_name(name = self.databaseName, length = 4)
-								imgName = newName + extension
-								xmlName = newName + ".xml"
-								# Save image.
-								Util.save_img(frame = frame, 
-																									img_name = imgName, 
-																									output_image_directory = outputImageDirectory)
-								# Save annotation.
-								Util.save_annotation(filename = imgName,
-																						path = os.path.join(outputImageDirectory, imgName),
-																						database_name = self.databaseName,
-																						frame_size = frame.shape,
-																						data_augmentation_type = augmentationType,
-																						bounding_boxes = bndboxes,
-																						names = names,
-																						origin = imgFullPath,
-																						output_directory = os.path.join(outputAnnotationDirectory, xmlName))
-					else:
-						parameters = data["bounding_box_augmenters"][i]
-						# Save?
-						saveParameter = jsonConf.extractSavingParameter(parameters = parameters)
-						frame, bndboxes = applyBoundingBoxAugmentation(frame = cv2.imread(imgFullPath),
-																						boundingBoxes = boundingBoxes,
-																						augmentationType = i,
-																						parameters = parameters)
-						# Save frame
-						if (saveParameter == True):
-							# Generate a new name.
-							newName = Util.create_random_name(name = self.databaseName, length = 4)
-							imgName = newName + extension
-							xmlName = newName + ".xml"
-							# Save image.
-							Util.save_img(frame = frame, 
-																								img_name = imgName, 
-																								output_image_directory = outputImageDirectory)
-							# Save annotation.
-							Util.save_annotation(filename = imgName,
-																					path = os.path.join(outputImageDirectory, imgName),
-																					database_name = self.databaseName,
-																					frame_size = frame.shape,
-																					data_augmentation_type = augmentationType,
-																					bounding_boxes = bndboxes,
-																					names = names,
-																					origin = imgFullPath,
-																					output_directory = os.path.join(outputAnnotationDirectory, xmlName))
-			elif (typeAugmentation == 1):
-				# Geometric data augmentations
-				raise ValueError("Image geometric data augmentations are not " +\
-													"supported for bounding boxes. Use bounding box " +\
-													"augmentation types.")
-			elif (typeAugmentation == 2):
-				# Color data augmentations
-				for i in data["image_color_augmenters"]:
-					if (i == "Sequential"):
-						# Prepare data for sequence
-						frame = cv2.imread(imgFullPath)
-						# Read elements of vector
-						assert type(data["image_color_augmenters"][i]) == list, "Not list"
-						for k in range(len(data["image_color_augmenters"][i])):
-							# Extract information
-							augmentationType = list(data["image_color_augmenters"][i][k].keys())[0]
-							if (not jsonConf.isValidColorAugmentation(augmentation = augmentationType)):
-								raise Exception("ERROR: {} is not valid.".format(augmentationType))
-							parameters = data["image_color_augmenters"][i][k][augmentationType]
-							# Save?
-							saveParameter = jsonConf.extractSavingParameter(parameters = parameters)
-							# Apply augmentation
-							frame = applyColorAugmentation(frame = frame,
-																						augmentationType = augmentationType, #j,
-																						parameters = parameters)
-							if (saveParameter == True):
-								# Generate a new name.
-								newName = Util.create_random_name(name = self.databaseName, length = 4)
-								imgName = newName + extension
-								xmlName = newName + ".xml"
-								# Save image.
-								Util.save_img(frame = frame, 
-																									img_name = imgName, 
-																									output_image_directory = outputImageDirectory)
-								# Save annotation.
-								Util.save_annotation(filename = imgName,
-																						path = os.path.join(outputImageDirectory, imgName),
-																						database_name = self.databaseName,
-																						frame_size = frame.shape,
-																						data_augmentation_type = augmentationType,
-																						bounding_boxes = bndboxes,
-																						names = names,
-																						origin = imgFullPath,
-																						output_directory = os.path.join(outputAnnotationDirectory, xmlName))
-					else:
-						parameters = data["image_color_augmenters"][i]
-						# Save?
-						saveParameter = jsonConf.extractSavingParameter(parameters = parameters)
-						frame = applyColorAugmentation(frame = cv2.imread(imgFullPath),
-																						augmentationType = i,
-																						parameters = parameters)
-						# Save frame
-						if (saveParameter == True):
-							# Generate a new name.
-							newName = Util.create_random_name(name = self.databaseName, length = 4)
-							imgName = newName + extension
-							xmlName = newName + ".xml"
-							# Save image.
-							Util.save_img(frame = frame, 
-																								img_name = imgName, 
-																								output_image_directory = outputImageDirectory)
-							# Save annotation.
-							Util.save_annotation(filename = imgName,
-																					path = os.path.join(outputImageDirectory, imgName),
-																					database_name = self.databaseName,
-																					frame_size = frame.shape,
-																					data_augmentation_type = augmentationType,
-																					bounding_boxes = bndboxes,
-																					names = names,
-																					origin = imgFullPath,
-																					output_directory = os.path.join(outputAnnotationDirectory, xmlName))
-			elif (typeAugmentation == 3):
-				# Assert sequential follows multiple_image_augmentations.
-				if (not ("Sequential" in data["multiple_image_augmentations"])):
-					raise Exception("ERROR: Data after multiple_image_augmentations is not recognized.")
-				# Multiple augmentation configurations, get a list of hash maps of all the confs.
-				list_of_augmenters_confs = data["multiple_image_augmentations"]["Sequential"]
-				# Assert list_of_augmenters_confs is a list.
-				if (not (type(list_of_augmenters_confs) == list)):
-					raise TypeError("ERROR: Data inside [multiple_image_augmentations][Sequential] must be a list.")
-				# Prepare data for sequence.
-				frame = cv2.imread(imgFullPath)
-				bndboxes = boundingBoxes
-				# print("\n*", list_of_augmenters_confs, "\n")
-				for k in range(len(list_of_augmenters_confs)):
-					# Get augmenter type ("bounding_box_augmenter" or "color_augmenter") position
-					# in the list of multiple augmentations.
-					augmentationConf = list(list_of_augmenters_confs[k].keys())[0]
-					if (not (jsonConf.isBndBxAugConfFile(keys = [augmentationConf]) or
-							jsonConf.isColorConfFile(keys = [augmentationConf]))):
-						raise Exception("{} is not a valid configuration.".format(augmentationConf))
-					# Get sequential information from there. This information is a list of 
-					# the types of augmenters that belong to augmentationConf.
-					list_of_augmenters_confs_types = list_of_augmenters_confs[k][augmentationConf]["Sequential"]
-					# Assert list_of_augmenters_confs is a list
-					if (not (type(list_of_augmenters_confs_types) == list)):
-						raise TypeError("Data inside [multiple_image_augmentations][Sequential][{}][Sequential] must be a list."\
-														.format(augmentationConf))
-					# Iterate over augmenters inside sequential of type.
-					for l in range(len(list_of_augmenters_confs_types)):
-						# Get augmentation type and its parameters.
-						augmentationType = list(list_of_augmenters_confs_types[l].keys())[0]
-						# Assert augmentation is valid.
-						if (not (jsonConf.isValidBoundingBoxAugmentation(augmentation = augmentationType) or
-										jsonConf.isValidColorAugmentation(augmentation = augmentationType))):
-							raise Exception("ERROR: {} is not valid.".format(augmentationType))
-						parameters = list_of_augmenters_confs_types[l][augmentationType]
-						# Save?
-						saveParameter = jsonConf.extractSavingParameter(parameters = parameters)
-						# Restart frame to original?
-						restartFrameParameter = jsonConf.extractRestartFrameParameter(parameters = parameters)
-						# Probability of augmentation happening.
-						randomEvent = jsonConf.randomEvent(parameters = parameters, threshold = threshold)
-						# print(augmentationType, parameters)
-						# Apply augmentation.
-						if (augmentationConf == "image_color_augmenters"):
-							# print(augmentationConf, augmentationType, parameters)
-							if (randomEvent == True):
-								frame = applyColorAugmentation(frame = frame,
-																					augmentationType = augmentationType,
-																					parameters = parameters)
-						elif (augmentationConf == "bounding_box_augmenters"):
-							# print(augmentationConf, augmentationType, parameters)
-							if (randomEvent == True):
-								frame, bndboxes = applyBoundingBoxAugmentation(frame = frame,
-																					boundingBoxes = bndboxes,
-																					augmentationType = augmentationType, #j,
-																					parameters = parameters)
-						# Save?
-						if ((saveParameter == True) and (randomEvent == True)):
-							# Generate a new name.
-							newName = Util.create_random_name(name = self.databaseName, length = 4)
-							imgName = newName + extension
-							xmlName = newName + ".xml"
-							# Save image.
-							Util.save_img(frame = frame, 
-														img_name = imgName, 
-														output_image_directory = outputImageDirectory)
-							# Save annotation.
-							Util.save_annotation(filename = imgName,
-																	path = os.path.join(outputImageDirectory, imgName),
-																	database_name = self.databaseName,
-																	frame_size = frame.shape,
-																	data_augmentation_type = augmentationType,
-																	bounding_boxes = bndboxes,
-																	names = names,
-																	origin = imgFullPath,
-																	output_directory = os.path.join(outputAnnotationDirectory, xmlName))
-						# Restart frame?
-						if (restartFrameParameter == True):
-							frame = cv2.imread(imgFullPath)
-							bndboxes = boundingBoxes
-			else:
-				raise Exception("Type augmentation {} not valid.".format(typeAugmentation))
+		# Compile the configuration file into a plan.
+		jsonConf = AugmentationConfigurationFile(file = configurationFile)
+		plan = jsonConf.compilePlan(threshold = threshold)
+		if (plan.propertyTypeAugmentation == 1):
+			# Geometric data augmentations
+			raise ValueError("Image geometric data augmentations are not " +\
+												"supported for bounding boxes. Use bounding box " +\
+												"augmentation types.")
+		return plan
+
+	def iterateDataAugmentation(self, configurationFile = None, threshold = None, workers = None, seed = None, prefetch = None, sharedMemory = None):
+		"""
+		Applies the data augmentation of a configuration file to the dataset and
+		yields the augmented samples instead of saving them. The samples are
+		produced by worker processes while the caller consumes them.
+		Args:
+			configurationFile: A string with a path to a json file that contains the 
+								configuration of the data augmentation methods.
+			threshold: A float that contains a number between 0 and 1.
+			workers: An int that contains the number of processes that augment the
+								images. If 0, the images are augmented by the caller when the next
+								sample is requested. Default is 1.
+			seed: An int that seeds the random generators of each image. For the same
+						seed, the samples of every image are the same with any number of
+						workers. With more than one worker the images are interleaved.
+			prefetch: An int with the maximum number of samples that wait for the
+								caller. The workers block when it is reached. Default is 16.
+			sharedMemory: A boolean. If True, the workers send the frames through a
+										SharedFrameSlab with prefetch + workers slots of the size of the
+										largest image of the dataset instead of pickling them. Larger
+										frames are pickled. Default is True.
+		Returns:
+			A generator of AugmentedSample (frame, boundingBoxes, names). The workers
+			are stopped when the generator is closed.
+		"""
+		# Assertions
+		plan = self.compileAugmentationPlan(configurationFile = configurationFile, threshold = threshold)
+		if (workers == None):
+			workers = 1
+		if (type(workers) != int):
+			raise TypeError("ERROR: workers parameter must be of type int.")
+		if (workers < 0):
+			raise ValueError("ERROR: workers parameter must be greater or equal than 0.")
+		if ((seed != None) and (type(seed) != int)):
+			raise TypeError("ERROR: seed parameter must be of type int.")
+		if (prefetch == None):
+			prefetch = 16
+		if ((type(prefetch) != int) or (prefetch < 1)):
+			raise ValueError("ERROR: prefetch parameter must be an int greater than 0.")
+		if (sharedMemory == None):
+			sharedMemory = True
+		if (type(sharedMemory) != bool):
+			raise TypeError("ERROR: sharedMemory parameter must be of type bool.")
+		# Local variables
+		self.annotationIndex.update()
+		images = self.annotationIndex.propertyImageNames
+		indexedImages = [(index, img, self.readImageAnnotation(img = img)) \
+											for index, img in enumerate(images)]
+		if ((workers > 0) and (seed == None)):
+			# Workers inherit the same random state, draw a base seed for them.
+			seed = int(np.random.randint(0, 2**31 - len(images)))
+		slotBytes = None
+		sizes = self.annotationIndex.propertySizes
+		if ((workers > 0) and sharedMemory and (len(sizes) > 0)):
+			# The size of the largest image according to the annotations.
+			slotBytes = int(np.prod(sizes.astype(np.int64), axis = 1).max())
+		return self.iterateAugmentedSamples(plan = plan, indexedImages = indexedImages, workers = workers, \
+																				seed = seed, prefetch = prefetch, \
+																				slotBytes = slotBytes if (slotBytes != 0) else None)
+
+	def iterateAugmentedSamples(self, plan = None, indexedImages = None, workers = None, seed = None, prefetch = None, slotBytes = None):
+		"""
+		The generator of iterateDataAugmentation. The parameters are validated by
+		iterateDataAugmentation before the generator starts.
+		Args:
+			plan: An AugmentationPlan.
+			indexedImages: A list of tuples (index, image, annotation).
+			workers: An int with the number of processes, 0 augments in the caller.
+			seed: An int that seeds the random generators or None.
+			prefetch: An int with the size of the queue of samples.
+			slotBytes: An int with the size of the slots of the SharedFrameSlab of the
+									workers. If None, the frames are pickled.
+		Returns:
+			A generator of AugmentedSample.
+		"""
+		try:
+			from .DatasetSink import QueueSink
+		except:
+			from DatasetSink import QueueSink
+		try:
+			from .SharedFrameSlab import SharedFrameSlab, SlabFrame
+		except:
+			from SharedFrameSlab import SharedFrameSlab, SlabFrame
+		if (workers == 0):
+			samples = queue.Queue()
+			sink = QueueSink(queue = samples)
+			for index, img, annotation in indexedImages:
+				self.applyDataAugmentationToImage(img = img, index = index, plan = plan, sink = sink, \
+																					seed = seed, annotation = annotation)
+				while (not samples.empty()):
+					yield samples.get()
+			self.frameCache.clear()
+			return
+		# Every worker augments every workers-th image and puts its samples in a
+		# bounded queue. A worker puts None when it finishes or a string with the
+		# traceback when it fails. A worker holds at most one slot of the slab
+		# while the queue is full, so the slab never blocks the workers.
+		samples = multiprocessing.Queue(maxsize = prefetch)
+		slab = None
+		if (slotBytes != None):
+			slab = SharedFrameSlab(slots = prefetch + workers, slotBytes = slotBytes)
+		processes = [multiprocessing.Process(target = iterateDataAugmentationWorker, \
+									args = (self, plan, seed, indexedImages[i::workers], samples, slab, \
+													instrumentation.propertyEnabled)) \
+									for i in range(workers)]
+		try:
+			for process in processes:
+				process.daemon = True
+				process.start()
+			running = workers
+			while (running > 0):
+				try:
+					sample = samples.get(timeout = 1)
+				except queue.Empty:
+					# A worker that was killed does not put None.
+					if (any([(process.exitcode != None) and (process.exitcode != 0) for process in processes])):
+						raise Exception("ERROR: An augmentation worker stopped unexpectedly.")
+					continue
+				if (sample is None):
+					running -= 1
+				elif (type(sample) == dict):
+					# The instrumentation of a worker that finished.
+					instrumentation.merge(snapshot = sample)
+				elif (type(sample) == str):
+					raise Exception("ERROR: An augmentation worker failed:\n{}".format(sample))
+				elif (type(sample.frame) == SlabFrame):
+					yield sample._replace(frame = slab.take(slotFrame = sample.frame))
+				else:
+					yield sample
+		finally:
+			for process in processes:
+				if (process.is_alive()):
+					process.terminate()
+				process.join()
+			samples.close()
+			if (slab != None):
+				slab.close()
+
+	def applyDataAugmentationToImage(self, img = None, index = None, plan = None, sink = None, seed = None, annotation = None):
+		"""
+		Applies a compiled augmentation plan to a single image of the dataset.
+		Args:
+			img: A string that contains the name of an image in imagesDirectory.
+			index: An int that contains the position of the image in the dataset.
+			plan: An AugmentationPlan.
+			sink: An object that implements DatasetSinkMethods where the images are stored.
+			seed: An int that seeds the random generators. The image uses seed + index, so
+						the result does not depend on which worker processes it. If None, the
+						random generators are not seeded.
+			annotation: A tuple that contains the names and the bounding boxes of the
+									image. If None, the annotation is read.
+		Returns:
+			None
+		"""
+		try:
+			from .ApplyAugmentation import seedAugmenters
+		except:
+			from ApplyAugmentation import seedAugmenters
+		# Seed the random generators for this image.
+		if (seed != None):
+			seedAugmenters(seed = seed + index)
+		# Get the extension
+		extension = Util.detect_file_extension(filename = img)
+		if (extension == None):
+			raise Exception("ERROR: Your image extension is not valid." +\
+											 "Only jpgs and pngs are allowed.")
+		# Extract name.
+		filename = os.path.split(img)[1].split(extension)[0]
+		# Create img name.
+		imgFullPath = os.path.join(self.imagesDirectory, filename + extension)
+		if (annotation == None):
+			annotation = self.readImageAnnotation(img = img)
+		names, boundingBoxes = annotation
+		instrumentation.count("images")
+		# Apply augmentation.
+		plan.run(readFrame = functools.partial(self.frameCache.read, path = imgFullPath),
+						boundingBoxes = boundingBoxes,
+						save = functools.partial(sink.write,
+																		names = names,
+																		origin = imgFullPath,
+																		extension = extension),
+						cacheKey = imgFullPath)
+
+	def readImageAnnotation(self, img = None):
+		"""
+		Reads the annotation of an image of the dataset.
+		Args:
+			img: A string that contains the name of an image in imagesDirectory.
+		Returns:
+			A tuple that contains a list with the names and a list with the bounding
+			boxes of the image.
+		"""
+		extension = Util.detect_file_extension(filename = img)
+		if (extension == None):
+			raise Exception("ERROR: Your image extension is not valid." +\
+											 "Only jpgs and pngs are allowed.")
+		filename = os.path.split(img)[1].split(extension)[0]
+		xmlFullPath = os.path.join(self.annotationsDirectory, filename + ".xml")
+		size, names, boundingBoxes = self.readAnnotation(annotationPath = xmlFullPath)
+		return names, boundingBoxes
+
+def createRoiReport(crops = None, pixels = None, uniquePixels = None, seconds = None):
+	"""
+	Creates a RoiReport and computes its duplication ratio.
+	Args:
+		crops: An int.
+		pixels: An int.
+		uniquePixels: An int.
+		seconds: A float.
+	Returns:
+		A RoiReport.
+	"""
+	duplicationRatio = (pixels / uniquePixels) if (uniquePixels > 0) else 1.0
+	return RoiReport(crops = crops, pixels = pixels, uniquePixels = uniquePixels, \
+									duplicationRatio = duplicationRatio, seconds = seconds)
+
+def roiRunToken(offset = None, strategy = None):
+	"""
+	The run of reduceDatasetByRois and reduceImageDataPointByRoi, see runToken.
+	"""
+	return runToken(method = "roi", parameters = [offset, "corePoints" if (strategy == None) else strategy])
+
+def applyDataAugmentationShard(task = None):
+	"""
+	Applies data augmentation to a shard of images. Used by the workers of
+	ImageLocalizationDataset.applyDataAugmentation.
+	Args:
+		task: A tuple that contains an ImageLocalizationDataset, the sink of the shard,
+					a list of tuples (index, image, annotation), a dictionary with the
+					augmentation parameters and a boolean that enables the instrumentation.
+	Returns:
+		A tuple that contains the number of processed images, the number of decoded
+		frames, the number of frame reads and the instrumentation snapshot of the shard.
+	"""
+	try:
+		from .WriteBehind import closeAfter
+	except:
+		from WriteBehind import closeAfter
+	dataset, sink, shard, augmentationParameters, instrumented = task
+	frameCache = dataset.propertyFrameCache
+	decodes, reads = frameCache.propertyDecodes, frameCache.propertyReads
+	instrumentation.enable(enabled = instrumented)
+	recorded = instrumentation.snapshot()
+	with closeAfter(sink):
+		for index, img, annotation in shard:
+			dataset.applyDataAugmentationToImage(img = img, index = index, annotation = annotation, \
+																					sink = sink, **augmentationParameters)
+	frameCache.clear()
+	return len(shard), frameCache.propertyDecodes - decodes, frameCache.propertyReads - reads, \
+					subtractSnapshots(after = instrumentation.snapshot(), before = recorded)
+
+def iterateDataAugmentationWorker(dataset = None, plan = None, seed = None, indexedImages = None, samples = None, slab = None, instrumented = None):
+	"""
+	Augments images and puts the samples in a queue. Used by the workers of
+	ImageLocalizationDataset.iterateDataAugmentation.
+	Args:
+		dataset: An ImageLocalizationDataset.
+		plan: An AugmentationPlan.
+		seed: An int that seeds the random generators.
+		indexedImages: A list of tuples (index, image, annotation).
+		samples: A multiprocessing.Queue.
+		slab: A SharedFrameSlab for the frames or None.
+		instrumented: A boolean that enables the instrumentation. Its snapshot is
+									put before None.
+	Returns:
+		None
+	"""
+	try:
+		from .DatasetSink import QueueSink
+	except:
+		from DatasetSink import QueueSink
+	sink = QueueSink(queue = samples, slab = slab)
+	instrumentation.enable(enabled = instrumented)
+	recorded = instrumentation.snapshot()
+	try:
+		for index, img, annotation in indexedImages:
+			dataset.applyDataAugmentationToImage(img = img, index = index, plan = plan, sink = sink, \
+																					seed = seed, annotation = annotation)
+		samples.put(subtractSnapshots(after = instrumentation.snapshot(), before = recorded))
+		samples.put(None)
+	except Exception:
+		samples.put(traceback.format_exc())
 
 class Annotation(object):
 	def __init__(self, name = None, bndbox = None, module = None, corePoint = None):
@@ -4,8 +4,18 @@ Email: lozuwaucb@gmail.com
 Description: Testing units for ImageLocalizationDataset.
 """
 import os
+import io
+import shutil
+import contextlib
+import tempfile
+import hashlib
+import multiprocessing
 import unittest
+from unittest import mock
 from ImageLocalizationDataset import *
+from DatasetSink import *
+from TiledImage import *
+from PackedDataset import *
 from Util import *
 
 class ImageLocalizationDataset_test(unittest.TestCase):
@@ -66,6 +76,320 @@ class ImageLocalizationDataset_test(unittest.TestCase):
 																outputImageDirectory = outputImageDirectory,
 																outputAnnotationDirectory = outputAnnotationDirectory)
 
+class ImageLocalizationDatasetSynthetic_test(unittest.TestCase):
+
+	def setUp(self):
+		# Create a small dataset of random images and annotations.
+		self.root = tempfile.mkdtemp()
+		self.imgs = os.path.join(self.root, "images")
+		self.annts = os.path.join(self.root, "annotations")
+		os.mkdir(self.imgs)
+		os.mkdir(self.annts)
+		rng = np.random.RandomState(0)
+		for i in range(4):
+			frame = rng.randint(0, 255, (240, 320, 3)).astype(np.uint8)
+			boundingBoxes = []
+			for j in range(4):
+				ix, iy = int(rng.randint(0, 260)), int(rng.randint(0, 180))
+				boundingBoxes.append([ix, iy, ix + int(rng.randint(10, 50)), iy + int(rng.randint(10, 50))])
+			cv2.imwrite(os.path.join(self.imgs, "img{}.png".format(i)), frame)
+			Util.save_annotation(filename = "img{}.png".format(i),
+													path = os.path.join(self.imgs, "img{}.png".format(i)),
+													database_name = "unit_test",
+													frame_size = frame.shape,
+													data_augmentation_type = "Unspecified",
+													bounding_boxes = boundingBoxes,
+													names = ["car", "pedestrian", "car", "pedestrian"],
+													origin = "unit_test",
+													output_directory = os.path.join(self.annts, "img{}.xml".format(i)))
+		self.imda = ImageLocalizationDataset(imagesDirectory = self.imgs,
+																				annotationsDirectory = self.annts,
+																				databaseName = "unit_test")
+		self.augFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), "confs_examples", \
+																"aug_multiple_bndbx_color_sequential.json")
+
+	def tearDown(self):
+		shutil.rmtree(self.root)
+
+	def augmentedImages(self, workers = None, seed = None):
+		outputImageDirectory = tempfile.mkdtemp(dir = self.root)
+		outputAnnotationDirectory = tempfile.mkdtemp(dir = self.root)
+		self.imda.applyDataAugmentation(configurationFile = self.augFile,
+																outputImageDirectory = outputImageDirectory,
+																outputAnnotationDirectory = outputAnnotationDirectory,
+																workers = workers,
+																seed = seed)
+		return sorted([hashlib.md5(cv2.imread(os.path.join(outputImageDirectory, each)).tobytes()).hexdigest() \
+									for each in os.listdir(outputImageDirectory)])
+
+	def test_applyDataAugmentationWorkers(self):
+		serial = self.augmentedImages(workers = 1, seed = 3)
+		parallel = self.augmentedImages(workers = 2, seed = 3)
+		self.assertGreater(len(serial), 0)
+		self.assertEqual(serial, parallel)
+
+	def packedImages(self, workers = None, seed = None):
+		directory = tempfile.mkdtemp(dir = self.root)
+		self.imda.applyDataAugmentation(configurationFile = self.augFile,
+																workers = workers,
+																seed = seed,
+																sink = PackedDatasetWriter(directory = directory))
+		return [hashlib.md5(sample.frame.tobytes()).hexdigest() for sample in PackedDatasetReader(directory = directory)]
+
+	def test_applyDataAugmentationPacked(self):
+		# Packed samples are in the same order with any number of workers.
+		serial = self.packedImages(workers = 1, seed = 3)
+		self.assertEqual(sorted(serial), self.augmentedImages(workers = 1, seed = 3))
+		self.assertEqual(serial, self.packedImages(workers = 2, seed = 3))
+
+	def test_reduceDatasetByRoisPacked(self):
+		directory = tempfile.mkdtemp(dir = self.root)
+		report = self.imda.reduceDatasetByRois(offset = [100, 100], sink = PackedDatasetWriter(directory = directory))
+		reader = PackedDatasetReader(directory = directory)
+		self.assertEqual(len(reader), report.crops)
+		self.assertEqual(len(os.listdir(directory)), 5)
+		for sample in reader:
+			for ix, iy, x, y in sample.boundingBoxes:
+				self.assertTrue((x <= sample.frame.shape[1]) and (y <= sample.frame.shape[0]))
+
+	def test_applyDataAugmentationNames(self):
+		# The names and the manifest do not depend on the number of workers.
+		names = []
+		for workers in [1, 2]:
+			outputImageDirectory = tempfile.mkdtemp(dir = self.root)
+			outputAnnotationDirectory = tempfile.mkdtemp(dir = self.root)
+			manifestPath = os.path.join(self.root, "manifest{}.csv".format(workers))
+			sink = DirectorySink(outputImageDirectory = outputImageDirectory,
+													outputAnnotationDirectory = outputAnnotationDirectory,
+													databaseName = "unit_test",
+													nameGenerator = NameGenerator(prefix = "unit_test", manifestPath = manifestPath))
+			self.imda.applyDataAugmentation(configurationFile = self.augFile, workers = workers, seed = 3, sink = sink)
+			manifest = readManifest(path = manifestPath)
+			self.assertEqual(sorted(os.listdir(outputImageDirectory)), sorted([row["name"] + ".png" for row in manifest]))
+			self.assertEqual(sorted(os.listdir(outputAnnotationDirectory)), sorted([row["name"] + ".xml" for row in manifest]))
+			names.append([(row["name"], row["augmentationType"]) for row in manifest])
+		self.assertGreater(len(names[0]), 0)
+		self.assertEqual(names[0], names[1])
+		# The worker manifests were merged.
+		self.assertEqual(sorted([each for each in os.listdir(self.root) if ("manifest" in each)]), \
+											["manifest1.csv", "manifest2.csv"])
+
+	def test_reduceDatasetByRoisManifest(self):
+		outputDirectory = tempfile.mkdtemp(dir = self.root)
+		manifestPath = os.path.join(self.root, "manifest.csv")
+		report = self.imda.reduceDatasetByRois(offset = [100, 100], outputImageDirectory = outputDirectory, \
+																					outputAnnotationDirectory = outputDirectory, manifestPath = manifestPath)
+		manifest = readManifest(path = manifestPath)
+		self.assertEqual(len(manifest), report.crops)
+		self.assertEqual(sorted(os.listdir(outputDirectory)), \
+											sorted([row["name"] + ext for row in manifest for ext in [".png", ".xml"]]))
+		# The manifest is written by the default sink only.
+		with self.assertRaises(ValueError):
+			self.imda.reduceDatasetByRois(offset = [100, 100], manifestPath = manifestPath, \
+																		sink = DirectorySink(outputImageDirectory = outputDirectory, \
+																												outputAnnotationDirectory = outputDirectory, \
+																												databaseName = "unit_test"))
+
+	def test_applyDataAugmentationRuns(self):
+		outputDirectory = tempfile.mkdtemp(dir = self.root)
+		otherFile = os.path.join(os.path.dirname(self.augFile), "aug_bndbxs_standard.json")
+		counts = []
+		for configurationFile in [self.augFile, self.augFile, otherFile]:
+			with contextlib.redirect_stdout(io.StringIO()):
+				self.imda.applyDataAugmentation(configurationFile = configurationFile, outputImageDirectory = outputDirectory, \
+																				outputAnnotationDirectory = outputDirectory, seed = 3)
+			counts.append(len(os.listdir(outputDirectory)))
+		# A repeated run overwrites its files, a run with another configuration adds its own.
+		self.assertEqual(counts[0], counts[1])
+		self.assertGreater(counts[2], counts[1])
+		# The crops of the other methods do not overwrite them either.
+		self.imda.reduceDatasetByRois(offset = [100, 100], outputImageDirectory = outputDirectory, \
+																	outputAnnotationDirectory = outputDirectory)
+		crops = len(os.listdir(outputDirectory)) - counts[2]
+		self.assertGreater(crops, 0)
+		self.imda.saveBoundingBoxes(outputDirectory = outputDirectory)
+		self.assertEqual(len(os.listdir(outputDirectory)), counts[2] + crops + 16)
+
+	def iteratedImages(self, workers = None, seed = None, sharedMemory = None):
+		return sorted([hashlib.md5(sample.frame.tobytes()).hexdigest() for sample in \
+									self.imda.iterateDataAugmentation(configurationFile = self.augFile, workers = workers, seed = seed, \
+																										sharedMemory = sharedMemory)])
+
+	def test_iterateDataAugmentation(self):
+		# The samples are the ones saved by applyDataAugmentation.
+		inline = self.iteratedImages(workers = 0, seed = 3)
+		self.assertEqual(inline, self.augmentedImages(workers = 1, seed = 3))
+		self.assertEqual(inline, self.iteratedImages(workers = 2, seed = 3))
+		self.assertEqual(inline, self.iteratedImages(workers = 2, seed = 3, sharedMemory = False))
+		sample = next(self.imda.iterateDataAugmentation(configurationFile = self.augFile, workers = 0, seed = 3))
+		self.assertEqual(sample.boundingBoxes.shape, (len(sample.names), 4))
+		# Closing the generator stops the workers.
+		samples = self.imda.iterateDataAugmentation(configurationFile = self.augFile, workers = 2, seed = 3, prefetch = 1)
+		next(samples)
+		samples.close()
+		self.assertEqual(multiprocessing.active_children(), [])
+
+	def test_iterateDataAugmentationError(self):
+		# An image that cannot be read stops the iteration with the error of the worker.
+		with open(os.path.join(self.imgs, "img2.png"), "wb") as f:
+			f.write(b"not an image")
+		with self.assertRaises(Exception) as context:
+			list(self.imda.iterateDataAugmentation(configurationFile = self.augFile, workers = 2, seed = 3))
+		self.assertTrue("Image could not be read" in str(context.exception))
+
+	def test_applyDataAugmentationFrameCache(self):
+		self.augmentedImages(workers = 2, seed = 3)
+		frameCache = self.imda.propertyFrameCache
+		# Every image is decoded once, restarts are copies of the cached frame.
+		self.assertEqual(frameCache.propertyDecodes, 4)
+		self.assertGreater(frameCache.propertyDecodesSaved, 0)
+
+	def test_applyDataAugmentationInstrumentation(self):
+		enableInstrumentation()
+		instrumentation.reset()
+		try:
+			outputs = len(self.augmentedImages(workers = 2, seed = 3))
+			report = instrumentation.report()
+		finally:
+			enableInstrumentation(enabled = False)
+			instrumentation.reset()
+		# The workers record the stages and the parent merges them.
+		self.assertEqual(report["counters"]["images"], 4)
+		self.assertEqual(report["decodesPerImage"], 1.0)
+		self.assertEqual(report["stages"]["imread"]["count"], 4)
+		self.assertEqual(report["stages"]["imwrite"]["count"], outputs)
+		self.assertEqual(report["stages"]["xmlWrite"]["count"], outputs)
+		self.assertGreater(report["stages"]["imwrite"]["bytes"], 0)
+		self.assertTrue(any([name.startswith("augment/") for name in report["stages"]]))
+
+	def test_findEmptyOrWrongAnnotations(self):
+		self.assertEqual(self.imda.findEmptyOrWrongAnnotations(), [])
+		# Write an annotation with a bounding box off the image.
+		Util.save_annotation(filename = "img0.png",
+												path = os.path.join(self.imgs, "img0.png"),
+												database_name = "unit_test",
+												frame_size = (240, 320, 3),
+												data_augmentation_type = "Unspecified",
+												bounding_boxes = [[10, 10, 330, 50]],
+												names = ["car"],
+												origin = "unit_test",
+												output_directory = os.path.join(self.annts, "img0.xml"))
+		os.utime(os.path.join(self.annts, "img0.xml"), ns = (0, 0))
+		with self.assertRaises(ValueError):
+			self.imda.findEmptyOrWrongAnnotations()
+
+	def test_dataConsistencyRefresh(self):
+		self.imda.dataConsistency()
+		# Only the new image is reported by the next refresh.
+		cv2.imwrite(os.path.join(self.imgs, "img4.png"), np.zeros((10, 10, 3), np.uint8))
+		changes = self.imda.refresh()
+		self.assertEqual(changes.images.added, ["img4.png"])
+		self.assertEqual(changes.annotations.added, [])
+		with self.assertRaises(Exception):
+			self.imda.dataConsistency()
+
+	def test_readAnnotationChanged(self):
+		self.imda.dataConsistency()
+		# The index is kept in memory, nothing is written next to the dataset.
+		self.assertEqual(sorted(os.listdir(self.root)), ["annotations", "images"])
+		xmlPath = os.path.join(self.annts, "img0.xml")
+		Util.save_annotation(filename = "img0.png",
+												path = os.path.join(self.imgs, "img0.png"),
+												database_name = "unit_test",
+												frame_size = (240, 320, 3),
+												data_augmentation_type = "Unspecified",
+												bounding_boxes = [[10, 10, 60, 50]],
+												names = ["car"],
+												origin = "unit_test",
+												output_directory = xmlPath)
+		os.utime(xmlPath, ns = (0, 0))
+		# An edited annotation is parsed again without a refresh.
+		self.assertEqual(self.imda.readAnnotation(annotationPath = xmlPath), ([240, 320, 3], ["car"], [[10, 10, 60, 50]]))
+
+	def test_reduceImageDataPointByRoi(self):
+		outputImageDirectory = tempfile.mkdtemp(dir = self.root)
+		outputAnnotationDirectory = tempfile.mkdtemp(dir = self.root)
+		size, names, boundingBoxes = self.imda.readAnnotation(annotationPath = os.path.join(self.annts, "img0.xml"))
+		rois = self.imda.planImageDataPointRois(size = size, names = names, \
+																						boundingBoxes = boundingBoxes, offset = [100, 100])
+		self.assertEqual(sum([len(roi.names) for roi in rois]) >= len(names), True)
+		# The image is decoded once for all the rois.
+		with mock.patch("cv2.imread", wraps = cv2.imread) as imread:
+			self.imda.reduceImageDataPointByRoi(imagePath = os.path.join(self.imgs, "img0.png"),
+																					annotationPath = os.path.join(self.annts, "img0.xml"),
+																					offset = [100, 100],
+																					outputImageDirectory = outputImageDirectory,
+																					outputAnnotationDirectory = outputAnnotationDirectory)
+		self.assertEqual(imread.call_count, 1)
+		self.assertEqual(len(os.listdir(outputImageDirectory)), len(rois))
+		frame = cv2.imread(os.path.join(self.imgs, "img0.png"))
+		crops = [cv2.imread(os.path.join(outputImageDirectory, each)) for each in os.listdir(outputImageDirectory)]
+		for roi in rois:
+			RoiXMin, RoiYMin, RoiXMax, RoiYMax = roi.edges
+			crop = frame[RoiYMin:RoiYMax, RoiXMin:RoiXMax, :]
+			self.assertEqual(any([np.array_equal(crop, each) for each in crops]), True)
+
+	def test_reduceImageDataPointByRoiTiled(self):
+		# A tiled tiff gives the same crops and it is never decoded whole.
+		outputImageDirectory = tempfile.mkdtemp(dir = self.root)
+		outputAnnotationDirectory = tempfile.mkdtemp(dir = self.root)
+		frame = cv2.imread(os.path.join(self.imgs, "img0.png"))
+		saveTiledTiff(path = os.path.join(self.imgs, "img0.tif"), frame = frame, tileSize = 64)
+		with mock.patch("cv2.imread", wraps = cv2.imread) as imread:
+			self.imda.reduceImageDataPointByRoi(imagePath = os.path.join(self.imgs, "img0.tif"),
+																					annotationPath = os.path.join(self.annts, "img0.xml"),
+																					offset = [100, 100],
+																					outputImageDirectory = outputImageDirectory,
+																					outputAnnotationDirectory = outputAnnotationDirectory)
+		self.assertEqual(imread.call_count, 0)
+		size, names, boundingBoxes = self.imda.readAnnotation(annotationPath = os.path.join(self.annts, "img0.xml"))
+		rois = self.imda.planImageDataPointRois(size = size, names = names, \
+																						boundingBoxes = boundingBoxes, offset = [100, 100])
+		self.assertEqual(len(os.listdir(outputImageDirectory)), len(rois))
+		crops = [cv2.imread(os.path.join(outputImageDirectory, each)) for each in os.listdir(outputImageDirectory)]
+		for roi in rois:
+			RoiXMin, RoiYMin, RoiXMax, RoiYMax = roi.edges
+			crop = frame[RoiYMin:RoiYMax, RoiXMin:RoiXMax, :]
+			self.assertEqual(any([np.array_equal(crop, each) for each in crops]), True)
+		os.remove(os.path.join(self.imgs, "img0.tif"))
+
+	def test_reduceDatasetByRoisEncodeSettings(self):
+		outputImageDirectory = tempfile.mkdtemp(dir = self.root)
+		outputAnnotationDirectory = tempfile.mkdtemp(dir = self.root)
+		report = self.imda.reduceDatasetByRois(offset = [100, 100],
+																					outputImageDirectory = outputImageDirectory,
+																					outputAnnotationDirectory = outputAnnotationDirectory,
+																					encodeSettings = EncodeSettings(imageFormat = ".npy"))
+		crops = os.listdir(outputImageDirectory)
+		self.assertEqual(len(crops), report.crops)
+		self.assertTrue(all([each.endswith(".npy") for each in crops]))
+		# The annotations point to the npy files.
+		size, names, boundingBoxes = self.imda.readAnnotation(annotationPath = \
+																		os.path.join(outputAnnotationDirectory, crops[0][:-4] + ".xml"))
+		frame = np.load(os.path.join(outputImageDirectory, crops[0]))
+		self.assertEqual(list(frame.shape), [int(each) for each in size])
+		with self.assertRaises(ValueError):
+			self.imda.reduceDatasetByRois(offset = [100, 100],
+																		sink = PackedDatasetWriter(directory = outputImageDirectory),
+																		encodeSettings = EncodeSettings())
+
+	def test_reduceDatasetByRoisCover(self):
+		reports = []
+		for strategy in ["corePoints", "cover"]:
+			outputImageDirectory = tempfile.mkdtemp(dir = self.root)
+			outputAnnotationDirectory = tempfile.mkdtemp(dir = self.root)
+			reports.append(self.imda.reduceDatasetByRois(offset = [100, 100],
+																									outputImageDirectory = outputImageDirectory,
+																									outputAnnotationDirectory = outputAnnotationDirectory,
+																									strategy = strategy))
+			self.assertEqual(len(os.listdir(outputImageDirectory)), reports[-1].crops)
+			self.assertGreaterEqual(reports[-1].duplicationRatio, 1.0)
+		self.assertLessEqual(reports[1].crops, reports[0].crops)
+		with self.assertRaises(ValueError):
+			self.imda.reduceDatasetByRois(offset = [100, 100],
+																		outputImageDirectory = outputImageDirectory,
+																		outputAnnotationDirectory = outputAnnotationDirectory,
+																		strategy = "optimal")
 
 if __name__ == "__main__":
 	unittest.main()
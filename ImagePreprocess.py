@@ -12,9 +12,30 @@ Log:
 	April, 2018 -> AdjustImage method added to class.
 """
 # Utils
+import heapq
 import numpy as np
-import cv2
 import math
+import collections
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+	from .LazyImport import lazyImport
+except:
+	from LazyImport import lazyImport
+cv2 = lazyImport("cv2")
+
+# The patches of an image computed by ImagePreprocess.computePatchGrid.
+# coordinates: An int32 numpy array of shape Nx4 with the patches (ix, iy, x, y) row by row.
+# numberPatchesHeight, numberPatchesWidth: Ints with the number of rows and columns of patches.
+# zerosHeight, zerosWidth: Ints with the zeros added to the bottom and right for SAME padding.
+# slideWindowSize, strideSize: Tuples (width, height) with the sizes that were used.
+# padding: A string with the type of padding.
+PatchGrid = collections.namedtuple("PatchGrid", ["coordinates", "numberPatchesHeight", \
+																"numberPatchesWidth", "zerosHeight", "zerosWidth", "slideWindowSize", \
+																"strideSize", "padding"])
+
+# Border modes of ImagePreprocess.padFrame.
+borderModes = ["constant", "reflect", "replicate"]
 
 class ImagePreprocess(object):
 	"""
@@ -296,6 +317,123 @@ class ImagePreprocess(object):
 				newNames.append(name)
 		return newBoundingBoxes, newNames
 
+	def groupBoundingBoxes(self, frameHeight = None, frameWidth = None, boundingBoxes = None, offset = None):
+		"""
+		Groups bounding boxes into Rois of size offset. The bounding boxes are visited
+		by the module of their top left corner, from lowest to highest, and boxes with
+		the same module in the order they are given. Every box that
+		is still a core point creates a Roi with adjustImage and the other boxes inside
+		the Roi stop being core points. The boxes inside a Roi are found with an index
+		of the boxes sorted by xmin, so only the boxes in the columns of the Roi are
+		tested.
+		Args:
+			frameHeight: An int that represents the height of the frame.
+			frameWidth: An int that represents the width of the frame.
+			boundingBoxes: A list of lists or a numpy array of shape Nx4 that contains
+											the coordinates of the bounding boxes.
+			offset: A list or tuple of ints (width, height) with the size of the Rois.
+		Returns:
+			A list of tuples (edges, indices) in the order the Rois are created. edges
+			is a list of ints [xmin, ymin, xmax, ymax] and indices is an int64 array
+			with the sorted indices of the bounding boxes inside the Roi.
+		"""
+		# Assertions
+		if (boundingBoxes is None):
+			raise ValueError("Bounding boxes cannot be empty.")
+		# Local variables
+		index = BoundingBoxIndex(boundingBoxes = boundingBoxes)
+		boxes = index.propertyBoundingBoxes
+		core = np.ones([len(boxes)], bool)
+		# A stable sort keeps the input order of equal modules. The bubble sort of
+		# earlier versions swapped equal neighbours, so when several boxes have the
+		# same module their Rois can be created in a different order than before.
+		order = np.argsort(boxes[:, 0]**2 + boxes[:, 1]**2, kind = "stable")
+		# Logic
+		rois = []
+		for i in order:
+			# Ignore non-core points.
+			if (not core[i]):
+				continue
+			# Center the core point in an allowed image space.
+			edges = list(self.adjustImage(frameHeight = frameHeight,
+																		frameWidth = frameWidth,
+																		boundingBoxes = [boxes[i].tolist()],
+																		offset = offset))
+			# Find the bounding boxes inside the Roi.
+			indices = index.inside(edges = edges)
+			# Boxes equal to the core point remain core points.
+			core[indices[np.any(boxes[indices] != boxes[i], axis = 1)]] = False
+			rois.append((edges, indices))
+		return rois
+
+	def coverBoundingBoxes(self, frameHeight = None, frameWidth = None, boundingBoxes = None, offset = None):
+		"""
+		Finds a small set of Rois of size offset that contain all the bounding boxes
+		with a greedy set cover. The candidate Rois of a bounding box place the box
+		at one of their corners, edges or center. The Roi that contains more boxes
+		that are not yet covered is picked until every box is covered, then the Rois
+		whose boxes are all covered by other Rois are removed. A box bigger than the
+		offset gets Rois of its own size.
+		Args:
+			frameHeight: An int that represents the height of the frame.
+			frameWidth: An int that represents the width of the frame.
+			boundingBoxes: A list of lists or a numpy array of shape Nx4 that contains
+											the coordinates of the bounding boxes.
+			offset: A list or tuple of ints (width, height) with the size of the Rois.
+		Returns:
+			A list of tuples (edges, indices) as groupBoundingBoxes.
+		"""
+		# Assertions
+		if (boundingBoxes is None):
+			raise ValueError("Bounding boxes cannot be empty.")
+		if ((type(offset) != list) and (type(offset) != tuple)):
+			raise TypeError("Parameter offset has to be eighter a list or tuple.")
+		if (len(offset) != 2):
+			raise ValueError("Parameter offset has to be of length 2 (width, height).")
+		# Local variables
+		index = BoundingBoxIndex(boundingBoxes = boundingBoxes)
+		boxes = index.propertyBoundingBoxes
+		if (len(boxes) == 0):
+			return []
+		# Candidate Rois.
+		widths = np.clip(np.maximum(offset[0], boxes[:, 2] - boxes[:, 0]), None, frameWidth)
+		heights = np.clip(np.maximum(offset[1], boxes[:, 3] - boxes[:, 1]), None, frameHeight)
+		lefts = np.stack([boxes[:, 0], (boxes[:, 0] + boxes[:, 2] - widths) // 2, boxes[:, 2] - widths], axis = 1)
+		tops = np.stack([boxes[:, 1], (boxes[:, 1] + boxes[:, 3] - heights) // 2, boxes[:, 3] - heights], axis = 1)
+		lefts = np.clip(lefts, 0, (frameWidth - widths)[:, None])
+		tops = np.clip(tops, 0, (frameHeight - heights)[:, None])
+		lefts, tops = np.repeat(lefts, 3, axis = 1), np.tile(tops, [1, 3])
+		candidates = np.stack([lefts, tops, lefts + widths[:, None], tops + heights[:, None]], axis = 2)
+		candidates = np.unique(candidates.reshape(-1, 4), axis = 0)
+		covers = [index.inside(edges = edges) for edges in candidates]
+		# Greedy set cover. Gains are only recomputed for the candidate on top of the heap.
+		covered = np.zeros([len(boxes)], bool)
+		heap = [(-len(indices), k) for k, indices in enumerate(covers)]
+		heapq.heapify(heap)
+		picks = []
+		while (not covered.all()):
+			if (len(heap) == 0):
+				raise Exception("ERROR: Bounding boxes {} are off the frame."\
+												.format(boxes[~covered].tolist()))
+			gain, k = heapq.heappop(heap)
+			newGain = int(np.count_nonzero(~covered[covers[k]]))
+			if (newGain == 0):
+				continue
+			if (newGain == -gain):
+				covered[covers[k]] = True
+				picks.append(k)
+			else:
+				heapq.heappush(heap, (-newGain, k))
+		# Remove redundant Rois, the last ones first.
+		counts = np.zeros([len(boxes)], np.int64)
+		for k in picks:
+			counts[covers[k]] += 1
+		for k in picks[::-1]:
+			if (np.all(counts[covers[k]] > 1)):
+				counts[covers[k]] -= 1
+				picks.remove(k)
+		return [(candidates[k].tolist(), covers[k]) for k in picks]
+
 	def divideIntoPatches(self, imageWidth = None, imageHeight = None, slideWindowSize = None, strideSize = None, padding = None, numberPatches = None):
 		"""
 		Divides the image into NxM patches depending on the stride size,
@@ -316,6 +454,41 @@ class ImagePreprocess(object):
 			given parameters with the format(ix, iy, x, y), an int containing the number of row patches,
 			an int containing the number of column patches
 		"""
+		grid = self.computePatchGrid(imageWidth = imageWidth,
+																imageHeight = imageHeight,
+																slideWindowSize = slideWindowSize,
+																strideSize = strideSize,
+																padding = padding,
+																numberPatches = numberPatches)
+		patchesCoordinates = grid.coordinates.tolist()
+		if (grid.padding == "SAME"):
+			return patchesCoordinates,\
+					grid.numberPatchesHeight,\
+					grid.numberPatchesWidth,\
+					grid.zerosHeight,\
+					grid.zerosWidth
+		return patchesCoordinates,\
+				grid.numberPatchesHeight,\
+				grid.numberPatchesWidth
+
+	def computePatchGrid(self, imageWidth = None, imageHeight = None, slideWindowSize = None, strideSize = None, padding = None, numberPatches = None):
+		"""
+		Computes the patches of divideIntoPatches as an array.
+		Args:
+			imageWidth: An int that represents the width of the image.
+			imageHeight: An int that represents the height of the image.
+			slideWindowSize: A tuple (width, height) that represents the size
+													of the sliding window.
+			strideSize: A tuple (width, height) that represents the amount
+									of pixels to move on height and width direction.
+			padding: A string ("VALID", "SAME", "VALID_FIT_ALL") that tells the type of
+								padding.
+			numberPatches: A tuple (numberWidth, numberHeight) that 
+												contains the number of patches in each axis.
+		Returns:
+			A PatchGrid. Its coordinates are an int32 array of shape Nx4 with the
+			patches (ix, iy, x, y) row by row.
+		"""
 		# Assertions
 		if (imageWidth == None):
 			raise Exception("Image width cannot be empty.")
@@ -329,143 +502,101 @@ class ImagePreprocess(object):
 			padding = "VALID"
 		if (numberPatches == None):
 			numberPatches = (1, 1)
+		if (not (padding in ["VALID", "SAME", "VALID_FIT_ALL"])):
+			raise Exception("Type of padding not understood.")
 		# Get sliding window sizes
 		slideWindowWidth, slideWindowHeight = slideWindowSize[0], slideWindowSize[1]
 		if (slideWindowHeight > imageHeight):
 			print("WARNING: Slide window for height is too big. Setting it to image's height.")
 			slideWindowHeight = imageHeight - 1
-			# raise Exception("Slide window size is too big.")
 		if (slideWindowWidth > imageWidth):
 			print("WARNING: Slide window for width is too big. Setting it to image's width.")
-			# raise Exception("Slide window size is too big.")
 			slideWindowWidth = imageWidth - 1
 		# Get strides sizes
 		strideWidth, strideHeight = strideSize[0], strideSize[1]
 		if (strideHeight > imageHeight):
 			print("WARNING: Stride height is too big. Setting it to image's height.")
 			strideHeight = imageHeight - 1
-			#  raise Exception("Stride size is too big.")
 		if (strideWidth > imageWidth):
 			print("WARNING: Stride width is too big. Setting it to image's width.")
 			strideWidth = imageWidth - 1
-		# Start padding operation
-		if padding == "VALID":
-			startPixelsHeight = 0
-			endPixelsHeight = slideWindowHeight
-			startPixelsWidth = 0
-			endPixelsWidth = slideWindowWidth
-			patchesCoordinates = []
-			numberPatchesHeight, numberPatchesWidth = ImagePreprocess.get_valid_padding(slideWindowHeight,
-																								 strideHeight,
-																								 imageHeight,
-																								 slideWindowWidth,
-																								 strideWidth,
-																								 imageWidth)
-			# print("numberPatchesHeight: ", numberPatchesHeight, "numberPatchesWidth: ", numberPatchesWidth)
-			for i in range(numberPatchesHeight):
-				for j in range(numberPatchesWidth):
-					patchesCoordinates.append([startPixelsWidth,\
-													startPixelsHeight,\
-													endPixelsWidth,\
-													endPixelsHeight])
-					# Update width with strides
-					startPixelsWidth += strideWidth
-					endPixelsWidth += strideWidth
-				# Re-initialize the width parameters 
-				startPixelsWidth = 0
-				endPixelsWidth = slideWindowWidth
-				# Update height with height stride size
-				startPixelsHeight += strideHeight
-				endPixelsHeight += strideHeight
-			return patchesCoordinates,\
-					numberPatchesHeight,\
-					numberPatchesWidth
-		elif padding == "SAME":
-			startPixelsHeight = 0
-			endPixelsHeight = slideWindowHeight
-			startPixelsWidth = 0
-			endPixelsWidth = slideWindowWidth
-			patchesCoordinates = []
-			# Modify image tensor
+		zeros_h, zeros_w = 0, 0
+		if (padding == "SAME"):
 			zeros_h, zeros_w = ImagePreprocess.get_same_padding(slideWindowHeight,
 																				 strideHeight,
 																				 imageHeight,
 																				 slideWindowWidth,
 																				 strideWidth,
 																				 imageWidth)
-			imageWidth += zeros_w
-			imageHeight += zeros_h
-			# Valid padding stride should fit exactly
-			numberPatchesHeight, numberPatchesWidth = ImagePreprocess.get_valid_padding(slideWindowHeight,
-																		 strideHeight,
-																		 imageHeight,
-																		 slideWindowWidth,
-																		 strideWidth,
-																		 imageWidth)
-			for i in range(numberPatchesHeight):
-				for j in range(numberPatchesWidth):
-					patchesCoordinates.append([startPixelsWidth,\
-													startPixelsHeight,\
-													endPixelsWidth,\
-													endPixelsHeight])
-					# Update width with strides
-					startPixelsWidth += strideWidth
-					endPixelsWidth += strideWidth
-				# Re-initialize the width parameters 
-				startPixelsWidth = 0
-				endPixelsWidth = slideWindowWidth
-				# Update height with height stride size
-				startPixelsHeight += strideHeight
-				endPixelsHeight += strideHeight
-			return patchesCoordinates,\
-					numberPatchesHeight,\
-					numberPatchesWidth,\
-					zeros_h,\
-					zeros_w
-
-		elif padding == "VALID_FIT_ALL":
-			# Get number of patches
-			patchesCols = numberPatches[0]
-			patchesRows = numberPatches[1]
+		elif (padding == "VALID_FIT_ALL"):
 			# Determine the size of the windows for the patches
-			strideHeight = math.floor(imageHeight / patchesRows)
+			strideHeight = math.floor(imageHeight / numberPatches[1])
 			slideWindowHeight = strideHeight
-			strideWidth = math.floor(imageWidth / patchesCols)
+			strideWidth = math.floor(imageWidth / numberPatches[0])
 			slideWindowWidth = strideWidth
-			#print("Size: ", strideHeigth, slideWindowHeight, strideWidth, slideWindowWidth)
-			# Get valid padding
-			startPixelsHeight = 0
-			endPixelsHeight = slideWindowHeight
-			startPixelsWidth = 0
-			endPixelsWidth = slideWindowWidth
-			patchesCoordinates = []
-			numberPatchesHeight, numberPatchesWidth = ImagePreprocess.get_valid_padding(slideWindowHeight,
-																		 strideHeight,
-																		 imageHeight,
-																		 slideWindowWidth,
-																		 strideWidth,
-																		 imageWidth)
-			#print("numberPatchesHeight: ", numberPatchesHeight, "numberPatchesWidth: ", numberPatchesWidth)
-			for i in range(numberPatchesHeight):
-				for j in range(numberPatchesWidth):
-					patchesCoordinates.append([startPixelsWidth,\
-													startPixelsHeight,\
-													endPixelsWidth,\
-													endPixelsHeight])
-					# Update width with strides
-					startPixelsWidth += strideWidth
-					endPixelsWidth += strideWidth
-				# Re-initialize the width parameters
-				startPixelsWidth = 0
-				endPixelsWidth = strideWidth
-				# Update height with height stride size
-				startPixelsHeight += strideHeight
-				endPixelsHeight += strideHeight
-			return patchesCoordinates,\
-					numberPatchesHeight,\
-					numberPatchesWidth
-		else:
-			raise Exception("Type of padding not understood.")
+		numberPatchesHeight, numberPatchesWidth = ImagePreprocess.get_valid_padding(slideWindowHeight,
+																	 strideHeight,
+																	 imageHeight + zeros_h,
+																	 slideWindowWidth,
+																	 strideWidth,
+																	 imageWidth + zeros_w)
+		# Patches row by row.
+		iy, ix = np.meshgrid(np.arange(numberPatchesHeight, dtype = np.int32) * strideHeight,
+												np.arange(numberPatchesWidth, dtype = np.int32) * strideWidth, indexing = "ij")
+		coordinates = np.stack([ix.ravel(), iy.ravel(), ix.ravel() + slideWindowWidth, \
+														iy.ravel() + slideWindowHeight], axis = 1).astype(np.int32)
+		return PatchGrid(coordinates = coordinates,
+										numberPatchesHeight = numberPatchesHeight,
+										numberPatchesWidth = numberPatchesWidth,
+										zerosHeight = zeros_h,
+										zerosWidth = zeros_w,
+										slideWindowSize = (slideWindowWidth, slideWindowHeight),
+										strideSize = (strideWidth, strideHeight),
+										padding = padding)
+
+	def patchView(self, frame = None, slideWindowSize = None, strideSize = None, padding = None, numberPatches = None, borderMode = None):
+		"""
+		Divides a frame into the patches of divideIntoPatches without copying them.
+		Args:
+			frame: A tensor that contains an image.
+			slideWindowSize: A tuple (width, height) that represents the size
+													of the sliding window.
+			strideSize: A tuple (width, height) that represents the amount
+									of pixels to move on height and width direction.
+			padding: A string ("VALID", "SAME", "VALID_FIT_ALL") that tells the type of
+								padding. SAME pads the frame once, then the patches are a
+								view of the padded frame.
+			numberPatches: A tuple (numberWidth, numberHeight) that 
+												contains the number of patches in each axis.
+			borderMode: A string in borderModes used by SAME padding. Default is constant.
+		Returns:
+			A PatchGrid and a read-only view of the frame of shape
+			(numberPatchesHeight, numberPatchesWidth, height, width) + frame.shape[2:].
+			The patch (i, j) of the view is the patch i*numberPatchesWidth + j of
+			the coordinates.
+		"""
+		# Assertions
+		if (frame is None):
+			raise ValueError("Frame cannot be empty.")
+		# Logic
+		grid = self.computePatchGrid(imageWidth = frame.shape[1],
+																imageHeight = frame.shape[0],
+																slideWindowSize = slideWindowSize,
+																strideSize = strideSize,
+																padding = padding,
+																numberPatches = numberPatches)
+		if ((grid.zerosHeight > 0) or (grid.zerosWidth > 0)):
+			frame = ImagePreprocess.lazySAMEpad(frame = frame,
+																					zeros_h = grid.zerosHeight,
+																					zeros_w = grid.zerosWidth,
+																					borderMode = borderMode)
+		slideWindowWidth, slideWindowHeight = grid.slideWindowSize
+		strideWidth, strideHeight = grid.strideSize
+		view = sliding_window_view(frame, (slideWindowHeight, slideWindowWidth), axis = (0, 1))
+		view = view[::max(strideHeight, 1), ::max(strideWidth, 1)][:grid.numberPatchesHeight, :grid.numberPatchesWidth]
+		# The window axes go before the channels.
+		view = np.moveaxis(view, [-2, -1], [2, 3])
+		return grid, view
 
 	@staticmethod
 	def get_valid_padding(slide_window_height = None, stride_height = None, image_height = None, slide_window_width = None, stride_width = None, image_width = None):
@@ -486,24 +617,12 @@ class ImagePreprocess(object):
 			A tuple containing the number of patches in the height and 
 				and the width dimension.
 		"""
-		number_patches_height = 0
-		number_patches_width = 0
-		while(True):
-			if slide_window_height <= image_height:
-				slide_window_height += stride_height
-				number_patches_height += 1
-			elif slide_window_height > image_height:
-				break
-			else:
-				continue
-		while(True):
-			if slide_window_width <= image_width:
-				slide_window_width += stride_width
-				number_patches_width += 1	
-			elif slide_window_width > image_width:
-				break
-			else:
-				continue
+		if ((stride_height <= 0) or (stride_width <= 0)):
+			raise ValueError("Stride size has to be greater than 0.")
+		number_patches_height = ((image_height - slide_window_height) // stride_height + 1) \
+														if (slide_window_height <= image_height) else 0
+		number_patches_width = ((image_width - slide_window_width) // stride_width + 1) \
+														if (slide_window_width <= image_width) else 0
 		return (number_patches_height, number_patches_width)
 
 	@staticmethod
@@ -525,26 +644,15 @@ class ImagePreprocess(object):
 					to add in the height dimension and the amount of zeros
 					to add in the width dimension. 
 		"""
-		# Initialize auxiliar variables
-		number_patches_height = 0
-		number_patches_width = 0
 		# Calculate the number of patches that fit
-		while(True):
-			if slide_window_height <= image_height:
-				slide_window_height += stride_height
-				number_patches_height += 1
-			elif slide_window_height > image_height:
-				break
-			else:
-				continue
-		while(True):
-			if slide_window_width <= image_width:
-				slide_window_width += stride_width
-				number_patches_width += 1	
-			elif slide_window_width > image_width:
-				break
-			else:
-				continue
+		number_patches_height, number_patches_width = ImagePreprocess.get_valid_padding(slide_window_height,
+																		stride_height,
+																		image_height,
+																		slide_window_width,
+																		stride_width,
+																		image_width)
+		slide_window_height += number_patches_height * stride_height
+		slide_window_width += number_patches_width * stride_width
 		# Fix the excess in slide_window
 		slide_window_height -= stride_height
 		slide_window_width -= stride_width
@@ -570,7 +678,7 @@ class ImagePreprocess(object):
 		return (zeros_h, zeros_w)
 
 	@staticmethod
-	def lazySAMEpad(frame = None, zeros_h = None, zeros_w = None, padding_type = "ONE_SIDE"):
+	def lazySAMEpad(frame = None, zeros_h = None, zeros_w = None, padding_type = "ONE_SIDE", borderMode = None):
 		"""
 		Given an image and the number of zeros to be added in height 
 		and width dimensions, this function fills the image with the 
@@ -581,49 +689,134 @@ class ImagePreprocess(object):
 		:param zeros_w: int that represents the amount of zeros to be added 
 						in the width dimension
 		:param padding_type: string that determines the side where to pad the image.
-						If BOTH_SIDES, then padding is applied to both sides.
+						If BOTH_SIDES, then padding is applied to both sides. An odd amount
+						of zeros is rounded up to be split evenly.
 						If ONE_SIDE, then padding is applied to the right and the bottom.
 						Default: ONE_SIDE
-		: return: a new opencv image with the added zeros
+		:param borderMode: string in borderModes. Default: constant
+		: return: a new opencv image with the added zeros and the dtype of frame
 		"""
 		if padding_type == "BOTH_SIDES":
-			rows, cols, d = frame.shape
-			# If height is even or odd
-			if (zeros_h % 2 == 0):
-				zeros_h = int(zeros_h/2)
-				frame = r_[np.zeros((zeros_h, cols, 3)), frame,\
-							np.zeros((zeros_h, cols, 3))]
-			else:
-				zeros_h += 1
-				zeros_h = int(zeros_h/2)
-				frame = r_[np.zeros((zeros_h, cols, 3)), frame,\
-							np.zeros((zeros_h, cols, 3))]
-
-			rows, cols, d = frame.shape
-			# If width is even or odd 
-			if (zeros_w % 2 == 0):
-				zeros_w = int(zeros_w/2)
-				# Container 
-				container = np.zeros((rows,(zeros_w*2+cols),3), np.uint8)
-				container[:,zeros_w:container.shape[1]-zeros_w:,:] = frame
-				frame = container #c_[np.zeros((rows, zeros_w)), frame, np.zeros((rows, zeros_w))]
-			else:
-				zeros_w += 1
-				zeros_w = int(zeros_w/2)
-				container = np.zeros((rows, (zeros_w*2+cols), 3), np.uint8)
-				container[:, zeros_w:container.shape[1]-zeros_w:, :] = frame
-				frame = container #c_[np.zeros((rows, zeros_w, 3)), frame, np.zeros((rows, zeros_w, 3))]
-			return frame
+			zeros_h = (zeros_h + 1) // 2
+			zeros_w = (zeros_w + 1) // 2
+			return ImagePreprocess.padFrame(frame = frame, top = zeros_h, bottom = zeros_h, \
+																			left = zeros_w, right = zeros_w, borderMode = borderMode)
 		elif padding_type == "ONE_SIDE":
-			rows, cols, d = frame.shape
-			# Pad height dimension
-			frame = r_[frame, np.zeros((zeros_h, cols, 3))]
-			# Pad width dimension
-			rows, cols, d = frame.shape
-			container = np.zeros((rows, cols + zeros_w, 3), np.uint8)
-			container[:, :cols, :] = frame
-			container[:, cols:, :] = np.zeros((rows, zeros_w, 3), np.uint8)
-			return container
+			return ImagePreprocess.padFrame(frame = frame, top = 0, bottom = zeros_h, \
+																			left = 0, right = zeros_w, borderMode = borderMode)
+		else:
+			raise ValueError("Type of padding not understood.")
+
+	@staticmethod
+	def padFrame(frame = None, top = None, bottom = None, left = None, right = None, borderMode = None, value = None):
+		"""
+		Pads a frame. The padded frame is allocated once with the dtype of the
+		frame, the frame is copied into it and only the borders are filled.
+		Args:
+			frame: A tensor that contains an image of shape HxW or HxWxC.
+			top, bottom, left, right: Ints with the amount of pixels added to each side.
+			borderMode: A string in borderModes. constant fills the borders with value,
+									reflect mirrors the frame without repeating its edge (dcb|abcd|cba)
+									and replicate repeats its edge (aaa|abcd|ddd). Default is constant.
+			value: A number used by constant. Default is 0.
+		Returns:
+			A tensor that contains the padded frame.
+		"""
+		# Assertions
+		if (frame is None):
+			raise ValueError("Frame cannot be empty.")
+		if (borderMode == None):
+			borderMode = "constant"
+		if (not (borderMode in borderModes)):
+			raise ValueError("borderMode has to be one of {}.".format(borderModes))
+		if (value == None):
+			value = 0
+		top, bottom, left, right = [int(each) if (each != None) else 0 for each in [top, bottom, left, right]]
+		if (min([top, bottom, left, right]) < 0):
+			raise ValueError("Padding cannot be negative.")
+		height, width = frame.shape[:2]
+		if ((height == 0) or (width == 0)):
+			raise ValueError("Frame cannot be empty.")
+		if ((borderMode == "reflect") and ((max(top, bottom) >= height) or (max(left, right) >= width))):
+			raise ValueError("Reflect padding has to be smaller than the frame.")
+		# Local variables
+		padded = np.empty((top + height + bottom, left + width + right) + frame.shape[2:], frame.dtype)
+		padded[top:top + height, left:left + width] = frame
+		# Logic
+		# Rows first, then the columns of the whole height so the corners are filled.
+		columns = slice(left, left + width)
+		bottomStart, rightStart = top + height, left + width
+		if (borderMode == "constant"):
+			padded[:top, columns] = value
+			padded[bottomStart:, columns] = value
+			padded[:, :left] = value
+			padded[:, rightStart:] = value
+		elif (borderMode == "replicate"):
+			padded[:top, columns] = padded[top:top + 1, columns]
+			padded[bottomStart:, columns] = padded[bottomStart - 1:bottomStart, columns]
+			padded[:, :left] = padded[:, left:left + 1]
+			padded[:, rightStart:] = padded[:, rightStart - 1:rightStart]
+		else:
+			# A negative stop of a reversed slice has to be None to reach the first pixel.
+			bottomStop, rightStop = bottomStart - 2 - bottom, rightStart - 2 - right
+			padded[:top, columns] = padded[2*top:top:-1, columns]
+			padded[bottomStart:, columns] = padded[bottomStart - 2:(bottomStop if (bottomStop >= 0) else None):-1, columns]
+			padded[:, :left] = padded[:, 2*left:left:-1]
+			padded[:, rightStart:] = padded[:, rightStart - 2:(rightStop if (rightStop >= 0) else None):-1]
+		return padded
+
+class BoundingBoxIndex(object):
+	def __init__(self, boundingBoxes = None):
+		"""
+		An index of bounding boxes sorted by xmin. A query only tests the boxes
+		whose xmin is in the columns of the query.
+		Args:
+			boundingBoxes: A list of lists or a numpy array of shape Nx4 that contains
+											the coordinates of the bounding boxes.
+		Returns:
+			None
+		"""
+		super(BoundingBoxIndex, self).__init__()
+		# Class variables
+		self.boundingBoxes = np.array(boundingBoxes, np.int64).reshape(-1, 4)
+		self.byX = np.argsort(self.boundingBoxes[:, 0], kind = "stable")
+		self.sortedX = self.boundingBoxes[self.byX, 0]
+
+	@property
+	def propertyBoundingBoxes(self):
+		return self.boundingBoxes
+
+	def inside(self, edges = None):
+		"""
+		Finds the bounding boxes inside a region.
+		Args:
+			edges: A list of ints [xmin, ymin, xmax, ymax].
+		Returns:
+			An int64 numpy array with the sorted indices of the bounding boxes.
+		"""
+		xmin, ymin, xmax, ymax = edges
+		candidates = self.byX[np.searchsorted(self.sortedX, xmin, "left"):np.searchsorted(self.sortedX, xmax, "right")]
+		candidateBoxes = self.boundingBoxes[candidates]
+		inside = (candidateBoxes[:, 2] <= xmax) & (candidateBoxes[:, 1] >= ymin) & \
+							(candidateBoxes[:, 3] <= ymax)
+		return np.sort(candidates[inside])
+
+def unionArea(rectangles = None):
+	"""
+	Computes the area covered by a set of rectangles. The plane is divided in
+	the cells of the edges of the rectangles.
+	Args:
+		rectangles: A list of lists [xmin, ymin, xmax, ymax].
+	Returns:
+		An int that contains the area.
+	"""
+	rectangles = np.array(rectangles, np.int64).reshape(-1, 4)
+	xs = np.unique(rectangles[:, [0, 2]])
+	ys = np.unique(rectangles[:, [1, 3]])
+	cells = np.zeros([max(len(ys) - 1, 0), max(len(xs) - 1, 0)], bool)
+	for xmin, ymin, xmax, ymax in rectangles:
+		cells[np.searchsorted(ys, ymin):np.searchsorted(ys, ymax), np.searchsorted(xs, xmin):np.searchsorted(xs, xmax)] = True
+	return int((np.diff(ys)[:, None] * np.diff(xs)[None, :])[cells].sum())
 
 def drawGrid(frame = None, patches = None, patchesLabels = None):
 	"""
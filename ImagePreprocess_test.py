@@ -79,5 +79,93 @@ class ImageProcess_test(unittest.TestCase):
 		#   self.assertLessEqual(bdx[2], frameWidth, "Xmax is negative")
 		#   self.assertLessEqual(bdx[3], frameHeight, "Ymax is negative")
 
+	def test_groupBoundingBoxes(self):
+		rng = np.random.RandomState(0)
+		ix, iy = rng.randint(0, 560, 50), rng.randint(0, 400, 50)
+		bndboxes = np.stack([ix, iy, ix + rng.randint(1, 60, 50), iy + rng.randint(1, 60, 50)], axis = 1)
+		rois = self.prep.groupBoundingBoxes(frameHeight = 480,
+																				frameWidth = 640,
+																				boundingBoxes = bndboxes,
+																				offset = [150, 150])
+		# Every box is in a roi and the rois contain the same boxes as includeBoundingBoxes.
+		self.assertEqual(sorted(set(np.concatenate([indices for edges, indices in rois]).tolist())), list(range(50)))
+		for edges, indices in rois:
+			newBoundingBoxes, newNames = self.prep.includeBoundingBoxes(edges = edges,
+																							boundingBoxes = bndboxes.tolist(),
+																							names = list(range(50)))
+			self.assertEqual(newNames, indices.tolist())
+		# Boxes with the same module are visited in the order they are given.
+		rois = self.prep.groupBoundingBoxes(frameHeight = 480,
+																				frameWidth = 640,
+																				boundingBoxes = [[400, 300, 410, 310], [300, 400, 310, 410]],
+																				offset = [50, 50])
+		self.assertEqual([indices.tolist() for edges, indices in rois], [[0], [1]])
+
+	def test_coverBoundingBoxes(self):
+		rng = np.random.RandomState(0)
+		ix, iy = rng.randint(0, 560, 50), rng.randint(0, 400, 50)
+		bndboxes = np.stack([ix, iy, ix + rng.randint(1, 60, 50), iy + rng.randint(1, 60, 50)], axis = 1)
+		rois = self.prep.coverBoundingBoxes(frameHeight = 480,
+																				frameWidth = 640,
+																				boundingBoxes = bndboxes,
+																				offset = [150, 150])
+		self.assertEqual(sorted(set(np.concatenate([indices for edges, indices in rois]).tolist())), list(range(50)))
+		for edges, indices in rois:
+			self.assertEqual([edges[2] - edges[0], edges[3] - edges[1]], [150, 150])
+			newBoundingBoxes, newNames = self.prep.includeBoundingBoxes(edges = edges,
+																							boundingBoxes = bndboxes.tolist(),
+																							names = list(range(50)))
+			self.assertEqual(newNames, indices.tolist())
+		self.assertLessEqual(len(rois), len(self.prep.groupBoundingBoxes(frameHeight = 480,
+																																		frameWidth = 640,
+																																		boundingBoxes = bndboxes,
+																																		offset = [150, 150])))
+
+	def test_unionArea(self):
+		self.assertEqual(unionArea(rectangles = []), 0)
+		self.assertEqual(unionArea(rectangles = [[0, 0, 10, 10], [5, 5, 15, 15], [0, 0, 2, 2]]), 175)
+
+	def test_patchView(self):
+		frame = np.random.RandomState(0).randint(0, 255, (480, 640, 3)).astype(np.uint8)
+		for padding in ["VALID", "SAME", "VALID_FIT_ALL"]:
+			patches = self.prep.divideIntoPatches(imageWidth = 640,
+																						imageHeight = 480,
+																						slideWindowSize = (100, 120),
+																						strideSize = (50, 60),
+																						padding = padding,
+																						numberPatches = (3, 2))[0]
+			grid, view = self.prep.patchView(frame = frame,
+																			slideWindowSize = (100, 120),
+																			strideSize = (50, 60),
+																			padding = padding,
+																			numberPatches = (3, 2))
+			self.assertEqual(grid.coordinates.dtype, np.int32)
+			self.assertEqual(grid.coordinates.tolist(), patches)
+			self.assertEqual(view.shape[:2], (grid.numberPatchesHeight, grid.numberPatchesWidth))
+			self.assertFalse(view.flags.writeable)
+			padded = np.zeros((480 + grid.zerosHeight, 640 + grid.zerosWidth, 3), np.uint8)
+			padded[:480, :640] = frame
+			for k, (ix, iy, x, y) in enumerate(patches):
+				self.assertTrue(np.array_equal(view[k // grid.numberPatchesWidth, k % grid.numberPatchesWidth], \
+																				padded[iy:y, ix:x]))
+		# VALID patches do not copy the frame.
+		grid, view = self.prep.patchView(frame = frame, slideWindowSize = (100, 100), strideSize = (100, 100))
+		self.assertTrue(np.shares_memory(view, frame))
+
+	def test_padFrame(self):
+		frame = np.random.RandomState(0).randint(0, 255, (7, 9, 3)).astype(np.uint8)
+		for borderMode, mode in [("constant", "constant"), ("replicate", "edge"), ("reflect", "reflect")]:
+			padded = ImagePreprocess.padFrame(frame = frame, top = 2, bottom = 6, left = 8, right = 3, borderMode = borderMode)
+			self.assertEqual(padded.dtype, np.uint8)
+			self.assertTrue(np.array_equal(padded, np.pad(frame, [(2, 6), (8, 3), (0, 0)], mode = mode)))
+		with self.assertRaises(ValueError):
+			ImagePreprocess.padFrame(frame = frame, top = 7, borderMode = "reflect")
+		# SAME padding keeps the dtype of the frame.
+		padded = ImagePreprocess.lazySAMEpad(frame = frame, zeros_h = 3, zeros_w = 1)
+		self.assertEqual(padded.dtype, np.uint8)
+		self.assertTrue(np.array_equal(padded, np.pad(frame, [(0, 3), (0, 1), (0, 0)])))
+		padded = ImagePreprocess.lazySAMEpad(frame = frame, zeros_h = 3, zeros_w = 1, padding_type = "BOTH_SIDES")
+		self.assertTrue(np.array_equal(padded, np.pad(frame, [(2, 2), (1, 1), (0, 0)])))
+
 if __name__ == "__main__":
 	unittest.main()
@@ -0,0 +1,311 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Opt-in timing and counters of the stages of the dataset
+methods: reading and decoding images, parsing annotations, every
+augmenter, encoding and writing images and writing annotations. Every
+process records into its own Instrumentation, the dataset methods merge
+the snapshots of their workers into the one of the caller. The results
+can be exported as json or as Prometheus text.
+"""
+import os
+import time
+import json
+import bisect
+import threading
+
+# Upper bounds in seconds of the buckets of the histograms. The last bucket
+# of a histogram counts the stages that took longer.
+histogramBounds = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, \
+									0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+class Instrumentation(object):
+	def __init__(self):
+		"""
+		Records the stages and the counters of a process. Disabled by default,
+		a disabled Instrumentation records nothing.
+		Args:
+			None
+		Returns:
+			None
+		"""
+		super(Instrumentation, self).__init__()
+		# Class variables
+		self.enabled = False
+		self.stages = {}
+		self.counters = {}
+		# Sinks record from their writer threads.
+		self.lock = threading.Lock()
+
+	@property
+	def propertyEnabled(self):
+		return self.enabled
+
+	@property
+	def propertyStages(self):
+		return self.stages
+
+	@property
+	def propertyCounters(self):
+		return self.counters
+
+	def enable(self, enabled = None):
+		"""
+		Enables or disables the recording. The recorded values are kept.
+		Args:
+			enabled: A boolean. Default is True.
+		Returns:
+			None
+		"""
+		self.enabled = True if (enabled == None) else bool(enabled)
+
+	def reset(self):
+		"""
+		Removes the recorded values.
+		Args:
+			None
+		Returns:
+			None
+		"""
+		with self.lock:
+			self.stages = {}
+			self.counters = {}
+
+	def stage(self, name = None):
+		"""
+		Times a stage.
+			with instrumentation.stage("imwrite") as stage:
+				cv2.imwrite(path, frame)
+				stage.addFileBytes(path)
+		Args:
+			name: A string with the name of the stage.
+		Returns:
+			A context manager.
+		"""
+		if (not self.enabled):
+			return disabledStage
+		return StageTimer(instrumentation = self, name = name)
+
+	def record(self, name = None, seconds = None, bytes = None):
+		"""
+		Records a stage that has been timed.
+		Args:
+			name: A string with the name of the stage.
+			seconds: A float with the duration of the stage.
+			bytes: An int with the bytes read or written by the stage. Default is 0.
+		Returns:
+			None
+		"""
+		if (not self.enabled):
+			return
+		with self.lock:
+			stage = self.stages.get(name)
+			if (stage == None):
+				stage = {"count": 0, "seconds": 0.0, "bytes": 0, "buckets": [0] * (len(histogramBounds) + 1)}
+				self.stages[name] = stage
+			stage["count"] += 1
+			stage["seconds"] += seconds
+			stage["bytes"] += 0 if (bytes == None) else int(bytes)
+			stage["buckets"][bisect.bisect_left(histogramBounds, seconds)] += 1
+
+	def count(self, name = None, value = None):
+		"""
+		Increments a counter.
+		Args:
+			name: A string with the name of the counter.
+			value: An int. Default is 1.
+		Returns:
+			None
+		"""
+		if (not self.enabled):
+			return
+		with self.lock:
+			self.counters[name] = self.counters.get(name, 0) + (1 if (value == None) else value)
+
+	def snapshot(self):
+		"""
+		A copy of the recorded values that can be pickled.
+		Args:
+			None
+		Returns:
+			A dictionary with the keys "stages" and "counters".
+		"""
+		with self.lock:
+			return {"stages": {name: dict(stage, buckets = list(stage["buckets"])) for name, stage in self.stages.items()},
+							"counters": dict(self.counters)}
+
+	def merge(self, snapshot = None):
+		"""
+		Adds the values of a snapshot, usually the one of a worker, even if this
+		Instrumentation is disabled.
+		Args:
+			snapshot: A dictionary returned by snapshot or subtractSnapshots.
+		Returns:
+			None
+		"""
+		with self.lock:
+			for name, other in snapshot["stages"].items():
+				stage = self.stages.setdefault(name, {"count": 0, "seconds": 0.0, "bytes": 0, \
+																							"buckets": [0] * (len(histogramBounds) + 1)})
+				stage["count"] += other["count"]
+				stage["seconds"] += other["seconds"]
+				stage["bytes"] += other["bytes"]
+				stage["buckets"] = [a + b for a, b in zip(stage["buckets"], other["buckets"])]
+			for name, value in snapshot["counters"].items():
+				self.counters[name] = self.counters.get(name, 0) + value
+
+	def report(self):
+		"""
+		The recorded values with the mean duration of every stage and the decodes
+		per image.
+		Args:
+			None
+		Returns:
+			A dictionary with the keys "stages", "counters" and "decodesPerImage".
+		"""
+		report = self.snapshot()
+		for stage in report["stages"].values():
+			stage["meanSeconds"] = stage["seconds"] / stage["count"] if (stage["count"] > 0) else 0.0
+		images = report["counters"].get("images", 0)
+		report["decodesPerImage"] = report["counters"].get("decodes", 0) / images if (images > 0) else None
+		report["histogramBounds"] = list(histogramBounds)
+		return report
+
+	def toJson(self):
+		"""
+		Exports the report as json.
+		Args:
+			None
+		Returns:
+			A string.
+		"""
+		return json.dumps(self.report(), indent = 2, sort_keys = True)
+
+	def toPrometheus(self, prefix = None):
+		"""
+		Exports the recorded values in the Prometheus text format: a histogram
+		<prefix>_stage_seconds and a counter <prefix>_stage_bytes_total with a
+		stage label, and a counter <prefix>_<name>_total for every counter.
+		Args:
+			prefix: A string that starts the names of the metrics. Default is "impy".
+		Returns:
+			A string.
+		"""
+		if (prefix == None):
+			prefix = "impy"
+		snapshot = self.snapshot()
+		stages = sorted(snapshot["stages"].items())
+		lines = ["# HELP {}_stage_seconds Duration of the stages.".format(prefix),
+						"# TYPE {}_stage_seconds histogram".format(prefix)]
+		for name, stage in stages:
+			label = escapeLabel(value = name)
+			cumulative = 0
+			for bound, count in zip(histogramBounds + ["+Inf"], stage["buckets"]):
+				cumulative += count
+				lines.append("{}_stage_seconds_bucket{{stage=\"{}\",le=\"{}\"}} {}".format(prefix, label, bound, cumulative))
+			lines.append("{}_stage_seconds_sum{{stage=\"{}\"}} {!r}".format(prefix, label, stage["seconds"]))
+			lines.append("{}_stage_seconds_count{{stage=\"{}\"}} {}".format(prefix, label, stage["count"]))
+		lines.extend(["# HELP {}_stage_bytes_total Bytes read or written by the stages.".format(prefix),
+									"# TYPE {}_stage_bytes_total counter".format(prefix)])
+		for name, stage in stages:
+			lines.append("{}_stage_bytes_total{{stage=\"{}\"}} {}".format(prefix, escapeLabel(value = name), stage["bytes"]))
+		for name, value in sorted(snapshot["counters"].items()):
+			lines.extend(["# TYPE {}_{}_total counter".format(prefix, name),
+										"{}_{}_total {}".format(prefix, name, value)])
+		return "\n".join(lines) + "\n"
+
+class StageTimer(object):
+	__slots__ = ["instrumentation", "name", "start", "bytes"]
+
+	def __init__(self, instrumentation = None, name = None):
+		"""
+		Times a stage for Instrumentation.stage.
+		"""
+		self.instrumentation = instrumentation
+		self.name = name
+		self.start = None
+		self.bytes = 0
+
+	def addBytes(self, bytes = None):
+		self.bytes += bytes
+
+	def addFileBytes(self, path = None):
+		# The size of a file that has been read or written, if it exists.
+		try:
+			self.bytes += os.path.getsize(path)
+		except OSError:
+			pass
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *args):
+		self.instrumentation.record(name = self.name, seconds = time.perf_counter() - self.start, bytes = self.bytes)
+
+class DisabledStage(object):
+	"""
+	The stage of a disabled Instrumentation, it records nothing.
+	"""
+	def addBytes(self, bytes = None):
+		pass
+
+	def addFileBytes(self, path = None):
+		pass
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		pass
+
+disabledStage = DisabledStage()
+
+def subtractSnapshots(after = None, before = None):
+	"""
+	The values recorded between two snapshots of the same Instrumentation.
+	Args:
+		after: A dictionary returned by snapshot.
+		before: A dictionary returned by an earlier snapshot.
+	Returns:
+		A dictionary with the format of snapshot.
+	"""
+	stages = {}
+	for name, stage in after["stages"].items():
+		previous = before["stages"].get(name)
+		if (previous == None):
+			stages[name] = stage
+		elif (stage["count"] > previous["count"]):
+			stages[name] = {"count": stage["count"] - previous["count"],
+											"seconds": stage["seconds"] - previous["seconds"],
+											"bytes": stage["bytes"] - previous["bytes"],
+											"buckets": [a - b for a, b in zip(stage["buckets"], previous["buckets"])]}
+	counters = {name: value - before["counters"].get(name, 0) for name, value in after["counters"].items() \
+							if (value != before["counters"].get(name, 0))}
+	return {"stages": stages, "counters": counters}
+
+def escapeLabel(value = None):
+	"""
+	Escapes the value of a Prometheus label.
+	"""
+	return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+# The Instrumentation of this process.
+instrumentation = Instrumentation()
+
+def getInstrumentation():
+	"""
+	Returns the Instrumentation of this process.
+	"""
+	return instrumentation
+
+def enableInstrumentation(enabled = None):
+	"""
+	Enables the Instrumentation of this process. The workers of the dataset
+	methods record when the caller does.
+	Args:
+		enabled: A boolean. Default is True.
+	Returns:
+		None
+	"""
+	instrumentation.enable(enabled = enabled)
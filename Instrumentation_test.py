@@ -0,0 +1,82 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Unit tests for Instrumentation.
+"""
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from Instrumentation import *
+
+class Instrumentation_test(unittest.TestCase):
+
+	def setUp(self):
+		self.root = tempfile.mkdtemp()
+		self.instrumentation = Instrumentation()
+
+	def tearDown(self):
+		shutil.rmtree(self.root)
+
+	def test_disabled(self):
+		with self.instrumentation.stage("imread") as stage:
+			stage.addBytes(10)
+		self.instrumentation.count("images")
+		self.assertEqual(self.instrumentation.snapshot(), {"stages": {}, "counters": {}})
+
+	def test_record(self):
+		self.instrumentation.enable()
+		path = os.path.join(self.root, "a.bin")
+		with open(path, "wb") as f:
+			f.write(b"0" * 100)
+		with self.instrumentation.stage("imread") as stage:
+			stage.addFileBytes(path)
+			stage.addFileBytes(os.path.join(self.root, "missing.bin"))
+		self.instrumentation.record(name = "imread", seconds = 0.003, bytes = 50)
+		self.instrumentation.record(name = "imread", seconds = 100.0)
+		self.instrumentation.count("images", 2)
+		stage = self.instrumentation.propertyStages["imread"]
+		self.assertEqual((stage["count"], stage["bytes"]), (3, 150))
+		# One stage in the first bucket, one in (0.0025, 0.005] and one over the last bound.
+		self.assertEqual(stage["buckets"][0] + stage["buckets"][5] + stage["buckets"][-1], 3)
+		self.assertEqual(self.instrumentation.propertyCounters, {"images": 2})
+
+	def test_snapshots(self):
+		self.instrumentation.enable()
+		self.instrumentation.record(name = "imwrite", seconds = 0.01, bytes = 10)
+		self.instrumentation.count("decodes")
+		before = self.instrumentation.snapshot()
+		self.instrumentation.record(name = "imwrite", seconds = 0.02, bytes = 5)
+		self.instrumentation.record(name = "xmlWrite", seconds = 0.001)
+		self.instrumentation.count("images")
+		delta = subtractSnapshots(after = self.instrumentation.snapshot(), before = before)
+		self.assertEqual(sorted(delta["stages"]), ["imwrite", "xmlWrite"])
+		self.assertEqual((delta["stages"]["imwrite"]["count"], delta["stages"]["imwrite"]["bytes"]), (1, 5))
+		self.assertEqual(delta["counters"], {"images": 1})
+		# A disabled Instrumentation merges the snapshots of its workers.
+		parent = Instrumentation()
+		parent.merge(snapshot = delta)
+		parent.merge(snapshot = delta)
+		report = json.loads(parent.toJson())
+		self.assertEqual(report["stages"]["imwrite"]["count"], 2)
+		self.assertAlmostEqual(report["stages"]["imwrite"]["meanSeconds"], 0.02)
+		self.assertEqual(report["counters"], {"images": 2})
+		self.assertEqual(report["decodesPerImage"], 0)
+
+	def test_toPrometheus(self):
+		self.instrumentation.enable()
+		self.instrumentation.record(name = "imwrite", seconds = 0.003, bytes = 7)
+		self.instrumentation.record(name = "imwrite", seconds = 0.3)
+		self.instrumentation.count("images")
+		lines = self.instrumentation.toPrometheus(prefix = "test").splitlines()
+		self.assertTrue("# TYPE test_stage_seconds histogram" in lines)
+		self.assertTrue('test_stage_seconds_bucket{stage="imwrite",le="0.0025"} 0' in lines)
+		self.assertTrue('test_stage_seconds_bucket{stage="imwrite",le="0.005"} 1' in lines)
+		self.assertTrue('test_stage_seconds_bucket{stage="imwrite",le="+Inf"} 2' in lines)
+		self.assertTrue('test_stage_seconds_count{stage="imwrite"} 2' in lines)
+		self.assertTrue('test_stage_bytes_total{stage="imwrite"} 7' in lines)
+		self.assertTrue("test_images_total 1" in lines)
+
+if __name__ == "__main__":
+	unittest.main()
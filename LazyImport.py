@@ -0,0 +1,94 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Deferred imports of heavy dependencies. The modules of impy
+only call cv2 and tqdm inside their methods, so importing them loads
+neither of them until the first image is read or the first progress bar
+is shown. This keeps the import of the package, of the command line and
+of every worker process cheap.
+"""
+import sys
+import types
+import importlib
+
+class LazyModule(types.ModuleType):
+	def __init__(self, name = None):
+		"""
+		A module that is imported on the first access to one of its attributes.
+		Every access is forwarded to the imported module, so patching the module
+		(for example with unittest.mock) is seen through the LazyModule.
+		Args:
+			name: A string with the name of the module.
+		Returns:
+			None
+		"""
+		super(LazyModule, self).__init__(name)
+		self.__dict__["_module"] = None
+
+	def load(self):
+		"""
+		Imports the module.
+		Args:
+			None
+		Returns:
+			The module.
+		"""
+		module = self.__dict__["_module"]
+		if (module is None):
+			module = importlib.import_module(self.__name__)
+			self.__dict__["_module"] = module
+		return module
+
+	def __getattr__(self, name):
+		return getattr(self.load(), name)
+
+	def __setattr__(self, name, value):
+		setattr(self.load(), name, value)
+
+	def __dir__(self):
+		return dir(self.load())
+
+	def __repr__(self):
+		return "<lazy module {} ({})>".format(self.__name__, "loaded" if (self.__dict__["_module"] is not None) else "not loaded")
+
+class LazyCallable(object):
+	def __init__(self, module = None, name = None):
+		"""
+		A function or a class of a module that is imported on the first call.
+		Args:
+			module: A string with the name of the module.
+			name: A string with the name of the callable in the module.
+		Returns:
+			None
+		"""
+		super(LazyCallable, self).__init__()
+		self.module = LazyModule(name = module)
+		self.name = name
+
+	def __call__(self, *args, **kwargs):
+		return getattr(self.module, self.name)(*args, **kwargs)
+
+def lazyImport(name = None):
+	"""
+	Returns the module if it is already imported, otherwise a LazyModule.
+		cv2 = lazyImport("cv2")
+	Args:
+		name: A string with the name of the module.
+	Returns:
+		A module or a LazyModule.
+	"""
+	module = sys.modules.get(name)
+	return module if (module is not None) else LazyModule(name = name)
+
+def lazyCallable(module = None, name = None):
+	"""
+	Returns a function or a class of a module, imported on the first call.
+		tqdm = lazyCallable("tqdm", "tqdm")
+	Args:
+		module: A string with the name of the module.
+		name: A string with the name of the callable.
+	Returns:
+		A callable.
+	"""
+	loaded = sys.modules.get(module)
+	return getattr(loaded, name) if (loaded is not None) else LazyCallable(module = module, name = name)
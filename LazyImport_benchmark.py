@@ -0,0 +1,58 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Measures the import time of impy in new interpreters, as the
+command line and spawned workers pay it. "first use" also loads the
+dependencies that are imported lazily, which is what importing cost
+before they were deferred.
+Usage: python LazyImport_benchmark.py --repeat 10
+"""
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+# Statements timed in a new interpreter.
+statements = [["impy", "import impy"],
+							["impy.ImageLocalizationDataset", "import impy\nimpy.ImageLocalizationDataset"],
+							["ImageLocalizationDataset", "import ImageLocalizationDataset"],
+							["ImageDataset", "import ImageDataset"],
+							["first use", "import ImageLocalizationDataset\nImageLocalizationDataset.cv2.imread\n" + \
+														"ImageLocalizationDataset.multiprocessing.Pool\nimport tqdm"]]
+
+def timeStatement(statement = None, cwd = None, repeat = None):
+	"""
+	Times a statement in repeat new interpreters.
+	Args:
+		statement: A string with python code.
+		cwd: A string with the directory the interpreters run in.
+		repeat: An int.
+	Returns:
+		A float with the median of the milliseconds.
+	"""
+	code = "import time\nstart = time.perf_counter()\n{}\nprint(time.perf_counter() - start)".format(statement)
+	times = []
+	for i in range(repeat):
+		output = subprocess.check_output([sys.executable, "-c", code], cwd = cwd, stderr = subprocess.DEVNULL)
+		times.append(float(output) * 1000)
+	return statistics.median(times)
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--repeat", type = int, default = 10)
+	args = parser.parse_args()
+	directory = os.path.dirname(os.path.abspath(__file__))
+	# The package is imported through a link named impy.
+	root = tempfile.mkdtemp()
+	os.symlink(directory, os.path.join(root, "impy"))
+	try:
+		print("{:<32} {:>10}".format("import", "ms"))
+		for name, statement in statements:
+			milliseconds = timeStatement(statement = statement, cwd = root if (name.startswith("impy")) else directory, \
+																	repeat = args.repeat)
+			print("{:<32} {:>10.1f}".format(name, milliseconds))
+	finally:
+		shutil.rmtree(root)
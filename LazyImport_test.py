@@ -0,0 +1,59 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Unit tests for LazyImport.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import subprocess
+from unittest import mock
+from LazyImport import *
+
+def importedModules(statement = None, cwd = None):
+	"""
+	Runs statement in a new interpreter and returns the heavy modules it imported.
+	"""
+	code = "import sys\n{}\nprint(' '.join(sorted(m for m in ('cv2', 'tqdm', 'multiprocessing') if m in sys.modules)))"
+	output = subprocess.check_output([sys.executable, "-c", code.format(statement)], \
+																		cwd = os.path.dirname(os.path.abspath(__file__)) if (cwd == None) else cwd, \
+																		stderr = subprocess.DEVNULL)
+	return output.decode().split()
+
+class LazyImport_test(unittest.TestCase):
+
+	def test_lazyModule(self):
+		module = LazyModule(name = "colorsys")
+		self.assertIn("not loaded", repr(module))
+		self.assertEqual(module.rgb_to_hsv(1.0, 0.0, 0.0), (0.0, 1.0, 1.0))
+		self.assertIn("rgb_to_hsv", dir(module))
+		# Patches of the module are seen through the LazyModule.
+		with mock.patch("colorsys.rgb_to_hsv", return_value = None):
+			self.assertIsNone(module.rgb_to_hsv(1.0, 0.0, 0.0))
+		self.assertIs(lazyImport("os"), os)
+		with self.assertRaises(AttributeError):
+			module.missing
+
+	def test_lazyCallable(self):
+		function = LazyCallable(module = "colorsys", name = "hsv_to_rgb")
+		self.assertEqual(function(0.0, 1.0, 1.0), (1.0, 0.0, 0.0))
+		self.assertIs(lazyCallable("os.path", "join"), os.path.join)
+
+	def test_importDataset(self):
+		self.assertEqual(importedModules("import ImageLocalizationDataset, ImageDataset"), [])
+		self.assertEqual(importedModules("import ImageLocalizationDataset\nImageLocalizationDataset.cv2.imread"), ["cv2"])
+
+	def test_importPackage(self):
+		root = tempfile.mkdtemp()
+		try:
+			os.symlink(os.path.dirname(os.path.abspath(__file__)), os.path.join(root, "impy"))
+			self.assertEqual(importedModules("import impy\nassert 'numpy' not in sys.modules", cwd = root), [])
+			self.assertEqual(importedModules("import impy\nimpy.ImageLocalizationDataset.ImageLocalizationDataset", \
+																			cwd = root), [])
+		finally:
+			shutil.rmtree(root)
+
+if __name__ == "__main__":
+	unittest.main()
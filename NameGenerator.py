@@ -0,0 +1,192 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Deterministic names for the files produced by the dataset
+methods. A name is made of a prefix, a token of the run, the name of the
+original image with its extension and a counter of the outputs of that
+image, so two outputs never collide and a run with the same seed produces the same names with
+any number of workers.
+"""
+import os
+import csv
+import json
+import hashlib
+
+# Columns of the manifest.
+manifestColumns = ["name", "origin", "augmentationType", "index"]
+
+class NameGenerator(object):
+	def __init__(self, prefix = None, manifestPath = None, run = None):
+		"""
+		Generates the names of the outputs, prefix_run_image_extension_counter.
+		The outputs of an image must be generated by the same NameGenerator, the
+		dataset methods process every image in a single worker. The images with
+		the same file name share a counter, so images of different directories
+		get different names from the same generator. Generators with the same
+		prefix and run generate the same names: writing their outputs to the same
+		directory overwrites the files of the other, see runToken.
+		Args:
+			prefix: A string that starts every name, usually the name of the dataset.
+			manifestPath: A string with the path of a csv file where a row
+										(name, origin, augmentationType, index) is written for every
+										name. If None, no manifest is written.
+			run: A string returned by runToken. If None, the names are prefix_image_extension_counter.
+		Returns:
+			None
+		"""
+		super(NameGenerator, self).__init__()
+		# Assertions
+		if (prefix == None):
+			raise ValueError("ERROR: prefix parameter cannot be empty.")
+		# Class variables
+		self.prefix = prefix
+		self.manifestPath = manifestPath
+		self.run = run
+		self.shardIndex = None
+		self.counters = {}
+		self.rows = []
+
+	@property
+	def propertyPrefix(self):
+		return self.prefix
+
+	@property
+	def propertyManifestPath(self):
+		return self.manifestPath
+
+	@property
+	def propertyRun(self):
+		return self.run
+
+	def next(self, origin = None, augmentationType = None):
+		"""
+		Generates the name of the next output of an image.
+		Args:
+			origin: A string that contains the path to the original image.
+			augmentationType: A string that contains the type of augmentation.
+		Returns:
+			A string without extension.
+		"""
+		# Assertions
+		if (origin == None):
+			raise ValueError("ERROR: origin parameter cannot be empty.")
+		# Logic
+		stem, extension = os.path.splitext(os.path.basename(origin))
+		# The extension keeps a.jpg and a.png apart, without a dot because the
+		# names of the outputs are split at the extension.
+		if (extension != ""):
+			stem = "{}_{}".format(stem, extension[1:].lower())
+		index = self.counters.get(stem, 0)
+		self.counters[stem] = index + 1
+		if (self.run == None):
+			name = "{}_{}_{:04d}".format(self.prefix, stem, index)
+		else:
+			name = "{}_{}_{}_{:04d}".format(self.prefix, self.run, stem, index)
+		if (self.manifestPath != None):
+			self.rows.append((name, origin, augmentationType, index))
+		return name
+
+	def shard(self, index = None):
+		"""
+		Creates the generator of a worker task. Its manifest is written next to
+		the manifest of this generator and merged by close.
+		Args:
+			index: An int that identifies the worker task.
+		Returns:
+			A NameGenerator.
+		"""
+		generator = NameGenerator(prefix = self.prefix, manifestPath = None if \
+															(self.manifestPath == None) else shardManifestPath(path = self.manifestPath, index = index), \
+															run = self.run)
+		generator.shardIndex = index
+		return generator
+
+	def close(self):
+		"""
+		Writes the manifest. The generator of a worker task writes its own file,
+		the main generator merges them in the order of the tasks.
+		Args:
+			None
+		Returns:
+			None
+		"""
+		if (self.manifestPath == None):
+			return
+		directory, name = os.path.split(os.path.abspath(self.manifestPath))
+		shards = []
+		if (self.shardIndex == None):
+			shards = sorted([each for each in os.listdir(directory) if (isShardManifest(name = each, manifestName = name))])
+		if ((len(self.rows) == 0) and (len(shards) == 0)):
+			return
+		exists = os.path.isfile(self.manifestPath)
+		with open(self.manifestPath, "a", newline = "") as f:
+			writer = csv.writer(f)
+			if (not exists):
+				writer.writerow(manifestColumns)
+			for shard in shards:
+				with open(os.path.join(directory, shard), "r", newline = "") as g:
+					rows = csv.reader(g)
+					next(rows)
+					writer.writerows(rows)
+				os.remove(os.path.join(directory, shard))
+			writer.writerows(self.rows)
+		self.rows = []
+
+def runToken(method = None, parameters = None):
+	"""
+	Identifies a run of a dataset method in the names of its outputs. The runs
+	of different methods, or of a method with different parameters, write
+	different files to the same directory. Repeating a run overwrites its own
+	files, so pass a random value among the parameters of a run that is not
+	seeded.
+	Args:
+		method: A string with a short name of the method, for example "aug".
+		parameters: A list of values that can be written as json.
+	Returns:
+		A string method-hash.
+	"""
+	# Assertions
+	if (method == None):
+		raise ValueError("ERROR: method parameter cannot be empty.")
+	if (parameters == None):
+		parameters = []
+	# Logic
+	digest = hashlib.sha1(json.dumps(parameters, sort_keys = True, default = str).encode()).hexdigest()
+	return "{}-{}".format(method, digest[:8])
+
+def shardManifestPath(path = None, index = None):
+	"""
+	Returns the path of the manifest of a worker task.
+	Args:
+		path: A string with the path of the main manifest.
+		index: An int that identifies the worker task.
+	Returns:
+		A string.
+	"""
+	return "{}.{:05d}".format(path, index)
+
+def isShardManifest(name = None, manifestName = None):
+	"""
+	Checks whether a file name is the manifest of a worker task.
+	Args:
+		name: A string with the name of a file.
+		manifestName: A string with the name of the main manifest.
+	Returns:
+		A boolean.
+	"""
+	suffix = name[len(manifestName) + 1:]
+	return name.startswith(manifestName + ".") and (len(suffix) == 5) and suffix.isdigit()
+
+def readManifest(path = None):
+	"""
+	Reads a manifest.
+	Args:
+		path: A string with the path of a manifest written by NameGenerator.
+	Returns:
+		A list of dictionaries with the columns of manifestColumns.
+	"""
+	with open(path, "r", newline = "") as f:
+		rows = [row for row in csv.DictReader(f)]
+	for row in rows:
+		row["index"] = int(row["index"])
+	return rows
@@ -0,0 +1,60 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Unit tests for NameGenerator.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from NameGenerator import *
+
+class NameGenerator_test(unittest.TestCase):
+
+	def setUp(self):
+		self.root = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.root)
+
+	def test_next(self):
+		generator = NameGenerator(prefix = "db")
+		self.assertEqual(generator.next(origin = "/a/img0.png", augmentationType = "flip"), "db_img0_png_0000")
+		self.assertEqual(generator.next(origin = "/a/img1.png", augmentationType = "flip"), "db_img1_png_0000")
+		self.assertEqual(generator.next(origin = "/a/img0.png", augmentationType = "crop"), "db_img0_png_0001")
+		self.assertFalse(os.path.isfile(os.path.join(self.root, "manifest.csv")))
+
+	def test_sameName(self):
+		generator = NameGenerator(prefix = "db")
+		names = [generator.next(origin = origin, augmentationType = "flip") for origin in \
+							["/d/a.jpg", "/d/a.png", "/e/a.jpg", "/d/a"]]
+		self.assertEqual(names, ["db_a_jpg_0000", "db_a_png_0000", "db_a_jpg_0001", "db_a_0000"])
+
+	def test_run(self):
+		run = runToken(method = "aug", parameters = ["conf", 0.5, 3])
+		self.assertEqual(run, runToken(method = "aug", parameters = ["conf", 0.5, 3]))
+		self.assertNotEqual(run, runToken(method = "aug", parameters = ["conf", 0.5, 4]))
+		self.assertTrue(run.startswith("aug-"))
+		generator = NameGenerator(prefix = "db", run = run)
+		self.assertEqual(generator.next(origin = "/a/img0.png", augmentationType = "flip"), "db_{}_img0_png_0000".format(run))
+		self.assertEqual(generator.shard(index = 0).propertyRun, run)
+		with self.assertRaises(ValueError):
+			runToken(parameters = [])
+
+	def test_manifest(self):
+		path = os.path.join(self.root, "manifest.csv")
+		generator = NameGenerator(prefix = "db", manifestPath = path)
+		# Worker tasks close in any order, the manifest follows the tasks.
+		shards = [generator.shard(index = index) for index in range(3)]
+		for index in [2, 0, 1]:
+			shards[index].next(origin = "img{}.png".format(index), augmentationType = "flip")
+			shards[index].close()
+		generator.next(origin = "img3.png", augmentationType = "crop")
+		generator.close()
+		self.assertEqual(os.listdir(self.root), ["manifest.csv"])
+		rows = readManifest(path = path)
+		self.assertEqual([row["name"] for row in rows], ["db_img0_png_0000", "db_img1_png_0000", "db_img2_png_0000", "db_img3_png_0000"])
+		self.assertEqual(rows[3], {"name": "db_img3_png_0000", "origin": "img3.png", "augmentationType": "crop", "index": 0})
+
+if __name__ == "__main__":
+	unittest.main()
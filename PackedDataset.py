@@ -0,0 +1,325 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: A packed dataset format for the output of the dataset
+methods. Instead of an image and a xml file per sample, the samples
+are written in shards:
+	<prefix>-<shard>.bin: the encoded images, one after the other.
+	<prefix>-<shard>.index.npy: a row per sample with the offset of the
+		image in the .bin file and the range of its bounding boxes.
+	<prefix>-<shard>.boxes.npy: the bounding boxes of all the samples (Nx4).
+	<prefix>-<shard>.labels.npy: the label of every bounding box.
+	<prefix>.pack.json: the shards and the tables of strings.
+Every file can be memory mapped, so a sample is read without opening
+a file per sample.
+"""
+import os
+import re
+import json
+import collections
+import numpy as np
+from interface import implements
+
+try:
+	from .DatasetSinkMethods import *
+except:
+	from DatasetSinkMethods import *
+
+try:
+	from .EncodeSettings import *
+except:
+	from EncodeSettings import *
+
+try:
+	from .Instrumentation import instrumentation
+except:
+	from Instrumentation import instrumentation
+
+# Columns of the index of a shard.
+indexDtype = np.dtype([("offset", "<u8"), ("length", "<u8"), ("boxStart", "<u8"), \
+											("boxCount", "<u4"), ("height", "<u4"), ("width", "<u4"), ("depth", "<u4"), \
+											("augmentationType", "<u4"), ("origin", "<u4"), ("extension", "<u4")])
+
+# A sample of a packed dataset.
+# frame: A tensor that contains the decoded image.
+# boundingBoxes: An array of shape Nx4 with the bounding boxes [xmin, ymin, xmax, ymax].
+# names: A list of strings parallel to boundingBoxes.
+# augmentationType: A string that contains the type of augmentation.
+# origin: A string that contains the path to the original image.
+PackedSample = collections.namedtuple("PackedSample", ["frame", "boundingBoxes", "names", \
+																"augmentationType", "origin"])
+
+class PackedDatasetWriter(implements(DatasetSinkMethods)):
+	def __init__(self, directory = None, prefix = None, shardBytes = None, encodeSettings = None):
+		"""
+		A sink that writes the samples in shards. A new shard starts when the
+		encoded images of the current one reach shardBytes. The writer can be
+		closed and written again, the next samples go to a new shard.
+		The first time a writer is written, sharded or closed it removes the
+		files of its prefix and of the shards of its prefix from the directory,
+		so a run with fewer shards does not leave the shards of an earlier run.
+		Args:
+			directory: A string that contains the path to an existing directory.
+			prefix: A string that prefixes the names of the files. Default is "part".
+							Writers with the same prefix overwrite each other.
+			shardBytes: An int with the size of the images of a shard. Default is 1GB.
+			encodeSettings: An EncodeSettings with the format and the quality of the
+											images. Default keeps the format of every sample.
+		Returns:
+			None
+		"""
+		super(PackedDatasetWriter, self).__init__()
+		# Assertions
+		if (directory == None):
+			raise ValueError("ERROR: directory parameter cannot be empty.")
+		if (not os.path.isdir(directory)):
+			raise ValueError("ERROR: Directory does not exist: {}".format(directory))
+		if (prefix == None):
+			prefix = "part"
+		if (shardBytes == None):
+			shardBytes = 2**30
+		if (shardBytes <= 0):
+			raise ValueError("ERROR: shardBytes parameter must be greater than 0.")
+		if (encodeSettings == None):
+			encodeSettings = EncodeSettings()
+		# Class variables
+		self.directory = directory
+		self.prefix = prefix
+		self.shardBytes = shardBytes
+		self.encodeSettings = encodeSettings
+		self.shards = []
+		self.tables = {"classes": {}, "augmentationTypes": {}, "origins": {}, "extensions": {}}
+		self.file = None
+		self.rows = []
+		self.boxes = []
+		self.labels = []
+		self.bytes = 0
+		self.cleared = False
+
+	@property
+	def propertyShards(self):
+		return [shard["name"] for shard in self.shards]
+
+	@property
+	def propertySamples(self):
+		return sum([shard["samples"] for shard in self.shards]) + len(self.rows)
+
+	def clearPrefix(self):
+		"""
+		Removes the files that writers with the same prefix left in the directory,
+		once per writer. The writers of the shards are created clear.
+		Args:
+			None
+		Returns:
+			None
+		"""
+		if (self.cleared):
+			return
+		self.cleared = True
+		pattern = re.compile(re.escape(self.prefix) + \
+												r"(\.\d{5})?(-\d{5}\.(bin|index\.npy|boxes\.npy|labels\.npy)|\.pack\.json)$")
+		for each in os.listdir(self.directory):
+			if (pattern.match(each)):
+				os.remove(os.path.join(self.directory, each))
+
+	def code(self, table = None, value = None):
+		"""
+		Returns the position of a string in one of the tables, adding it if it
+		is new.
+		Args:
+			table: A string with the name of the table.
+			value: A string.
+		Returns:
+			An int.
+		"""
+		codes = self.tables[table]
+		if (not (value in codes)):
+			codes[value] = len(codes)
+		return codes[value]
+
+	def write(self, frame = None, boundingBoxes = None, names = None, augmentationType = None, origin = None, extension = None):
+		# Assertions
+		if (frame is None):
+			raise ValueError("ERROR: frame parameter cannot be empty.")
+		if (boundingBoxes is None):
+			boundingBoxes = []
+		if (names is None):
+			names = []
+		if (len(boundingBoxes) != len(names)):
+			raise ValueError("ERROR: boundingBoxes and names must have the same length.")
+		extension = self.encodeSettings.extension(extension = extension)
+		if (extension == None):
+			raise ValueError("ERROR: extension parameter cannot be empty.")
+		with instrumentation.stage("packedWrite") as stage:
+			# Encode the image.
+			encoded = self.encodeSettings.encode(frame = frame, extension = extension)
+			# Logic
+			if (self.file == None):
+				self.clearPrefix()
+				name = "{}-{:05d}".format(self.prefix, len(self.shards))
+				self.file = open(os.path.join(self.directory, name + ".bin"), "wb")
+			self.file.write(encoded.tobytes())
+			stage.addBytes(encoded.size)
+		self.rows.append((self.bytes, encoded.size, len(self.boxes), len(boundingBoxes), \
+										frame.shape[0], frame.shape[1], frame.shape[2] if (len(frame.shape) == 3) else 1, \
+										self.code(table = "augmentationTypes", value = str(augmentationType)), \
+										self.code(table = "origins", value = str(origin)), \
+										self.code(table = "extensions", value = extension)))
+		self.boxes.extend([[int(each) for each in boundingBox] for boundingBox in boundingBoxes])
+		self.labels.extend([self.code(table = "classes", value = name) for name in names])
+		self.bytes += encoded.size
+		if (self.bytes >= self.shardBytes):
+			self.closeShard()
+
+	def closeShard(self):
+		"""
+		Writes the index and the box table of the current shard.
+		Args:
+			None
+		Returns:
+			None
+		"""
+		if (self.file == None):
+			return
+		self.file.close()
+		self.file = None
+		name = "{}-{:05d}".format(self.prefix, len(self.shards))
+		path = os.path.join(self.directory, name)
+		np.save(path + ".index.npy", np.array(self.rows, dtype = indexDtype))
+		np.save(path + ".boxes.npy", np.array(self.boxes, dtype = np.int32).reshape(-1, 4))
+		np.save(path + ".labels.npy", np.array(self.labels, dtype = np.int32))
+		self.shards.append({"name": name, "samples": len(self.rows)})
+		self.rows, self.boxes, self.labels, self.bytes = [], [], [], 0
+
+	def shard(self, index = None):
+		self.clearPrefix()
+		writer = PackedDatasetWriter(directory = self.directory,
+																prefix = "{}.{:05d}".format(self.prefix, index),
+																shardBytes = self.shardBytes,
+																encodeSettings = self.encodeSettings)
+		writer.cleared = True
+		return writer
+
+	def close(self):
+		self.clearPrefix()
+		self.closeShard()
+		if (len(self.shards) == 0):
+			return
+		manifest = {"shards": self.shards}
+		for table, codes in self.tables.items():
+			manifest[table] = sorted(codes, key = codes.get)
+		with open(os.path.join(self.directory, self.prefix + ".pack.json"), "w") as f:
+			json.dump(manifest, f)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+class PackedDatasetReader(object):
+	def __init__(self, directory = None):
+		"""
+		Random access to the samples of the packed datasets of a directory. The
+		files are memory mapped, the samples of the writers are ordered by prefix.
+		Args:
+			directory: A string that contains the path to a directory written by
+								PackedDatasetWriter.
+		Returns:
+			None
+		"""
+		super(PackedDatasetReader, self).__init__()
+		# Assertions
+		if (directory == None):
+			raise ValueError("ERROR: directory parameter cannot be empty.")
+		if (not os.path.isdir(directory)):
+			raise ValueError("ERROR: Directory does not exist: {}".format(directory))
+		# Class variables
+		self.directory = directory
+		self.shards = []
+		for each in sorted(os.listdir(directory)):
+			if (not each.endswith(".pack.json")):
+				continue
+			with open(os.path.join(directory, each), "r") as f:
+				manifest = json.load(f)
+			for shard in manifest["shards"]:
+				path = os.path.join(directory, shard["name"])
+				self.shards.append({"blob": np.memmap(path + ".bin", dtype = np.uint8, mode = "r"),
+														"index": loadArray(path = path + ".index.npy"),
+														"boxes": loadArray(path = path + ".boxes.npy"),
+														"labels": loadArray(path = path + ".labels.npy"),
+														"manifest": manifest})
+		self.ends = np.cumsum([len(shard["index"]) for shard in self.shards], dtype = np.int64)
+
+	def __len__(self):
+		return int(self.ends[-1]) if (len(self.ends) > 0) else 0
+
+	def locate(self, index = None):
+		"""
+		Finds the shard of a sample.
+		Args:
+			index: An int with the position of the sample.
+		Returns:
+			A tuple with the shard and the row of the sample in the shard.
+		"""
+		if (index < 0):
+			index += len(self)
+		if ((index < 0) or (index >= len(self))):
+			raise IndexError("ERROR: Sample index out of range.")
+		position = int(np.searchsorted(self.ends, index, side = "right"))
+		start = int(self.ends[position - 1]) if (position > 0) else 0
+		shard = self.shards[position]
+		return shard, shard["index"][index - start]
+
+	def readEncoded(self, index = None):
+		"""
+		Reads the encoded image of a sample without decoding it.
+		Args:
+			index: An int with the position of the sample.
+		Returns:
+			A read-only array of bytes.
+		"""
+		shard, row = self.locate(index = index)
+		return shard["blob"][int(row["offset"]):int(row["offset"]) + int(row["length"])]
+
+	def readBoundingBoxes(self, index = None):
+		"""
+		Reads the annotation of a sample without reading its image.
+		Args:
+			index: An int with the position of the sample.
+		Returns:
+			A tuple with the bounding boxes (an array of shape Nx4) and a list
+			with their names.
+		"""
+		shard, row = self.locate(index = index)
+		start, end = int(row["boxStart"]), int(row["boxStart"]) + int(row["boxCount"])
+		classes = shard["manifest"]["classes"]
+		return np.array(shard["boxes"][start:end]), [classes[each] for each in shard["labels"][start:end]]
+
+	def __getitem__(self, index):
+		shard, row = self.locate(index = index)
+		frame = decodeImage(encoded = self.readEncoded(index = index))
+		boundingBoxes, names = self.readBoundingBoxes(index = index)
+		manifest = shard["manifest"]
+		return PackedSample(frame = frame,
+												boundingBoxes = boundingBoxes,
+												names = names,
+												augmentationType = manifest["augmentationTypes"][int(row["augmentationType"])],
+												origin = manifest["origins"][int(row["origin"])])
+
+	def __iter__(self):
+		for index in range(len(self)):
+			yield self[index]
+
+def loadArray(path = None):
+	"""
+	Memory maps a .npy file. Empty arrays cannot be mapped, they are read.
+	Args:
+		path: A string that contains the path to a .npy file.
+	Returns:
+		An array.
+	"""
+	try:
+		return np.load(path, mmap_mode = "r")
+	except ValueError:
+		return np.load(path)
@@ -0,0 +1,89 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Unit tests for the packed dataset format.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from PackedDataset import *
+
+class PackedDataset_test(unittest.TestCase):
+
+	def setUp(self):
+		self.root = tempfile.mkdtemp()
+		rng = np.random.RandomState(0)
+		self.samples = []
+		for i in range(7):
+			frame = rng.randint(0, 255, (20 + i, 30, 3)).astype(np.uint8)
+			boundingBoxes = [[j, j, j + 5, j + 6] for j in range(i % 3)]
+			names = [["car", "bus"][j % 2] for j in range(i % 3)]
+			self.samples.append((frame, boundingBoxes, names, "sample{}".format(i)))
+
+	def tearDown(self):
+		shutil.rmtree(self.root)
+
+	def test_writeRead(self):
+		# Small shards so the samples are split in several of them.
+		with PackedDatasetWriter(directory = self.root, shardBytes = 4000) as writer:
+			for frame, boundingBoxes, names, origin in self.samples:
+				writer.write(frame = frame, boundingBoxes = boundingBoxes, names = names, \
+										augmentationType = "flip", origin = origin, extension = ".png")
+		self.assertGreater(len(writer.propertyShards), 1)
+		self.assertEqual(writer.propertySamples, len(self.samples))
+		reader = PackedDatasetReader(directory = self.root)
+		self.assertEqual(len(reader), len(self.samples))
+		for i in [6, 0, 3, -1]:
+			frame, boundingBoxes, names, origin = self.samples[i]
+			sample = reader[i]
+			self.assertTrue(np.array_equal(sample.frame, frame))
+			self.assertTrue(np.array_equal(sample.boundingBoxes, np.array(boundingBoxes).reshape(-1, 4)))
+			self.assertEqual(sample.names, names)
+			self.assertEqual(sample.origin, origin)
+			self.assertEqual(sample.augmentationType, "flip")
+		with self.assertRaises(IndexError):
+			reader[len(self.samples)]
+
+	def test_shards(self):
+		# The writers of the shards are read in the order of their index, not in
+		# the order they were written.
+		writer = PackedDatasetWriter(directory = self.root, encodeSettings = EncodeSettings(imageFormat = ".jpg"))
+		for index in [2, 0, 1]:
+			shardWriter = writer.shard(index = index)
+			for frame, boundingBoxes, names, origin in self.samples[index*3:(index+1)*3]:
+				shardWriter.write(frame = frame, boundingBoxes = boundingBoxes, names = names, \
+													augmentationType = "Unspecified", origin = origin, extension = ".png")
+			shardWriter.close()
+		writer.close()
+		reader = PackedDatasetReader(directory = self.root)
+		self.assertEqual([sample.origin for sample in reader], [each[3] for each in self.samples])
+		boundingBoxes, names = reader.readBoundingBoxes(index = 5)
+		self.assertEqual(names, self.samples[5][2])
+		# The images are encoded as jpgs.
+		self.assertEqual(bytes(reader.readEncoded(index = 0)[:2]), b"\xff\xd8")
+
+	def test_rewrite(self):
+		# A second run with fewer shards replaces the files of the first one.
+		for shards in [4, 2]:
+			writer = PackedDatasetWriter(directory = self.root)
+			for index in range(shards):
+				shardWriter = writer.shard(index = index)
+				frame, boundingBoxes, names, origin = self.samples[index]
+				shardWriter.write(frame = frame, boundingBoxes = boundingBoxes, names = names, \
+													augmentationType = "Unspecified", origin = origin, extension = ".png")
+				shardWriter.close()
+			writer.close()
+		reader = PackedDatasetReader(directory = self.root)
+		self.assertEqual([sample.origin for sample in reader], [each[3] for each in self.samples[:2]])
+		self.assertEqual(len(os.listdir(self.root)), 2 * 5)
+		# Other prefixes are kept.
+		with PackedDatasetWriter(directory = self.root, prefix = "other") as writer:
+			frame, boundingBoxes, names, origin = self.samples[0]
+			writer.write(frame = frame, boundingBoxes = boundingBoxes, names = names, \
+									augmentationType = "Unspecified", origin = origin, extension = ".png")
+		self.assertEqual(len(PackedDatasetReader(directory = self.root)), 3)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,141 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: A slab of frames in shared memory for the samples that
+worker processes send to the caller. Instead of pickling a frame through
+a queue, a worker copies it into a free slot of the slab and sends the
+reference of the slot. The caller copies the frame out of the slot and
+releases it.
+"""
+import collections
+import numpy as np
+
+try:
+	from .LazyImport import lazyImport
+except:
+	from LazyImport import lazyImport
+multiprocessing = lazyImport("multiprocessing")
+shared_memory = lazyImport("multiprocessing.shared_memory")
+
+# A frame stored in a slot of a SharedFrameSlab.
+# slot: An int with the position of the slot.
+# shape: A tuple with the shape of the frame.
+# dtype: A string with the dtype of the frame.
+SlabFrame = collections.namedtuple("SlabFrame", ["slot", "shape", "dtype"])
+
+class SharedFrameSlab(object):
+	def __init__(self, slots = None, slotBytes = None):
+		"""
+		Allocates slots * slotBytes bytes of shared memory. The slab is passed to
+		the worker processes as an argument, the process that created it frees
+		the memory on close.
+		Args:
+			slots: An int with the number of slots. A writer blocks while every slot
+							is in use.
+			slotBytes: An int with the size of a slot. Frames that do not fit are
+									not stored.
+		Returns:
+			None
+		"""
+		super(SharedFrameSlab, self).__init__()
+		# Assertions
+		if ((type(slots) != int) or (slots < 1)):
+			raise ValueError("ERROR: slots parameter must be an int greater than 0.")
+		if ((type(slotBytes) != int) or (slotBytes < 1)):
+			raise ValueError("ERROR: slotBytes parameter must be an int greater than 0.")
+		# Class variables
+		self.slots = slots
+		self.slotBytes = slotBytes
+		self.memory = shared_memory.SharedMemory(create = True, size = slots * slotBytes)
+		self.owner = True
+		self.free = multiprocessing.Queue()
+		for slot in range(slots):
+			self.free.put(slot)
+
+	@property
+	def propertySlots(self):
+		return self.slots
+
+	@property
+	def propertySlotBytes(self):
+		return self.slotBytes
+
+	def __getstate__(self):
+		# The workers attach to the memory by its name.
+		return {"slots": self.slots, "slotBytes": self.slotBytes, "name": self.memory.name, "free": self.free}
+
+	def __setstate__(self, state):
+		self.slots = state["slots"]
+		self.slotBytes = state["slotBytes"]
+		self.memory = shared_memory.SharedMemory(name = state["name"])
+		self.owner = False
+		self.free = state["free"]
+
+	def fits(self, frame = None):
+		"""
+		Checks whether a frame fits in a slot.
+		Args:
+			frame: A tensor.
+		Returns:
+			A boolean.
+		"""
+		return frame.nbytes <= self.slotBytes
+
+	def view(self, slotFrame = None):
+		"""
+		An array on the memory of a slot.
+		Args:
+			slotFrame: A SlabFrame.
+		Returns:
+			A tensor that shares the memory of the slot.
+		"""
+		return np.ndarray(slotFrame.shape, dtype = np.dtype(slotFrame.dtype), buffer = self.memory.buf, \
+											offset = slotFrame.slot * self.slotBytes)
+
+	def put(self, frame = None):
+		"""
+		Copies a frame into a free slot. Blocks until a slot is released.
+		Args:
+			frame: A tensor that fits in a slot.
+		Returns:
+			A SlabFrame to send to the process that takes the frame.
+		"""
+		# Assertions
+		if (frame is None):
+			raise ValueError("ERROR: frame parameter cannot be empty.")
+		if (not self.fits(frame = frame)):
+			raise ValueError("ERROR: The frame ({} bytes) does not fit in a slot ({} bytes)."\
+												.format(frame.nbytes, self.slotBytes))
+		# Logic
+		slotFrame = SlabFrame(slot = self.free.get(), shape = tuple(frame.shape), dtype = frame.dtype.str)
+		self.view(slotFrame = slotFrame)[...] = frame
+		return slotFrame
+
+	def take(self, slotFrame = None):
+		"""
+		Copies a frame out of its slot and releases the slot.
+		Args:
+			slotFrame: A SlabFrame returned by put.
+		Returns:
+			A tensor.
+		"""
+		frame = self.view(slotFrame = slotFrame).copy()
+		self.free.put(slotFrame.slot)
+		return frame
+
+	def close(self):
+		"""
+		Detaches from the shared memory. The process that created the slab also
+		frees it.
+		Args:
+			None
+		Returns:
+			None
+		"""
+		if (self.memory == None):
+			return
+		self.memory.close()
+		if (self.owner):
+			self.memory.unlink()
+			self.free.close()
+		self.memory = None
@@ -0,0 +1,78 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Compares sending frames from a worker process through a
+multiprocessing.Queue (pickled) and through a SharedFrameSlab.
+Usage: python SharedFrameSlab_benchmark.py --height 2160 --width 3840 --frames 200
+"""
+import time
+import argparse
+import multiprocessing
+import numpy as np
+from SharedFrameSlab import *
+
+def sendFrames(frame = None, count = None, samples = None, slab = None):
+	"""
+	Sends a frame count times, as the worker of iterateDataAugmentation does.
+	Args:
+		frame: A tensor.
+		count: An int.
+		samples: A multiprocessing.Queue.
+		slab: A SharedFrameSlab or None to pickle the frames.
+	Returns:
+		None
+	"""
+	for i in range(count):
+		frame[0, 0, 0] = i % 256
+		samples.put(slab.put(frame = frame) if (slab != None) else frame.copy())
+	samples.put(None)
+
+def timeMode(frame = None, count = None, prefetch = None, slab = None):
+	"""
+	Receives count frames from a worker process.
+	Args:
+		frame: A tensor.
+		count: An int.
+		prefetch: An int with the size of the queue.
+		slab: A SharedFrameSlab or None.
+	Returns:
+		A float with the seconds.
+	"""
+	samples = multiprocessing.Queue(maxsize = prefetch)
+	process = multiprocessing.Process(target = sendFrames, args = (frame, count, samples, slab))
+	start = time.perf_counter()
+	process.start()
+	received = 0
+	while True:
+		sample = samples.get()
+		if (sample is None):
+			break
+		if (slab != None):
+			sample = slab.take(slotFrame = sample)
+		received += int(sample[0, 0, 0] == received % 256)
+	seconds = time.perf_counter() - start
+	process.join()
+	if (received != count):
+		raise Exception("ERROR: Received {} of {} frames.".format(received, count))
+	return seconds
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--height", type = int, default = 2160)
+	parser.add_argument("--width", type = int, default = 3840)
+	parser.add_argument("--frames", type = int, default = 200)
+	parser.add_argument("--prefetch", type = int, default = 16)
+	args = parser.parse_args()
+	frame = np.random.randint(0, 255, (args.height, args.width, 3)).astype(np.uint8)
+	print("{} frames of {}x{}x3 ({:.1f} MB)".format(args.frames, args.height, args.width, frame.nbytes / 2**20))
+	print("{:<20} {:>10} {:>10}".format("mode", "frames/s", "MB/s"))
+	seconds = timeMode(frame = frame, count = args.frames, prefetch = args.prefetch)
+	print("{:<20} {:>10.1f} {:>10.1f}".format("pickled queue", args.frames / seconds, \
+																					args.frames * frame.nbytes / seconds / 2**20))
+	slab = SharedFrameSlab(slots = args.prefetch + 1, slotBytes = frame.nbytes)
+	try:
+		seconds = timeMode(frame = frame, count = args.frames, prefetch = args.prefetch, slab = slab)
+	finally:
+		slab.close()
+	print("{:<20} {:>10.1f} {:>10.1f}".format("shared memory slab", args.frames / seconds, \
+																					args.frames * frame.nbytes / seconds / 2**20))
@@ -0,0 +1,59 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Unit tests for SharedFrameSlab.
+"""
+import unittest
+import multiprocessing
+import numpy as np
+from SharedFrameSlab import *
+
+def putFrames(slab = None, frames = None, references = None):
+	for frame in frames:
+		references.put(slab.put(frame = frame))
+
+class SharedFrameSlab_test(unittest.TestCase):
+
+	def setUp(self):
+		self.frames = [np.random.randint(0, 255, (48, 64, 3)).astype(np.uint8) for i in range(6)]
+
+	def test_putTake(self):
+		slab = SharedFrameSlab(slots = 2, slotBytes = 48 * 64 * 3)
+		try:
+			slotFrame = slab.put(frame = self.frames[0])
+			self.assertEqual(slotFrame.shape, (48, 64, 3))
+			# The slot keeps the frame until it is taken.
+			self.frames[0][...] = 0
+			frame = slab.take(slotFrame = slotFrame)
+			self.assertFalse(np.array_equal(frame, self.frames[0]))
+			self.assertTrue(np.array_equal(slab.take(slotFrame = slab.put(frame = self.frames[1])), self.frames[1]))
+			small = np.arange(10, dtype = np.float32)
+			self.assertTrue(np.array_equal(slab.take(slotFrame = slab.put(frame = small)), small))
+			self.assertFalse(slab.fits(frame = np.zeros((49, 64, 3), np.uint8)))
+			with self.assertRaises(ValueError):
+				slab.put(frame = np.zeros((49, 64, 3), np.uint8))
+		finally:
+			slab.close()
+		with self.assertRaises(ValueError):
+			SharedFrameSlab(slots = 0, slotBytes = 10)
+
+	def test_process(self):
+		# Six frames go through two slots, the writer waits for the slots.
+		slab = SharedFrameSlab(slots = 2, slotBytes = 48 * 64 * 3)
+		name = slab.memory.name
+		references = multiprocessing.Queue()
+		process = multiprocessing.Process(target = putFrames, args = (slab, self.frames, references))
+		try:
+			process.start()
+			for frame in self.frames:
+				self.assertTrue(np.array_equal(slab.take(slotFrame = references.get(timeout = 30)), frame))
+			process.join()
+			self.assertEqual(process.exitcode, 0)
+		finally:
+			slab.close()
+		# The creator frees the memory.
+		with self.assertRaises(FileNotFoundError):
+			shared_memory.SharedMemory(name = name)
+
+if __name__ == "__main__":
+	unittest.main()
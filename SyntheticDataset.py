@@ -0,0 +1,96 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Generates localization datasets of synthetic images and VOC
+annotations for benchmarks and tests. The images are gradients with a
+filled rectangle under every bounding box, so the augmenters work on
+content that is neither flat nor random noise.
+"""
+import os
+import numpy as np
+
+try:
+	from .LazyImport import lazyImport
+except:
+	from LazyImport import lazyImport
+cv2 = lazyImport("cv2")
+
+try:
+	from .Util import *
+except:
+	from Util import *
+
+def createSyntheticDataset(directory = None, images = None, height = None, width = None, boxes = None, classes = None, extension = None, seed = None):
+	"""
+	Writes a dataset with an images and an annotations directory.
+	Args:
+		directory: A string that contains the path to an existing directory.
+		images: An int with the number of images. Default is 8.
+		height: An int with the height of the images. Default is 600.
+		width: An int with the width of the images. Default is 800.
+		boxes: An int with the number of bounding boxes of every image. Default is 5.
+		classes: An int with the number of classes, named class0, class1, ... Default is 3.
+		extension: A string with the format of the images. Default is ".png".
+		seed: An int that seeds the random generator. Default is 0.
+	Returns:
+		A tuple with the paths to the images and the annotations directories.
+	"""
+	# Assertions
+	if (directory == None):
+		raise ValueError("ERROR: directory parameter cannot be empty.")
+	if (not os.path.isdir(directory)):
+		raise ValueError("ERROR: Directory does not exist: {}".format(directory))
+	images = 8 if (images == None) else images
+	height = 600 if (height == None) else height
+	width = 800 if (width == None) else width
+	boxes = 5 if (boxes == None) else boxes
+	classes = 3 if (classes == None) else classes
+	extension = ".png" if (extension == None) else extension
+	seed = 0 if (seed == None) else seed
+	if ((images < 1) or (boxes < 0) or (classes < 1)):
+		raise ValueError("ERROR: images and classes must be greater than 0, boxes cannot be negative.")
+	if ((height < 16) or (width < 16)):
+		raise ValueError("ERROR: The images must be at least 16x16.")
+	# Local variables
+	rng = np.random.default_rng(seed)
+	imagesDirectory = os.path.join(directory, "images")
+	annotationsDirectory = os.path.join(directory, "annotations")
+	os.makedirs(imagesDirectory, exist_ok = True)
+	os.makedirs(annotationsDirectory, exist_ok = True)
+	x, y = np.meshgrid(np.linspace(0, 255, width), np.linspace(0, 255, height))
+	# Logic
+	for i in range(images):
+		phase = rng.uniform(0, 255, 3)
+		frame = np.stack([(x + phase[0]) % 256, (y + phase[1]) % 256, ((x + y) / 2 + phase[2]) % 256], \
+											axis = 2).astype(np.uint8)
+		boundingBoxes = createSyntheticBoundingBoxes(rng = rng, height = height, width = width, boxes = boxes)
+		for xmin, ymin, xmax, ymax in boundingBoxes:
+			cv2.rectangle(frame, (xmin, ymin), (xmax - 1, ymax - 1), [int(each) for each in rng.integers(0, 256, 3)], -1)
+		name = "synthetic{:05d}".format(i)
+		cv2.imwrite(os.path.join(imagesDirectory, name + extension), frame)
+		Util.save_annotation(filename = name + extension,
+												path = os.path.join(imagesDirectory, name + extension),
+												database_name = "synthetic",
+												frame_size = frame.shape,
+												data_augmentation_type = "Unspecified",
+												bounding_boxes = boundingBoxes,
+												names = ["class{}".format(k) for k in rng.integers(0, classes, len(boundingBoxes))],
+												origin = "synthetic",
+												output_directory = os.path.join(annotationsDirectory, name + ".xml"))
+	return imagesDirectory, annotationsDirectory
+
+def createSyntheticBoundingBoxes(rng = None, height = None, width = None, boxes = None):
+	"""
+	Draws bounding boxes between 1/16 and 1/4 of the size of an image.
+	Args:
+		rng: A numpy.random.Generator.
+		height: An int with the height of the image.
+		width: An int with the width of the image.
+		boxes: An int with the number of bounding boxes.
+	Returns:
+		A list of lists [xmin, ymin, xmax, ymax].
+	"""
+	sizes = np.stack([rng.integers(width // 16, width // 4 + 1, boxes), \
+										rng.integers(height // 16, height // 4 + 1, boxes)], axis = 1)
+	mins = np.stack([rng.integers(0, width - sizes[:, 0] + 1), rng.integers(0, height - sizes[:, 1] + 1)], axis = 1)
+	return np.concatenate([mins, mins + sizes], axis = 1).astype(int).tolist()
@@ -0,0 +1,44 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Unit tests for SyntheticDataset.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import cv2
+from SyntheticDataset import *
+from ImageAnnotation import *
+
+class SyntheticDataset_test(unittest.TestCase):
+
+	def setUp(self):
+		self.root = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.root)
+
+	def test_createSyntheticDataset(self):
+		imagesDirectory, annotationsDirectory = createSyntheticDataset(directory = self.root, images = 3, height = 60, \
+																																	width = 80, boxes = 4, classes = 2)
+		self.assertEqual(sorted(os.listdir(imagesDirectory)), ["synthetic00000.png", "synthetic00001.png", "synthetic00002.png"])
+		for i in range(3):
+			frame = cv2.imread(os.path.join(imagesDirectory, "synthetic{:05d}.png".format(i)))
+			annotation = ImageAnnotation(path = os.path.join(annotationsDirectory, "synthetic{:05d}.xml".format(i)))
+			self.assertEqual(frame.shape, (60, 80, 3))
+			self.assertEqual(len(annotation.propertyBoundingBoxes), 4)
+			self.assertTrue(set(annotation.propertyNames) <= {"class0", "class1"})
+			boxes = np.array(annotation.propertyBoundingBoxes)
+			self.assertTrue((boxes[:, :2] >= 0).all() and (boxes[:, 2] <= 80).all() and (boxes[:, 3] <= 60).all())
+		# The same seed writes the same dataset.
+		other = tempfile.mkdtemp(dir = self.root)
+		otherImages, _ = createSyntheticDataset(directory = other, images = 3, height = 60, width = 80, boxes = 4, classes = 2)
+		self.assertTrue(np.array_equal(cv2.imread(os.path.join(imagesDirectory, "synthetic00001.png")), \
+																	cv2.imread(os.path.join(otherImages, "synthetic00001.png"))))
+		with self.assertRaises(ValueError):
+			createSyntheticDataset(directory = self.root, height = 8)
+
+if __name__ == "__main__":
+	unittest.main()
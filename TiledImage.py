@@ -0,0 +1,567 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Out-of-core access to images that do not fit in memory.
+A TiledImage reads the regions of an uncompressed TIFF (tiled or
+striped, classic or BigTIFF) or of a .npy file from a memory map of
+the file, tile by tile, and keeps the last tiles in a cache of bounded
+size.
+"""
+import os
+import mmap
+import struct
+import collections
+import numpy as np
+
+try:
+	from .LazyImport import lazyImport
+except:
+	from LazyImport import lazyImport
+cv2 = lazyImport("cv2")
+
+try:
+	from .Instrumentation import instrumentation
+except:
+	from Instrumentation import instrumentation
+
+# Extensions that can be read by TiledImage.
+tiledExtensions = [".tif", ".tiff", ".npy"]
+
+# TIFF tags.
+IMAGE_WIDTH = 256
+IMAGE_LENGTH = 257
+BITS_PER_SAMPLE = 258
+COMPRESSION = 259
+PHOTOMETRIC = 262
+STRIP_OFFSETS = 273
+SAMPLES_PER_PIXEL = 277
+ROWS_PER_STRIP = 278
+STRIP_BYTE_COUNTS = 279
+PLANAR_CONFIGURATION = 284
+TILE_WIDTH = 322
+TILE_LENGTH = 323
+TILE_OFFSETS = 324
+TILE_BYTE_COUNTS = 325
+EXTRA_SAMPLES = 338
+SAMPLE_FORMAT = 339
+
+# TIFF field types -> numpy type codes.
+tiffTypes = {1: "u1", 2: "u1", 3: "u2", 4: "u4", 6: "i1", 7: "u1", 8: "i2", 9: "i4", \
+						11: "f4", 12: "f8", 16: "u8", 17: "i8", 18: "u8"}
+
+class TiledImage(object):
+	def __init__(self, path = None, tileSize = None, cacheBytes = None, color = None):
+		"""
+		Opens an image stored as an uncompressed TIFF or a .npy file. The file is
+		memory mapped and only the header is read. The image is divided in tiles: the tiles of a tiled TIFF,
+		or square tiles of tileSize for striped TIFFs and .npy files.
+		Args:
+			path: A string that contains the path to the image.
+			tileSize: An int with the size of the tiles of images that are not tiled.
+								Default is 512.
+			cacheBytes: An int with the maximum amount of bytes of the tiles kept in
+									memory. Default is 64MB.
+			color: A boolean that if True converts the regions like cv2.imread does
+							by default, see convertToColor. Default is False, the regions
+							keep the channels and the dtype of the file.
+		Returns:
+			None
+		"""
+		super(TiledImage, self).__init__()
+		# Assertions
+		if (path == None):
+			raise ValueError("ERROR: path parameter cannot be empty.")
+		if (not os.path.isfile(path)):
+			raise ValueError("ERROR: Path to image does not exist {}.".format(path))
+		if (tileSize == None):
+			tileSize = 512
+		if (cacheBytes == None):
+			cacheBytes = 64 * 2**20
+		if (color == None):
+			color = False
+		# Class variables
+		self.path = path
+		self.color = color
+		self.cacheBytes = cacheBytes
+		self.cache = collections.OrderedDict()
+		self.cachedBytes = 0
+		self.tileReads = 0
+		self.cacheHits = 0
+		self.file = open(path, "rb")
+		self.map = None
+		try:
+			self.map = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+			self.bytes = np.frombuffer(self.map, np.uint8)
+			if (path.endswith(".npy")):
+				self.readNpyHeader()
+			else:
+				self.readTiffHeader()
+		except:
+			self.close()
+			raise
+		# The shape and the dtype of the file, the properties are the ones of the regions.
+		self.storedShape, self.storedDtype = self.shape, self.dtype
+		if (self.color):
+			self.shape, self.dtype = self.shape[:2] + (3,), np.dtype(np.uint8)
+		if (self.tileShape == None):
+			self.tileShape = (min(tileSize, self.shape[0]), min(tileSize, self.shape[1]))
+
+	@property
+	def propertyShape(self):
+		return self.shape
+
+	@property
+	def propertyDtype(self):
+		return self.dtype
+
+	@property
+	def propertyTileShape(self):
+		return self.tileShape
+
+	@property
+	def propertyTileReads(self):
+		return self.tileReads
+
+	@property
+	def propertyCacheHits(self):
+		return self.cacheHits
+
+	@property
+	def propertyCachedBytes(self):
+		return self.cachedBytes
+
+	def close(self):
+		"""
+		Closes the file and releases the cache.
+		Args:
+			None
+		Returns:
+			None
+		"""
+		self.cache.clear()
+		self.cachedBytes = 0
+		self.bytes = None
+		if (self.map != None):
+			try:
+				self.map.close()
+			except BufferError:
+				# An array still points to the map, it is unmapped when released.
+				pass
+			self.map = None
+		if (self.file != None):
+			self.file.close()
+			self.file = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def read(self, size = None, offset = None):
+		"""
+		Reads size bytes at offset of the file.
+		"""
+		self.checkRange(offsets = [offset], size = size)
+		return self.map[offset:offset + size]
+
+	def checkRange(self, offsets = None, size = None):
+		"""
+		Raises a ValueError if a segment of size bytes at any of the offsets is
+		not inside the file.
+		"""
+		if ((np.min(offsets) < 0) or ((np.max(offsets) + size) > len(self.map))):
+			raise ValueError("ERROR: The file is truncated: {}".format(self.path))
+
+	def readNpyHeader(self):
+		"""
+		Reads the shape and the dtype of a .npy file. The rows of the array are
+		contiguous after the header.
+		"""
+		with open(self.path, "rb") as f:
+			version = np.lib.format.read_magic(f)
+			if (version == (1, 0)):
+				shape, fortranOrder, dtype = np.lib.format.read_array_header_1_0(f)
+			else:
+				shape, fortranOrder, dtype = np.lib.format.read_array_header_2_0(f)
+			dataOffset = f.tell()
+		if (fortranOrder or (len(shape) < 2) or (len(shape) > 3)):
+			raise ValueError("ERROR: Only C ordered arrays of shape HxW or HxWxC are supported: {}"\
+												.format(self.path))
+		self.shape = tuple(shape)
+		self.dtype = dtype
+		self.rgb = False
+		self.tileShape = None
+		self.tileOffsets = None
+		rowBytes = self.rowBytes()
+		self.rowOffsets = lambda rows: dataOffset + rows * rowBytes
+
+	def readTiffHeader(self):
+		"""
+		Reads the first image file directory of a TIFF file.
+		"""
+		header = self.read(size = min(16, len(self.map)), offset = 0)
+		if (header[:2] == b"II"):
+			endian = "<"
+		elif (header[:2] == b"MM"):
+			endian = ">"
+		else:
+			raise ValueError("ERROR: Not a TIFF file: {}".format(self.path))
+		version = struct.unpack(endian + "H", header[2:4])[0]
+		if (version == 42):
+			countFormat, entrySize, valueSize = "H", 12, 4
+			offset = struct.unpack(endian + "I", header[4:8])[0]
+		elif (version == 43):
+			countFormat, entrySize, valueSize = "Q", 20, 8
+			offset = struct.unpack(endian + "Q", header[8:16])[0]
+		else:
+			raise ValueError("ERROR: Not a TIFF file: {}".format(self.path))
+		countSize = struct.calcsize(countFormat)
+		count = struct.unpack(endian + countFormat, self.read(size = countSize, offset = offset))[0]
+		entries = self.read(size = count * entrySize, offset = offset + countSize)
+		tags = {}
+		for k in range(count):
+			entry = entries[k * entrySize:(k + 1) * entrySize]
+			tag, fieldType = struct.unpack(endian + "HH", entry[:4])
+			if (not (fieldType in tiffTypes)):
+				continue
+			valueCount = struct.unpack(endian + countFormat.replace("H", "I"), entry[4:4 + valueSize])[0]
+			dtype = np.dtype(tiffTypes[fieldType]).newbyteorder(endian)
+			size = valueCount * dtype.itemsize
+			data = entry[4 + valueSize:] if (size <= valueSize) else \
+							self.read(size = size, offset = struct.unpack(endian + ("I" if (valueSize == 4) else "Q"), \
+												entry[4 + valueSize:])[0])
+			tags[tag] = np.frombuffer(data[:size], dtype).astype(np.int64)
+		first = lambda tag, default: int(tags[tag][0]) if (tag in tags) else default
+		# Only uncompressed chunky images are read.
+		if (first(COMPRESSION, 1) != 1):
+			raise ValueError("ERROR: Compressed TIFF files are not supported: {}".format(self.path))
+		if (first(PLANAR_CONFIGURATION, 1) != 1):
+			raise ValueError("ERROR: Planar TIFF files are not supported: {}".format(self.path))
+		height, width = first(IMAGE_LENGTH, None), first(IMAGE_WIDTH, None)
+		samples = first(SAMPLES_PER_PIXEL, 1)
+		bits = first(BITS_PER_SAMPLE, 1)
+		sampleFormat = {1: "u", 2: "i", 3: "f"}.get(first(SAMPLE_FORMAT, 1), None)
+		if ((not (bits in [8, 16, 32, 64])) or (sampleFormat == None)):
+			raise ValueError("ERROR: Unsupported sample format: {}".format(self.path))
+		self.dtype = np.dtype(sampleFormat + str(bits // 8)).newbyteorder(endian)
+		self.shape = (height, width) if (samples == 1) else (height, width, samples)
+		self.rgb = (first(PHOTOMETRIC, 1) == 2) and (samples in [3, 4])
+		if (TILE_OFFSETS in tags):
+			self.tileShape = (first(TILE_LENGTH, None), first(TILE_WIDTH, None))
+			self.tileOffsets = tags[TILE_OFFSETS]
+		else:
+			self.tileShape = None
+			self.tileOffsets = None
+			rowsPerStrip = min(first(ROWS_PER_STRIP, height), height)
+			stripOffsets = tags[STRIP_OFFSETS]
+			rowBytes = self.rowBytes()
+			self.rowOffsets = lambda rows: stripOffsets[rows // rowsPerStrip] + (rows % rowsPerStrip) * rowBytes
+
+	def rowBytes(self):
+		return int(np.prod(self.shape[1:])) * self.dtype.itemsize
+
+	def readTile(self, row = None, column = None):
+		"""
+		Reads a tile from disk or from the cache.
+		Args:
+			row: An int with the row of the tile.
+			column: An int with the column of the tile.
+		Returns:
+			A read-only tensor that contains the tile. Tiles on the right and bottom
+			edges are cropped to the image.
+		"""
+		key = (row, column)
+		if (key in self.cache):
+			self.cache.move_to_end(key)
+			self.cacheHits += 1
+			return self.cache[key]
+		tileHeight, tileWidth = self.tileShape
+		height, width = self.shape[:2]
+		y, x = row * tileHeight, column * tileWidth
+		channels = self.storedShape[2:]
+		pixelBytes = int(np.prod(channels)) * self.storedDtype.itemsize
+		with instrumentation.stage("tileRead") as stage:
+			if (self.tileOffsets is not None):
+				# Tiles are stored whole, even on the edges of the image.
+				index = row * ((width + tileWidth - 1) // tileWidth) + column
+				offset = int(self.tileOffsets[index])
+				self.checkRange(offsets = [offset], size = tileHeight * tileWidth * pixelBytes)
+				data = self.bytes[offset:offset + tileHeight * tileWidth * pixelBytes]
+				tile = data.view(self.storedDtype).reshape((tileHeight, tileWidth) + channels)
+				tile = tile[:height - y, :width - x]
+			else:
+				# Row-major storage, a segment is gathered for every row of the tile.
+				rows = np.arange(y, min(y + tileHeight, height))
+				columns = min(tileWidth, width - x)
+				offsets = self.rowOffsets(rows) + x * pixelBytes
+				self.checkRange(offsets = offsets, size = columns * pixelBytes)
+				data = self.bytes[offsets[:, None] + np.arange(columns * pixelBytes)]
+				tile = data.view(self.storedDtype).reshape((len(rows), columns) + channels)
+			stage.addBytes(data.nbytes)
+		if (self.rgb):
+			tile = tile[..., [2, 1, 0] + list(range(3, self.storedShape[2]))]
+		# The tile is copied out of the map, so the cache does not keep the file mapped.
+		tile = np.array(tile, self.storedDtype.newbyteorder("="))
+		if (self.color):
+			tile = convertToColor(frame = tile)
+		tile.setflags(write = False)
+		self.tileReads += 1
+		# Cache the tile.
+		self.cache[key] = tile
+		self.cachedBytes += tile.nbytes
+		while ((self.cachedBytes > self.cacheBytes) and (len(self.cache) > 1)):
+			__, evicted = self.cache.popitem(last = False)
+			self.cachedBytes -= evicted.nbytes
+		return tile
+
+	def readRegion(self, ix = None, iy = None, x = None, y = None):
+		"""
+		Reads a region of the image. Only the tiles that intersect the region are
+		read. The coordinates are clipped to the image like numpy slicing.
+		Args:
+			ix, iy, x, y: Ints with the region [ix, x) x [iy, y).
+		Returns:
+			A tensor with the region, channels in BGR order like cv2.imread. It has
+			the shape and the dtype of propertyShape and propertyDtype.
+		"""
+		height, width = self.shape[:2]
+		ix, x = max(0, min(ix, width)), max(0, min(x, width))
+		iy, y = max(0, min(iy, height)), max(0, min(y, height))
+		region = np.empty((max(y - iy, 0), max(x - ix, 0)) + self.shape[2:], self.dtype.newbyteorder("="))
+		if (region.size == 0):
+			return region
+		tileHeight, tileWidth = self.tileShape
+		for row in range(iy // tileHeight, (y + tileHeight - 1) // tileHeight):
+			for column in range(ix // tileWidth, (x + tileWidth - 1) // tileWidth):
+				tile = self.readTile(row = row, column = column)
+				ty, tx = row * tileHeight, column * tileWidth
+				top, bottom = max(iy, ty), min(y, ty + tile.shape[0])
+				left, right = max(ix, tx), min(x, tx + tile.shape[1])
+				region[top - iy:bottom - iy, left - ix:right - ix] = tile[top - ty:bottom - ty, left - tx:right - tx]
+		return region
+
+	def __getitem__(self, key):
+		"""
+		Reads a region with slices frame[iy:y, ix:x] or frame[iy:y, ix:x, channels].
+		"""
+		if ((type(key) != tuple) or (len(key) < 2) or \
+				(not all([(type(each) == slice) and (each.step in [None, 1]) for each in key[:2]]))):
+			raise TypeError("ERROR: TiledImage only supports regions frame[iy:y, ix:x].")
+		rows, columns = key[0], key[1]
+		height, width = self.shape[:2]
+		region = self.readRegion(ix = 0 if (columns.start == None) else columns.start,
+														iy = 0 if (rows.start == None) else rows.start,
+														x = width if (columns.stop == None) else columns.stop,
+														y = height if (rows.stop == None) else rows.stop)
+		return region[(slice(None), slice(None)) + key[2:]]
+
+	def patches(self, coordinates = None):
+		"""
+		Reads patches, for example the coordinates of ImagePreprocess.computePatchGrid.
+		Overlapping patches share the tiles of the cache.
+		Args:
+			coordinates: A list of lists or an array of shape Nx4 with the patches
+										(ix, iy, x, y).
+		Returns:
+			A generator of tensors.
+		"""
+		for ix, iy, x, y in coordinates:
+			yield self.readRegion(ix = int(ix), iy = int(iy), x = int(x), y = int(y))
+
+class DecodedImage(object):
+	def __init__(self, frame = None):
+		"""
+		A decoded frame with the interface of TiledImage, for the images that are
+		read whole with cv2.imread.
+		Args:
+			frame: A tensor that contains an image.
+		Returns:
+			None
+		"""
+		super(DecodedImage, self).__init__()
+		self.frame = frame
+		self.shape = frame.shape
+
+	@property
+	def propertyShape(self):
+		return self.shape
+
+	def close(self):
+		self.frame = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def readRegion(self, ix = None, iy = None, x = None, y = None):
+		return self.frame[max(iy, 0):y, max(ix, 0):x]
+
+	def __getitem__(self, key):
+		return self.frame[key]
+
+def convertToColor(frame = None):
+	"""
+	Converts a frame like cv2.imread with IMREAD_COLOR converts the images it
+	decodes: a gray image is repeated in 3 channels, the channels after the
+	first 3 (alpha) are dropped and the samples become uint8. Unsigned samples
+	of more than 8 bits keep their 8 most significant bits, other samples are
+	rounded and saturated to [0, 255].
+	Args:
+		frame: A tensor of shape HxW or HxWxC in BGR order.
+	Returns:
+		A uint8 tensor of shape HxWx3.
+	"""
+	if (len(frame.shape) == 2):
+		frame = frame[:, :, None]
+	if (frame.shape[2] < 3):
+		frame = frame[:, :, [0, 0, 0]]
+	elif (frame.shape[2] > 3):
+		frame = frame[:, :, :3]
+	if (frame.dtype.kind == "u"):
+		frame = frame >> (8 * frame.dtype.itemsize - 8)
+	elif (frame.dtype != np.uint8):
+		frame = np.clip(np.rint(frame), 0, 255)
+	return np.ascontiguousarray(frame, np.uint8)
+
+def isTiledImage(path = None):
+	"""
+	Checks whether an image can be read by TiledImage.
+	Args:
+		path: A string that contains the path to an image.
+	Returns:
+		A boolean.
+	"""
+	image = openTiledImage(path = path)
+	if (image == None):
+		return False
+	image.close()
+	return True
+
+def openTiledImage(path = None, tileSize = None, cacheBytes = None, color = None):
+	"""
+	Opens an image with TiledImage if it can be read tile by tile.
+	Args:
+		path: A string that contains the path to an image.
+		tileSize: An int, see TiledImage.
+		cacheBytes: An int, see TiledImage.
+		color: A boolean, see TiledImage.
+	Returns:
+		A TiledImage, or None if the image cannot be read by TiledImage.
+	"""
+	if (not any([path.lower().endswith(extension) for extension in tiledExtensions])):
+		return None
+	try:
+		return TiledImage(path = path, tileSize = tileSize, cacheBytes = cacheBytes, color = color)
+	except (ValueError, KeyError, TypeError, struct.error):
+		return None
+
+def openImage(path = None, tileSize = None, cacheBytes = None):
+	"""
+	Opens an image for reading regions. Uncompressed TIFF and .npy files are
+	read tile by tile, other images are decoded whole. TIFF regions are 3
+	channel uint8 frames like the decoded images, whatever the compression
+	of the file. .npy files are raw tensors, as FrameCache reads them.
+	Args:
+		path: A string that contains the path to an image.
+		tileSize: An int, see TiledImage.
+		cacheBytes: An int, see TiledImage.
+	Returns:
+		A TiledImage or a DecodedImage.
+	"""
+	# The header is parsed once, a file that TiledImage cannot read is decoded.
+	image = openTiledImage(path = path, tileSize = tileSize, cacheBytes = cacheBytes, \
+													color = (not path.lower().endswith(".npy")))
+	if (image != None):
+		return image
+	with instrumentation.stage("imread") as stage:
+		frame = cv2.imread(path)
+		stage.addFileBytes(path)
+	if (frame is None):
+		raise Exception("ERROR: Image could not be read: {}".format(path))
+	instrumentation.count("decodes")
+	return DecodedImage(frame = frame)
+
+def saveTiledTiff(path = None, frame = None, tileSize = None):
+	"""
+	Writes an image as an uncompressed tiled TIFF that TiledImage can read tile
+	by tile. BigTIFF is used for images of 4GB or more. The frame is read tile
+	by tile, so it can be a numpy memmap or a TiledImage.
+	Args:
+		path: A string that contains the path to the output file.
+		frame: A tensor of shape HxW or HxWxC in BGR order like cv2.imread.
+		tileSize: An int multiple of 16 with the size of the tiles. Default is 512.
+	Returns:
+		None
+	"""
+	# Assertions
+	if (path == None):
+		raise ValueError("ERROR: path parameter cannot be empty.")
+	if (frame is None):
+		raise ValueError("ERROR: frame parameter cannot be empty.")
+	if (tileSize == None):
+		tileSize = 512
+	if ((tileSize % 16) != 0):
+		raise ValueError("ERROR: tileSize must be a multiple of 16.")
+	# Local variables
+	height, width = frame.shape[:2]
+	samples = frame.shape[2] if (len(frame.shape) == 3) else 1
+	dtype = np.dtype(frame.dtype)
+	sampleFormat = {"u": 1, "i": 2, "f": 3}[dtype.kind]
+	rows, columns = (height + tileSize - 1) // tileSize, (width + tileSize - 1) // tileSize
+	tileBytes = tileSize * tileSize * samples * dtype.itemsize
+	bigTiff = (rows * columns * tileBytes + 2**20) >= 2**32
+	countFormat, entrySize, valueSize, offsetFormat = ("Q", 20, 8, "Q") if bigTiff else ("H", 12, 4, "I")
+	headerSize = 16 if bigTiff else 8
+	tileOffsets = headerSize + tileBytes * np.arange(rows * columns, dtype = np.int64)
+	rgb = samples in [3, 4]
+	# Tags, sorted by tag.
+	tags = [(IMAGE_WIDTH, 4, [width]),
+					(IMAGE_LENGTH, 4, [height]),
+					(BITS_PER_SAMPLE, 3, [dtype.itemsize * 8] * samples),
+					(COMPRESSION, 3, [1]),
+					(PHOTOMETRIC, 3, [2 if rgb else 1]),
+					(SAMPLES_PER_PIXEL, 3, [samples]),
+					(PLANAR_CONFIGURATION, 3, [1]),
+					(TILE_WIDTH, 3, [tileSize]),
+					(TILE_LENGTH, 3, [tileSize]),
+					(TILE_OFFSETS, 16 if bigTiff else 4, tileOffsets.tolist()),
+					(TILE_BYTE_COUNTS, 16 if bigTiff else 4, [tileBytes] * (rows * columns))]
+	if (samples == 4):
+		tags.append((EXTRA_SAMPLES, 3, [2]))
+	elif ((samples > 1) and (not rgb)):
+		tags.append((EXTRA_SAMPLES, 3, [0] * (samples - 1)))
+	tags.append((SAMPLE_FORMAT, 3, [sampleFormat] * samples))
+	with open(path, "wb") as f:
+		if (bigTiff):
+			f.write(b"II" + struct.pack("<HHHQ", 43, 8, 0, 0))
+		else:
+			f.write(b"II" + struct.pack("<HI", 42, 0))
+		# Tiles, row by row. Tiles on the edges are padded with zeros.
+		tile = np.zeros((tileSize, tileSize) + frame.shape[2:], dtype.newbyteorder("<"))
+		for row in range(rows):
+			for column in range(columns):
+				y, x = row * tileSize, column * tileSize
+				region = np.asarray(frame[y:y + tileSize, x:x + tileSize])
+				tile[...] = 0
+				tile[:region.shape[0], :region.shape[1]] = region
+				f.write((tile[..., [2, 1, 0] + list(range(3, samples))] if rgb else tile).tobytes())
+		# Image file directory and the values that do not fit in its entries.
+		ifdOffset = f.tell()
+		valuesOffset = ifdOffset + struct.calcsize("<" + countFormat) + len(tags) * entrySize + valueSize
+		entries, values = [], []
+		for tag, fieldType, value in tags:
+			data = np.array(value, np.dtype(tiffTypes[fieldType]).newbyteorder("<")).tobytes()
+			if (len(data) <= valueSize):
+				field = data.ljust(valueSize, b"\x00")
+			else:
+				field = struct.pack("<" + offsetFormat, valuesOffset + sum([len(each) for each in values]))
+				values.append(data)
+			entries.append(struct.pack("<HH" + ("Q" if bigTiff else "I"), tag, fieldType, len(value)) + field)
+		f.write(struct.pack("<" + countFormat, len(tags)) + b"".join(entries) + b"\x00" * valueSize)
+		f.write(b"".join(values))
+		# Point the header to the directory.
+		f.seek(8 if bigTiff else 4)
+		f.write(struct.pack("<" + offsetFormat, ifdOffset))
@@ -0,0 +1,118 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Unit tests for the out-of-core reader of TiledImage.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import cv2
+from TiledImage import *
+
+class TiledImage_test(unittest.TestCase):
+
+	def setUp(self):
+		self.root = tempfile.mkdtemp()
+		self.frame = np.random.RandomState(0).randint(0, 255, (300, 517, 3)).astype(np.uint8)
+
+	def tearDown(self):
+		shutil.rmtree(self.root)
+
+	def test_saveTiledTiff(self):
+		path = os.path.join(self.root, "a.tif")
+		saveTiledTiff(path = path, frame = self.frame, tileSize = 64)
+		self.assertTrue(np.array_equal(cv2.imread(path), self.frame))
+		with TiledImage(path = path) as image:
+			self.assertEqual(image.propertyShape, self.frame.shape)
+			self.assertEqual(image.propertyTileShape, (64, 64))
+			self.assertTrue(np.array_equal(image[:, :], self.frame))
+			self.assertTrue(np.array_equal(image.readRegion(ix = 60, iy = 10, x = 200, y = 70), \
+																		self.frame[10:70, 60:200]))
+			self.assertTrue(np.array_equal(image[250:400, 500:600, 1], self.frame[250:400, 500:600, 1]))
+
+	def test_stripedTiff(self):
+		path = os.path.join(self.root, "a.tif")
+		cv2.imwrite(path, self.frame, [cv2.IMWRITE_TIFF_COMPRESSION, 1])
+		self.assertTrue(isTiledImage(path = path))
+		with TiledImage(path = path, tileSize = 32) as image:
+			self.assertTrue(np.array_equal(image.readRegion(ix = 33, iy = 71, x = 401, y = 299), \
+																		self.frame[71:299, 33:401]))
+
+	def test_npy(self):
+		path = os.path.join(self.root, "a.npy")
+		frame = self.frame.astype(np.float32)
+		np.save(path, frame)
+		with openImage(path = path, tileSize = 100) as image:
+			self.assertIsInstance(image, TiledImage)
+			self.assertEqual(image.propertyDtype, np.float32)
+			self.assertTrue(np.array_equal(image.readRegion(ix = 5, iy = 150, x = 120, y = 260), \
+																		frame[150:260, 5:120]))
+
+	def test_cache(self):
+		path = os.path.join(self.root, "a.tif")
+		saveTiledTiff(path = path, frame = self.frame, tileSize = 64)
+		tileBytes = 64 * 64 * 3
+		with TiledImage(path = path, cacheBytes = 4 * tileBytes) as image:
+			# A region inside a single tile reads a single tile.
+			image.readRegion(ix = 1, iy = 1, x = 10, y = 10)
+			self.assertEqual(image.propertyTileReads, 1)
+			image.readRegion(ix = 20, iy = 20, x = 30, y = 30)
+			self.assertEqual(image.propertyTileReads, 1)
+			self.assertEqual(image.propertyCacheHits, 1)
+			# The cache never holds more than cacheBytes.
+			for patch in image.patches(coordinates = [[0, 0, 517, 300], [100, 100, 300, 200]]):
+				self.assertLessEqual(image.propertyCachedBytes, 4 * tileBytes)
+
+	def test_close(self):
+		path = os.path.join(self.root, "a.tif")
+		saveTiledTiff(path = path, frame = self.frame, tileSize = 64)
+		image = openImage(path = path)
+		region = image.readRegion(ix = 0, iy = 0, x = 100, y = 100)
+		tile = image.readTile(row = 0, column = 0)
+		image.close()
+		# The tiles are copied out of the map, they outlive the image.
+		self.assertTrue(np.array_equal(region, self.frame[:100, :100]))
+		self.assertTrue(np.array_equal(tile, self.frame[:64, :64]))
+		# A truncated file is not read past its end.
+		with open(path, "r+b") as f:
+			f.truncate(1000)
+		self.assertFalse(isTiledImage(path = path))
+
+	def test_compressedTiff(self):
+		path = os.path.join(self.root, "a.tif")
+		cv2.imwrite(path, self.frame)
+		self.assertFalse(isTiledImage(path = path))
+		with openImage(path = path) as image:
+			self.assertIsInstance(image, DecodedImage)
+			self.assertTrue(np.array_equal(image.readRegion(ix = 5, iy = 6, x = 50, y = 60), \
+																		self.frame[6:60, 5:50]))
+
+	def test_colorTiff(self):
+		rng = np.random.RandomState(1)
+		frames = {"gray": rng.randint(0, 256, (70, 90)).astype(np.uint8),
+							"bgra": rng.randint(0, 256, (70, 90, 4)).astype(np.uint8),
+							"gray16": rng.randint(0, 65536, (70, 90)).astype(np.uint16),
+							"bgr16": rng.randint(0, 65536, (70, 90, 3)).astype(np.uint16)}
+		for name, frame in frames.items():
+			# Uncompressed files are read tile by tile, compressed ones are decoded.
+			path = os.path.join(self.root, name + ".tif")
+			compressedPath = os.path.join(self.root, name + "Compressed.tif")
+			saveTiledTiff(path = path, frame = frame, tileSize = 32)
+			cv2.imwrite(compressedPath, frame)
+			with openImage(path = path) as image, openImage(path = compressedPath) as decoded:
+				self.assertIsInstance(image, TiledImage)
+				self.assertIsInstance(decoded, DecodedImage)
+				self.assertEqual(image.propertyShape, (70, 90, 3))
+				region = image.readRegion(ix = 10, iy = 5, x = 80, y = 66)
+				expected = decoded.readRegion(ix = 10, iy = 5, x = 80, y = 66)
+				self.assertEqual((region.shape, region.dtype), (expected.shape, expected.dtype))
+				# libtiff scales 16 bit color by 257 instead of 256.
+				self.assertLessEqual(np.abs(region.astype(int) - expected).max(), 1 if (name == "bgr16") else 0)
+			# The raw samples are still available.
+			with TiledImage(path = path) as image:
+				self.assertTrue(np.array_equal(image[:, :], frame))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -8,14 +8,25 @@ import datetime
 import re
 import json
 import numpy as np
-import cv2
 import xml.etree.ElementTree as ET
+
+try:
+  from .LazyImport import lazyImport
+except:
+  from LazyImport import lazyImport
+cv2 = lazyImport("cv2")
+
 # Local modules.
 try:
   from .AssertDataTypes import *
 except:
   from AssertDataTypes import *
 
+try:
+  from .Instrumentation import instrumentation
+except:
+  from Instrumentation import instrumentation
+
 class Util(object):
   def __init__(self):
     super(Util, self).__init__()
@@ -94,17 +105,27 @@ class Util(object):
       return ".jpg"
     elif (filename.endswith(".png")):
       return ".png"
+    elif (filename.endswith(".tif")):
+      return ".tif"
+    elif (filename.endswith(".tiff")):
+      return ".tiff"
+    elif (filename.endswith(".webp")):
+      return ".webp"
+    elif (filename.endswith(".npy")):
+      return ".npy"
     else:
       return None
 
   @staticmethod
-  def save_img(frame = None, img_name = None, output_image_directory = None):
+  def save_img(frame = None, img_name = None, output_image_directory = None, encode_settings = None):
     """
     Saves an image and its annotation.
     Args:
       frame: A numpy/tensorflow tensor that contains an image.
       img_name: A string with a name that contains an image extension.
       output_image_directory: A string that contains the path to save the image.
+      encode_settings: An EncodeSettings with the quality of the encoder. If None,
+                      the defaults of cv2.imwrite are used.
     Returns:
       None
     Raises:
@@ -122,7 +143,12 @@ class Util(object):
     # Local variables.
     img_save_path = os.path.join(output_image_directory, img_name)
     # Logic.
-    cv2.imwrite(img_save_path, frame)
+    with instrumentation.stage("imwrite") as stage:
+      if (encode_settings == None):
+        cv2.imwrite(img_save_path, frame)
+      else:
+        encode_settings.write(frame = frame, path = img_save_path)
+      stage.addFileBytes(img_save_path)
     # Assert file has been written to disk. 
     if (not os.path.isfile(img_save_path)):
       raise Exception("ERROR: Image was not saved. This happens " +\
@@ -207,7 +233,9 @@ class Util(object):
     extension = Util.detect_file_extension(filename)
     if (extension == None):
       raise Exception("Image's extension not supported {}".format(filename))
-    tree.write(output_directory)
+    with instrumentation.stage("xmlWrite") as stage:
+      tree.write(output_directory)
+      stage.addFileBytes(output_directory)
     # Assert file has been written to disk.
     if (not os.path.isfile(output_directory)):
       print(origin_information)
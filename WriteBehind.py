@@ -0,0 +1,178 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: A bounded write-behind queue. The slow part of saving a
+sample (encoding the image, writing the files) runs in a pool of
+threads while the caller keeps augmenting. cv2 and the file system
+release the GIL, so the threads run in parallel with the caller.
+"""
+import threading
+import contextlib
+import concurrent.futures
+
+class WriteBehindQueue(object):
+	def __init__(self, workers = None, maxPending = None):
+		"""
+		Runs functions in a pool of threads. At most maxPending functions can be
+		pending, submit blocks until one of them finishes (backpressure). The
+		errors of the functions are raised by flush.
+		Args:
+			workers: An int with the number of threads. Default is 2.
+			maxPending: An int with the maximum number of functions that are queued
+									or running. Default is 4 times the number of threads.
+		Returns:
+			None
+		"""
+		super(WriteBehindQueue, self).__init__()
+		# Assertions
+		if (workers == None):
+			workers = 2
+		if (type(workers) != int):
+			raise TypeError("ERROR: workers parameter must be of type int.")
+		if (workers < 1):
+			raise ValueError("ERROR: workers parameter must be greater than 0.")
+		if (maxPending == None):
+			maxPending = 4 * workers
+		if (type(maxPending) != int):
+			raise TypeError("ERROR: maxPending parameter must be of type int.")
+		if (maxPending < 1):
+			raise ValueError("ERROR: maxPending parameter must be greater than 0.")
+		# Class variables
+		self.workers = workers
+		self.maxPending = maxPending
+		self.executor = concurrent.futures.ThreadPoolExecutor(max_workers = workers)
+		self.slots = threading.Semaphore(maxPending)
+		self.lock = threading.Lock()
+		self.pending = set()
+		self.errors = []
+		self.submitted = 0
+		self.waits = 0
+
+	@property
+	def propertyPending(self):
+		return len(self.pending)
+
+	@property
+	def propertySubmitted(self):
+		return self.submitted
+
+	@property
+	def propertyWaits(self):
+		return self.waits
+
+	def submit(self, function = None, **kwargs):
+		"""
+		Queues a call function(**kwargs). The arguments must not be modified by
+		the caller after they are submitted.
+		Args:
+			function: A callable.
+			kwargs: The arguments of the callable.
+		Returns:
+			None
+		"""
+		# Assertions
+		if (function == None):
+			raise ValueError("ERROR: function parameter cannot be empty.")
+		# Logic
+		if (not self.slots.acquire(blocking = False)):
+			self.waits += 1
+			self.slots.acquire()
+		future = self.executor.submit(function, **kwargs)
+		with self.lock:
+			self.pending.add(future)
+		future.add_done_callback(self.done)
+		self.submitted += 1
+
+	def done(self, future = None):
+		"""
+		Releases the slot of a finished function and keeps its error, unless flush
+		already collected it.
+		Args:
+			future: A concurrent.futures.Future.
+		Returns:
+			None
+		"""
+		with self.lock:
+			if (future in self.pending):
+				self.pending.discard(future)
+				if (future.exception() != None):
+					self.errors.append(future.exception())
+		self.slots.release()
+
+	def flush(self):
+		"""
+		Waits until every submitted function finished. If some of them failed, the
+		errors are cleared and an exception is raised with the first one as cause.
+		Args:
+			None
+		Returns:
+			None
+		"""
+		with self.lock:
+			pending = list(self.pending)
+		concurrent.futures.wait(pending)
+		# A finished future wakes its waiters before its callbacks run, so the
+		# errors of the futures that done did not see yet are read here.
+		with self.lock:
+			errors = self.errors
+			self.errors = []
+			for future in pending:
+				if (future in self.pending):
+					self.pending.discard(future)
+					if (future.exception() != None):
+						errors.append(future.exception())
+		if (len(errors) > 0):
+			raise Exception("ERROR: {} writes failed, the first error was: {}"\
+											.format(len(errors), errors[0])) from errors[0]
+
+	def close(self):
+		"""
+		Flushes the queue and stops the threads.
+		Args:
+			None
+		Returns:
+			None
+		"""
+		try:
+			self.flush()
+		finally:
+			self.executor.shutdown(wait = True)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+@contextlib.contextmanager
+def closeAfter(*resources):
+	"""
+	Closes resources, in order, when a block ends.
+		with closeAfter(sink):
+			sink.write(...)
+	If the block raised, the errors of close are printed and the error of the
+	block is raised. Otherwise every resource is closed and the first error of
+	close is raised.
+	Args:
+		resources: Objects with a close method.
+	Returns:
+		A context manager.
+	"""
+	try:
+		yield
+	except BaseException:
+		for resource in resources:
+			try:
+				resource.close()
+			except Exception as e:
+				print("WARNING: {} could not be closed after an error: {}".format(type(resource).__name__, e))
+		raise
+	error = None
+	for resource in resources:
+		try:
+			resource.close()
+		except Exception as e:
+			if (error == None):
+				error = e
+	if (error != None):
+		raise error
@@ -0,0 +1,132 @@
+"""
+Author: Rodrigo Loza
+Email: lozuwaucb@gmail.com
+Description: Unit tests for the write-behind queue.
+"""
+import io
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+import contextlib
+import numpy as np
+from unittest import mock
+import cv2
+from WriteBehind import *
+from DatasetSink import *
+from ImageAnnotation import *
+
+class WriteBehind_test(unittest.TestCase):
+
+	def test_backpressure(self):
+		running = []
+		maxRunning = [0]
+		lock = threading.Lock()
+		def work(value = None):
+			with lock:
+				running.append(value)
+				maxRunning[0] = max(maxRunning[0], len(running))
+			time.sleep(0.01)
+			with lock:
+				running.remove(value)
+		queue = WriteBehindQueue(workers = 2, maxPending = 3)
+		for i in range(10):
+			queue.submit(function = work, value = i)
+			self.assertLessEqual(queue.propertyPending, 3)
+		queue.close()
+		self.assertEqual(queue.propertySubmitted, 10)
+		self.assertGreater(queue.propertyWaits, 0)
+		self.assertLessEqual(maxRunning[0], 2)
+		self.assertEqual(queue.propertyPending, 0)
+
+	def test_errors(self):
+		def work(value = None):
+			if (value % 3 == 0):
+				raise IOError("disk full {}".format(value))
+		queue = WriteBehindQueue(workers = 2)
+		# The errors are raised by flush, not by submit.
+		for i in range(6):
+			queue.submit(function = work, value = i)
+		with self.assertRaises(Exception) as context:
+			queue.flush()
+		self.assertTrue("2 writes failed" in str(context.exception))
+		self.assertIsInstance(context.exception.__cause__, IOError)
+		# The errors are reported once.
+		queue.close()
+
+	def test_errorsBeforeCallbacks(self):
+		# The waiters of a future wake up before its callbacks run, flush does not
+		# depend on done to see the errors.
+		def work(value = None):
+			raise IOError("disk full {}".format(value))
+		queue = WriteBehindQueue(workers = 1)
+		with mock.patch.object(queue, "done", lambda future = None: None):
+			queue.submit(function = work, value = 0)
+			future = list(queue.pending)[0]
+			with self.assertRaises(Exception) as context:
+				queue.flush()
+		self.assertTrue("1 writes failed" in str(context.exception))
+		# A callback that runs after flush does not report the error again.
+		queue.done(future = future)
+		queue.close()
+
+	def test_closeAfter(self):
+		class Resource(object):
+			def __init__(self):
+				self.closed = False
+			def close(self):
+				self.closed = True
+				raise IOError("close failed")
+		# An error of the block is not replaced by the errors of close.
+		resources = [Resource(), Resource()]
+		with self.assertRaises(KeyError):
+			with contextlib.redirect_stdout(io.StringIO()):
+				with closeAfter(*resources):
+					raise KeyError("block failed")
+		self.assertTrue(all([each.closed for each in resources]))
+		# Without an error in the block, the error of close is raised.
+		resources = [Resource(), Resource()]
+		with self.assertRaises(IOError):
+			with closeAfter(*resources):
+				pass
+		self.assertTrue(all([each.closed for each in resources]))
+
+class DirectorySinkWriteBehind_test(unittest.TestCase):
+
+	def setUp(self):
+		self.root = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.root)
+
+	def test_write(self):
+		sink = DirectorySink(outputImageDirectory = self.root,
+												outputAnnotationDirectory = self.root,
+												databaseName = "unit_test",
+												writers = 2,
+												maxPending = 2)
+		frames = []
+		frame = np.zeros((20, 30, 3), np.uint8)
+		boundingBoxes = [[1, 2, 10, 12]]
+		for i in range(8):
+			sink.write(frame = frame, boundingBoxes = boundingBoxes, names = ["car"], \
+								augmentationType = "Unspecified", origin = "unit_test", extension = ".png")
+			frames.append(frame.copy())
+			# The caller modifies its frame and its bounding boxes in place.
+			frame += 1
+			boundingBoxes[0][2] += 1
+		sink.close()
+		images = sorted([each for each in os.listdir(self.root) if each.endswith(".png")])
+		self.assertEqual(len(images), 8)
+		saved = sorted([cv2.imread(os.path.join(self.root, each))[0, 0, 0] for each in images])
+		self.assertEqual(saved, [each[0, 0, 0] for each in frames])
+		# Every annotation has the bounding boxes of the time it was written.
+		for each in images:
+			size, names, boxes = parseAnnotationStream(os.path.join(self.root, each[:-4] + ".xml"))
+			self.assertEqual(names, ["car"])
+			self.assertEqual(boxes[0, 2], 10 + cv2.imread(os.path.join(self.root, each))[0, 0, 0])
+
+if __name__ == "__main__":
+	unittest.main()
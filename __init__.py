@@ -18,7 +18,26 @@ The docstring examples assume that `numpy` has been imported as `np`::
 
 """
 # Import libraries 
-import sys
+import importlib
+
+# The modules of the package. They are imported on first access, so
+# importing impy costs nothing until impy.ImageLocalizationDataset is used.
+__submodules__ = ["AnnotationIndex", "AnnotationProcessing", "ApplyAugmentation", "AssertDataTypes", \
+									"AugmentationConfigurationFile", "AugmentationPlan", "BatchAugmenters", "Benchmark", \
+									"BoundingBoxAugmenters", "ColorAugmenters", "DatasetSink", "EncodeSettings", \
+									"FrameCache", "GeometricAugmenters", "ImageAnnotation", "ImageDataset", \
+									"ImageLocalizationDataset", "ImagePreprocess", "Instrumentation", "LazyImport", \
+									"NameGenerator", "PackedDataset", "SharedFrameSlab", "SyntheticDataset", \
+									"TiledImage", "Util", "VectorOperations", "WriteBehind"]
+
+def __getattr__(name):
+	# PEP 562: called for the names that are not defined in the package yet.
+	if (name in __submodules__):
+		return importlib.import_module("." + name, __name__)
+	raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+def __dir__():
+	return sorted(set(globals()) | set(__submodules__))
 
 # try:
 #     from .utils import *